@@ -0,0 +1 @@
+"""AutoShield back-end modules shared by the Streamlit app and offline tools."""
@@ -0,0 +1,391 @@
+"""
+Multi-image damage assessment.
+
+Adjusters upload several angles of the same vehicle. assess_images() runs the
+assessment backend over all of them concurrently on a bounded thread pool, with a
+timeout per call, and merge_assessments() folds the per-image results into one
+assessment: parts seen from several angles are listed once and the combined
+total_estimated_repair_hours is the sum over the deduplicated parts. Wall-clock time
+is close to the slowest single image rather than the sum.
+
+A backend is any callable taking an image path and returning the assessment JSON
+string; StubBackend is a local stand-in for development and testing.
+
+Streaming backends yield the JSON text in chunks instead. IncrementalAssessmentParser
+consumes those chunks as they arrive, hands back each parts_to_repair entry as soon
+as it is complete and reports malformed or truncated output as early as it can.
+
+The dashboard's (mock) model client and the worker-pool tasks that run it live at
+the end of this module: run_assessment_task streams one image, and
+run_multi_assessment_task streams every uploaded angle through assess_images,
+publishing the merge of the parts received so far, both through the shared
+assessment_cache.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from autoshield import assessment_cache, metrics
+
+MAX_WORKERS = 4
+CALL_TIMEOUT = 60.0  # seconds per backend call
+
+SEVERITY_RANK = {"minor": 1, "moderate": 2, "severe": 3}
+ACTION_RANK = {"r&i": 1, "repair": 2, "replace": 3}
+
+class StubBackend:
+    """
+    Local assessment backend: returns `outputs[path]` (or `default`) after `delay`
+    seconds. Outputs may be JSON strings or dicts; records every path it was called with.
+    """
+
+    def __init__(self, outputs=None, default=None, delay=0.0):
+        self.outputs = outputs or {}
+        self.default = default
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, image_path):
+        with self._lock: self.calls.append(image_path)
+        if self.delay: time.sleep(self.delay)
+        output = self.outputs.get(image_path, self.default)
+        if output is None: raise ValueError(f"No stub output for {image_path}")
+        return output if isinstance(output, str) else json.dumps(output)
+
+class AssessmentParseError(ValueError):
+    """The streamed assessment is not valid JSON."""
+
+class TruncatedAssessmentError(AssessmentParseError):
+    """The stream ended before the assessment JSON was complete."""
+
+class IncrementalAssessmentParser:
+    """
+    Incremental parser for a streamed assessment.
+
+    feed(chunk) scans only the new chunk, tracking strings and bracket nesting, and
+    returns the parts_to_repair entries completed by that chunk (each decoded once).
+    Besides the chunks themselves (`text`, the raw output), it keeps only the text of
+    the part being read and of the last top-level key. Structural errors (text before
+    the opening brace, mismatched brackets, a part that does not decode) raise
+    AssessmentParseError from feed() immediately; close() raises
+    TruncatedAssessmentError if the stream stopped mid-object and otherwise returns the
+    full parsed assessment.
+    """
+
+    def __init__(self):
+        self.text = []
+        self.parts = []
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._key = None  # characters of the top-level string being read
+        self._last_key = None  # the top-level key just read, while only whitespace and ':' follow it
+        self._colon = False
+        self._parts_depth = None  # stack depth inside the parts_to_repair array
+        self._part = None  # characters of the parts_to_repair entry being read
+        self._done = False
+
+    def _fail(self, message):
+        raise AssessmentParseError(f"{message} at char {self._pos}")
+
+    def feed(self, chunk):
+        self.text.append(chunk)
+        completed = []
+        for ch in chunk:
+            if self._part is not None: self._part.append(ch)
+            top_level = len(self._stack) == 1
+            if self._in_string:
+                if self._escaped: self._escaped = False
+                elif ch == "\\": self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if top_level: self._last_key, self._colon = "".join(self._key), False
+                if self._in_string and top_level: self._key.append(ch)
+            elif ch == '"':
+                self._in_string = True
+                if top_level: self._key = []
+            elif ch in "{[":
+                if not self._stack and (self._done or ch != "{"): self._fail("Expected a single JSON object")
+                if ch == "[" and top_level and self._colon and self._last_key == "parts_to_repair":
+                    self._parts_depth = 2
+                if ch == "{" and self._parts_depth is not None and len(self._stack) == self._parts_depth:
+                    self._part = ["{"]
+                self._stack.append(ch)
+                self._last_key = None
+            elif ch in "}]":
+                if not self._stack or {"}": "{", "]": "["}[ch] != self._stack[-1]: self._fail(f"Unexpected '{ch}'")
+                self._stack.pop()
+                if ch == "}" and self._part is not None and len(self._stack) == self._parts_depth:
+                    try:
+                        part = json.loads("".join(self._part))
+                    except json.JSONDecodeError as e:
+                        self._fail(f"Malformed parts_to_repair entry ({e.msg})")
+                    self._part = None
+                    self.parts.append(part)
+                    completed.append(part)
+                elif ch == "]" and len(self._stack) + 1 == self._parts_depth:
+                    self._parts_depth = None
+                if not self._stack: self._done = True
+                self._last_key = None
+            elif not self._stack and not ch.isspace():
+                self._fail("Unexpected text outside the JSON object")
+            elif ch == ":" and self._last_key is not None and not self._colon:
+                self._colon = True
+            elif not ch.isspace():
+                self._last_key = None
+            self._pos += 1
+        return completed
+
+    def close(self):
+        """Returns the parsed assessment; raises if the stream was truncated or invalid."""
+        if not self._done:
+            raise TruncatedAssessmentError(f"Assessment ended after {self._pos} chars with {len(self._stack)} unclosed bracket(s)")
+        try:
+            return json.loads("".join(self.text))
+        except json.JSONDecodeError as e:
+            raise AssessmentParseError(str(e)) from e
+
+def parse_stream(chunks, on_part=None):
+    """
+    Parses an iterable of text chunks; calls on_part(part, parts_so_far) as each
+    parts_to_repair entry completes. Returns (parsed_assessment, raw_text).
+    """
+    parser = IncrementalAssessmentParser()
+    for chunk in chunks:
+        for part in parser.feed(chunk):
+            if on_part: on_part(part, parser.parts)
+    return parser.close(), "".join(parser.text)
+
+def _norm(value):
+    return " ".join(str(value or "").lower().split())
+
+def merge_assessments(assessments):
+    """
+    Merges parsed per-image assessments into one. Parts are deduplicated by part name;
+    when angles disagree, the more invasive action (Replace > Repair > R&I) and then
+    the larger labor estimate wins.
+    """
+    parts = {}
+    severity, damage_detected, ids = None, False, []
+    for data in assessments:
+        ids.append(data.get("assessment_id"))
+        damage_detected = damage_detected or bool(data.get("damage_detected"))
+        sev = data.get("damage_severity")
+        if sev and (severity is None or SEVERITY_RANK.get(_norm(sev), 0) > SEVERITY_RANK.get(_norm(severity), 0)):
+            severity = sev
+        for part in data.get("parts_to_repair", []):
+            key = _norm(part.get("part_name"))
+            rank = (ACTION_RANK.get(_norm(part.get("action")), 0), float(part.get("estimated_labor_hours", 0.0)))
+            current = parts.get(key)
+            if current is None or rank > current[0]: parts[key] = (rank, dict(part))
+    merged_parts = [part for _, part in parts.values()]
+    return {
+        "assessment_id": "+".join(str(i) for i in dict.fromkeys(ids) if i),
+        "damage_detected": damage_detected,
+        "damage_severity": severity,
+        "total_estimated_repair_hours": round(sum(float(p.get("estimated_labor_hours", 0.0)) for p in merged_parts), 2),
+        "parts_to_repair": merged_parts,
+        "images_assessed": len(assessments),
+    }
+
+def assess_images(image_paths, backend, max_workers=MAX_WORKERS, timeout=CALL_TIMEOUT, on_result=None, on_image=None):
+    """
+    Runs backend(path) for every image concurrently (at most `max_workers` at a time)
+    and returns (merged_assessment, per_image). per_image holds one dict per path with
+    "image", "ok" and either "result" (parsed JSON) or "error". A call that runs longer
+    than `timeout` seconds is reported as failed and its result is ignored.
+    on_result(done_count, total) is called as each image finishes, after
+    on_image(outcome) with that image's per_image entry.
+    """
+    started = {}  # image index -> monotonic start time of its backend call
+
+    def call(i, path):
+        started[i] = time.monotonic()
+        return backend(path)
+
+    def running_too_long(future, now):
+        i = futures[future]
+        return i in started and now - started[i] > timeout
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="autoshield-assess")
+    outcomes = {}
+    try:
+        futures = {pool.submit(call, i, path): i for i, path in enumerate(image_paths)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures[future]
+                try:
+                    outcomes[i] = {"image": image_paths[i], "ok": True, "result": json.loads(future.result())}
+                except Exception as e:
+                    outcomes[i] = {"image": image_paths[i], "ok": False, "error": f"{type(e).__name__}: {e}"}
+                if on_image: on_image(outcomes[i])
+                if on_result: on_result(len(outcomes), len(futures))
+            now = time.monotonic()
+            for future in [f for f in pending if running_too_long(f, now)]:
+                pending.discard(future)
+                outcomes[futures[future]] = {"image": image_paths[futures[future]], "ok": False, "error": f"Timed out after {timeout:g}s"}
+                if on_image: on_image(outcomes[futures[future]])
+                if on_result: on_result(len(outcomes), len(futures))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    per_image = [outcomes[i] for i in range(len(image_paths))]
+    merged = merge_assessments([o["result"] for o in per_image if o["ok"]])
+    return merged, per_image
+
+# =========================================================
+# Dashboard model client (mock) and worker-pool tasks
+# =========================================================
+# Hardcoded MOCK Data (Replaces API Key and Model Name)
+MODEL_NAME = "MOCK_MODEL_REMOVED"
+
+# --- MOCK DATA FOR OUTPUT STRING ---
+MOCK_JSON_OUTPUT = """
+{
+    "assessment_id": "AS-2025-001",
+    "damage_detected": true,
+    "damage_severity": "Moderate",
+    "total_estimated_repair_hours": 14.3,
+    "parts_to_repair": [
+        {
+            "part_name": "Front Bumper Cover",
+            "condition": "Dent and Deep Scratches",
+            "action": "Repair",
+            "estimated_labor_hours": 3.2
+        },
+        {
+            "part_name": "Right Front Fender",
+            "condition": "Bent Metal",
+            "action": "Repair",
+            "estimated_labor_hours": 4.7
+        },
+        {
+            "part_name": "Right Headlamp",
+            "condition": "Cracked Housing",
+            "action": "Replace",
+            "estimated_labor_hours": 0.6
+        }
+    ]
+}
+"""
+# --- END MOCK DATA ---
+
+# Detailed prompt structure (Kept as a string, but unused)
+PROMPT_TEMPLATE = """
+Analyze the car in the provided image.
+Perform the assessment and output the result ONLY as a single JSON object that strictly adheres to the following structure. Do not include any other text or markdown outside the JSON block.
+
+{{
+    "assessment_id": "AI-GENERATED-ID",
+    "damage_detected": true/false,
+    "damage_severity": "Minor/Moderate/Severe",
+    "total_estimated_repair_hours": <total hours as float>,
+    "parts_to_repair": [
+        {{
+            "part_name": "<Identified Part Name>",
+            "condition": "<Damage Description, e.g., Dent, Deep Scratch, Cracked>",
+            "action": "<Recommended Action, e.g., Repair, Replace, R&I>",
+            "estimated_labor_hours": <hours as float>
+        }}
+    ]
+}}
+
+Based on the uploaded image:
+1. Identify and describe all visible damage.
+2. Classify the overall damage severity.
+3. Provide a list of parts needing repair/replacement, the specific damage condition, the recommended action, and the estimated labor hours for that part.
+"""
+# --- END GEMINI API CONFIG ---
+
+# Fake model latency in seconds
+ASSESSMENT_DELAY = float(os.environ.get("AUTOSHIELD_ASSESSMENT_DELAY", 10))
+
+@metrics.timed("assess_car_damage_json")
+def assess_car_damage_json(image_file_path: str):
+    """
+    Replaces the Gemini API call. Returns the static JSON string.
+    """
+    # Return the static JSON string
+    return MOCK_JSON_OUTPUT.strip()
+
+def assess_car_damage_stream(image_file_path: str, seconds=0.0):
+    """
+    Streaming variant of assess_car_damage_json: yields the static JSON string line by
+    line, spread over `seconds` to mimic a model streaming its response.
+    """
+    lines = MOCK_JSON_OUTPUT.strip().splitlines(keepends=True)
+    for line in lines:
+        if seconds: time.sleep(seconds / len(lines))
+        yield line
+
+# =========================================================
+# Background Task Functions (run on the autoshield.tasks worker pool)
+# =========================================================
+def run_assessment_task(report, image_path, image_sha256):
+    def model_call(path):
+        # Parsed as it streams: each finished part is published with the task's progress, and
+        # malformed or truncated output fails the task as soon as it is detected
+        started = time.monotonic()
+        def on_part(part, parts_so_far):
+            report(min(0.9, 0.9 * (time.monotonic() - started) / max(ASSESSMENT_DELAY, 1e-3)), detail=json.dumps(parts_so_far))
+        with metrics.span("assess_car_damage_json"): # Streaming variant of the same model call
+            _, raw_text = parse_stream(assess_car_damage_stream(path, seconds=ASSESSMENT_DELAY), on_part) # FAKE WAIT TIME
+        return raw_text
+    # Shared across sessions/processes; keyed by image content + MODEL_NAME + PROMPT_TEMPLATE
+    return assessment_cache.get_or_assess(image_path, image_sha256, model_call, MODEL_NAME, PROMPT_TEMPLATE)
+
+def _multi_image_backend(sha_by_path, on_parts):
+    """
+    Per-image backend for assess_images: cached model call per image, streamed like
+    run_assessment_task's; on_parts(path, parts_so_far) is called as each part arrives.
+    """
+    def model_call(path):
+        with metrics.span("assess_car_damage_json"): # Streaming variant of the same model call
+            # FAKE WAIT TIME (per image; images are assessed concurrently)
+            _, raw_text = parse_stream(assess_car_damage_stream(path, seconds=ASSESSMENT_DELAY), lambda part, so_far: on_parts(path, so_far))
+        return raw_text
+    return lambda path: assessment_cache.get_or_assess(path, sha_by_path[path], model_call, MODEL_NAME, PROMPT_TEMPLATE)
+
+def _merged_assessment_json(merged, per_image, names):
+    failed = [f"{names[o['image']]}: {o['error']}" for o in per_image if not o["ok"]]
+    if failed: merged["failed_images"] = failed
+    return json.dumps(merged, indent=4)
+
+def run_multi_assessment_task(report, image_items):
+    """
+    Assesses every uploaded image concurrently and merges them into one assessment.
+    While images are still streaming, the merge of every part received so far (from
+    finished and partial images) is published as the task's detail.
+    """
+    sha_by_path = {path: sha for path, sha, _ in image_items}
+    names = {path: name for path, _, name in image_items}
+    parts_by_path, finished = {}, set()
+    lock = threading.Lock()
+
+    def publish(path, parts, final=False):
+        with lock:
+            if path in finished: return # e.g. a timed-out call still streaming
+            if final: finished.add(path)
+            parts_by_path[path] = list(parts)
+            merged_so_far = merge_assessments([{"parts_to_repair": p} for p in parts_by_path.values()])
+            report(0.99 * len(finished) / len(sha_by_path), detail=json.dumps(merged_so_far["parts_to_repair"]))
+
+    def on_image(outcome):
+        publish(outcome["image"], outcome["result"].get("parts_to_repair", []) if outcome["ok"] else [], final=True)
+
+    merged, per_image = assess_images(list(sha_by_path), _multi_image_backend(sha_by_path, publish), on_image=on_image)
+    if not any(o["ok"] for o in per_image): raise RuntimeError(per_image[0]["error"])
+    return _merged_assessment_json(merged, per_image, names)
+
+def cached_multi_assessment(image_items):
+    """Merged assessment built from the cache alone, or None if any image still needs the model."""
+    cached = [assessment_cache.get(assessment_cache.cache_key(sha, MODEL_NAME, PROMPT_TEMPLATE)) for _, sha, _ in image_items]
+    if any(c is None for c in cached): return None
+    per_image = [{"image": path, "ok": True, "result": json.loads(c)} for (path, _, _), c in zip(image_items, cached)]
+    return _merged_assessment_json(merge_assessments([o["result"] for o in per_image]), per_image, {})
@@ -0,0 +1,84 @@
+"""
+Persistent cache of damage assessment results.
+
+An assessment is keyed by the content hash of the image plus the model name and a
+hash of the prompt template, so it is reused across logins, sessions, adjusters and
+server processes (the cache lives in the storage database) and is never served for
+a different model or prompt. Entries expire after a TTL and can be invalidated per
+image, per model/prompt version or wholesale.
+"""
+import hashlib
+import json
+import os
+import time
+from contextlib import closing
+
+from autoshield import storage
+
+DEFAULT_TTL = float(os.environ.get("AUTOSHIELD_ASSESSMENT_TTL", 30 * 24 * 3600))  # seconds
+
+def prompt_hash(prompt_template):
+    return hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+
+def cache_key(image_sha256, model_name, prompt_template):
+    payload = json.dumps([image_sha256, model_name, prompt_hash(prompt_template)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get(key, ttl=None):
+    """Cached assessment string for `key`, or None if missing or older than `ttl` seconds."""
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    with closing(storage.connect()) as conn:
+        row = conn.execute("SELECT Result, CreatedAt FROM assessments WHERE CacheKey = ?", (key,)).fetchone()
+    if row is None or time.time() - row["CreatedAt"] > ttl: return None
+    return row["Result"]
+
+def put(key, image_sha256, model_name, prompt_template, result):
+    with storage.transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO assessments (CacheKey, ImageSHA256, ModelName, PromptHash, Result, CreatedAt) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, image_sha256, model_name, prompt_hash(prompt_template), result, time.time()),
+        )
+
+def get_or_assess(image_path, image_sha256, assess, model_name, prompt_template, ttl=None):
+    """
+    Returns the cached assessment of the image, calling assess(image_path) on a miss.
+    Only output that parses as JSON is cached, so a truncated model response is retried.
+    """
+    key = cache_key(image_sha256, model_name, prompt_template)
+    result = get(key, ttl)
+    if result is None:
+        result = assess(image_path)
+        try:
+            json.loads(result)
+        except (TypeError, ValueError):
+            return result
+        put(key, image_sha256, model_name, prompt_template, result)
+    return result
+
+def invalidate(image_sha256=None, model_name=None, prompt_template=None):
+    """
+    Deletes cached assessments. With no arguments everything is dropped; otherwise only
+    entries for the given image and/or model and/or prompt. Returns the number deleted.
+    """
+    where, params = [], []
+    if image_sha256 is not None:
+        where.append("ImageSHA256 = ?")
+        params.append(image_sha256)
+    if model_name is not None:
+        where.append("ModelName = ?")
+        params.append(model_name)
+    if prompt_template is not None:
+        where.append("PromptHash = ?")
+        params.append(prompt_hash(prompt_template))
+    sql = "DELETE FROM assessments" + (" WHERE " + " AND ".join(where) if where else "")
+    with storage.transaction() as conn:
+        return conn.execute(sql, params).rowcount
+
+def purge(model_name, prompt_template, ttl=None):
+    """Drops expired entries and entries made with any other model or prompt version."""
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    with storage.transaction() as conn:
+        return conn.execute(
+            "DELETE FROM assessments WHERE CreatedAt < ? OR ModelName != ? OR PromptHash != ?",
+            (time.time() - ttl, model_name, prompt_hash(prompt_template)),
+        ).rowcount
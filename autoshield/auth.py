@@ -0,0 +1,138 @@
+"""
+Login checks against the users table.
+
+Logins are answered from an in-process map of username -> credential record, so a
+burst of logins at shift start costs one dict lookup and one password hash each
+instead of a query per attempt. The map is rebuilt only when the users table has
+changed: storage triggers bump meta.users_version on every insert, update and delete,
+and each lookup compares that counter (one primary-key read on a connection kept
+open for the process) with the version the map was built from.
+
+Passwords are kept as salted PBKDF2-SHA256 hashes in users.PasswordHash
+("pbkdf2_sha256$<iterations>$<salt>$<hash>"). Rows imported from the legacy Users.xlsx
+still carry a plaintext Password; migrate_passwords() hashes those and clears the
+plaintext column. It runs whenever the map is rebuilt, and can also be run by hand:
+
+    python -m autoshield.auth migrate
+    python -m autoshield.auth set-password user1
+"""
+import argparse
+import base64
+import getpass
+import hashlib
+import hmac
+import os
+import threading
+from contextlib import closing
+
+from autoshield import storage
+
+HASH_ALGORITHM = "pbkdf2_sha256"
+HASH_ITERATIONS = int(os.environ.get("AUTOSHIELD_PBKDF2_ITERATIONS", 60000))
+SALT_BYTES = 16
+
+_indexes = {}  # database file -> (users_version, username -> record), swapped as one tuple
+_index_lock = threading.Lock()
+
+# =========================================================
+# Password hashes
+# =========================================================
+def _b64(raw):
+    return base64.b64encode(raw).decode("ascii")
+
+def hash_password(password, iterations=None, salt=None):
+    iterations = iterations or HASH_ITERATIONS
+    salt = salt or os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{HASH_ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+def verify_password(password, encoded):
+    """True if `password` matches the stored hash (constant-time comparison)."""
+    try:
+        algorithm, iterations, salt, expected = encoded.split("$")
+        iterations, salt = int(iterations), base64.b64decode(salt)
+    except (AttributeError, ValueError):
+        return False
+    if algorithm != HASH_ALGORITHM: return False
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return hmac.compare_digest(_b64(digest), expected)
+
+def _needs_rehash(encoded):
+    return not encoded.startswith(f"{HASH_ALGORITHM}${HASH_ITERATIONS}$")
+
+# Checked for unknown usernames so that they take as long as a wrong password
+_DUMMY_HASH = hash_password("", salt=b"\0" * SALT_BYTES)
+
+# =========================================================
+# Migration
+# =========================================================
+def migrate_passwords(db_file=None):
+    """Hashes every plaintext Password that has no PasswordHash yet. Returns the count."""
+    with storage.transaction(db_file) as conn:
+        rows = conn.execute("SELECT rowid, Password FROM users WHERE PasswordHash IS NULL AND Password IS NOT NULL").fetchall()
+        conn.executemany(
+            "UPDATE users SET PasswordHash = ?, Password = NULL WHERE rowid = ?",
+            [(hash_password(str(row["Password"])), row["rowid"]) for row in rows],
+        )
+    return len(rows)
+
+def set_password(username, password, db_file=None):
+    with storage.transaction(db_file) as conn:
+        return conn.execute(
+            "UPDATE users SET PasswordHash = ?, Password = NULL WHERE Username = ?", (hash_password(password), username)
+        ).rowcount > 0
+
+# =========================================================
+# User index
+# =========================================================
+def _current_index(db_file=None):
+    key = db_file or storage.DB_FILE
+    version = storage.current_version("users", db_file)
+    index = _indexes.get(key)
+    if index is not None and index[0] == version: return index[1]
+    with _index_lock:
+        index = _indexes.get(key)
+        if index is None or index[0] != version:
+            migrate_passwords(db_file)
+            with closing(storage.connect(db_file)) as conn:
+                version = storage.table_version(conn, "users")
+                records = {row["Username"]: dict(row) for row in conn.execute(f"SELECT {', '.join(storage.USER_COLUMNS)} FROM users")}
+            index = _indexes[key] = (version, records)
+        return index[1]
+
+def get_user(username, db_file=None):
+    """Credential record of `username` from the in-memory index, or None."""
+    return _current_index(db_file).get(username)
+
+def authenticate(username, password, db_file=None):
+    """Returns the user record if the credentials are valid, else None."""
+    record = get_user(username, db_file)
+    if record is None or not record["PasswordHash"]:
+        verify_password(password, _DUMMY_HASH)
+        return None
+    if not verify_password(password, record["PasswordHash"]): return None
+    if _needs_rehash(record["PasswordHash"]): set_password(username, password, db_file)
+    return record
+
+# =========================================================
+# CLI
+# =========================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m autoshield.auth", description="AutoShield user credentials")
+    parser.add_argument("--db", default=storage.DB_FILE, help="SQLite database file (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="hash the plaintext passwords imported from Users.xlsx")
+    pwd = sub.add_parser("set-password", help="set a user's password (prompts for it)")
+    pwd.add_argument("username")
+    args = parser.parse_args(argv)
+
+    storage.init_db(args.db)
+    if args.command == "migrate":
+        print(f"Hashed {migrate_passwords(args.db)} plaintext password(s) in {args.db}")
+    else:
+        password = getpass.getpass(f"New password for {args.username}: ")
+        if not set_password(args.username, password, args.db): raise SystemExit(f"No such user: {args.username}")
+        print(f"Password updated for {args.username}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Disk-backed spill store for large per-session values (claim PDFs, raw assessment JSON).
+
+Streamlit keeps session state in the server's memory until the session ends, so
+values parked there for later reruns add up across hundreds of open sessions. The
+dashboard instead put()s them here and keeps only the returned handle, a 64-character
+SHA-256 of the content, in session state; reruns and the download button get() the
+bytes back when they actually need them.
+
+Blobs are files in BLOB_DIR named by their handle, shared by all sessions and server
+processes, so identical reports are stored once (an autoshield.disk_lru cache). Blobs
+not read for TTL_SECONDS are expired, and the least recently used are evicted
+once the directory exceeds DISK_LIMIT_BYTES (swept from put(), at most every
+EVICT_INTERVAL seconds per process). get() returns None for an expired or
+evicted handle; callers rebuild the value from its source (the task result, the
+report cache) and put() it again.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from autoshield import disk_lru
+
+BLOB_DIR = os.environ.get("AUTOSHIELD_BLOB_DIR", "session_blobs")
+TTL_SECONDS = float(os.environ.get("AUTOSHIELD_BLOB_TTL", 6 * 3600))
+DISK_LIMIT_BYTES = int(os.environ.get("AUTOSHIELD_BLOB_LIMIT_MB", 256)) * 1024 * 1024
+EVICT_INTERVAL = 60  # seconds between eviction sweeps of one process
+
+class BlobStore:
+    """Content-addressed files with TTL (since last read) and total-size eviction."""
+
+    def __init__(self, blob_dir=BLOB_DIR, ttl=TTL_SECONDS, disk_limit=DISK_LIMIT_BYTES):
+        self.blob_dir = blob_dir
+        self.ttl = ttl
+        self.disk_limit = disk_limit
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def _path(self, handle):
+        return os.path.join(self.blob_dir, f"{handle}.blob")
+
+    def put(self, data):
+        """Stores `data` (bytes, or str as UTF-8) and returns its handle."""
+        if isinstance(data, str): data = data.encode("utf-8")
+        handle = hashlib.sha256(data).hexdigest()
+        path = self._path(handle)
+        try:
+            disk_lru.touch(path)  # already stored (by this or another session)
+        except FileNotFoundError:
+            os.makedirs(self.blob_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as fh: fh.write(data)
+            os.replace(tmp_path, path)
+        self._maybe_evict()
+        return handle
+
+    def get(self, handle):
+        """The bytes stored under `handle`, or None if it is unknown, expired or evicted."""
+        if not handle: return None
+        path = self._path(handle)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as fh: data = fh.read()
+            disk_lru.touch(path)
+        except OSError:
+            return None
+        return data
+
+    def get_text(self, handle):
+        data = self.get(handle)
+        return None if data is None else data.decode("utf-8")
+
+    def _maybe_evict(self):
+        with self._lock:
+            if time.monotonic() - self._last_sweep < EVICT_INTERVAL: return
+            self._last_sweep = time.monotonic()
+        self.evict()
+
+    def evict(self):
+        """Removes expired blobs, then the least recently used until the store fits its size limit."""
+        disk_lru.evict(self.blob_dir, self.disk_limit, self.ttl, suffix=".blob")
+
+_default_store = BlobStore()
+
+def put(data): return _default_store.put(data)
+def get(handle): return _default_store.get(handle)
+def get_text(handle): return _default_store.get_text(handle)
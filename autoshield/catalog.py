@@ -0,0 +1,365 @@
+"""
+Parts and labor catalog: priced line items for an assessment.
+
+The catalog is a CSV file with one row per part and vehicle fitment:
+
+    part_number,part_name,make,model,year_from,year_to,part_cost,labor_hours,paint_hours
+    8MA807065AGRU,Front Bumper Cover,Audi,Q5,2021,2025,612.40,2.1,3.0
+
+(year_from / year_to may be empty; labor_hours is the book time to replace the part,
+paint_hours the time to refinish it). load() builds it into its own SQLite file
+(CATALOG_DB) next to a temporary name and swaps it in, so readers keep using the old
+catalog until the new one is complete:
+
+    python -m autoshield.catalog load parts.csv
+    python -m autoshield.catalog lookup "frnt bumper" --make Audi --model Q5
+    python -m autoshield.catalog price assessment.json --make Audi --model "Q5 Premium"
+
+Lookups never scan the catalog:
+
+- prefix: names are stored normalized (lowercase words, RH/LH and common shop
+  abbreviations spelled out) in a (Make, Model, Name) index, so "front bum" is one
+  range scan, scoped to a vehicle or not;
+- words: an FTS5 index over the name and the vehicle (make, model and every model
+  year of the fitment) finds parts containing every word in any order ("cover
+  bumper front"), the last word as a prefix;
+- fuzzy: a misspelled word ("headlmap") is replaced by its closest catalog word
+  before the word search. The distinct words are few even in a large catalog, kept
+  in their own table and held in memory per process.
+
+line_items() maps an assessment's parts_to_repair to line items shaped like
+SAMPLE_DATA's, ready for reports.compute_totals, and lists the parts it could not
+match. A part is matched among the vehicle's parts that contain all of its words
+(dropping words only if none do) by name similarity.
+"""
+import argparse
+import bisect
+import csv
+import datetime
+import difflib
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing
+
+CATALOG_DB = os.environ.get("AUTOSHIELD_CATALOG_DB", "parts_catalog.db")
+CANDIDATES = 200  # parts scored per lookup or assessment part
+MATCH_WORDS = 6  # words of an assessment part name considered when matching
+PREFIX_WORDS = 16  # completions of a type-ahead prefix searched as alternatives
+FUZZY_CUTOFF = 0.75  # minimum difflib ratio for a misspelled word's replacement
+MATCH_CUTOFF = 0.6  # minimum name similarity of an assessment part's match
+YEAR_MIN, YEAR_MAX = 1980, datetime.date.today().year + 1  # bounds of open-ended year ranges, as indexed by load()
+
+CATALOG_COLUMNS = ["part_number", "part_name", "make", "model", "year_from", "year_to", "part_cost", "labor_hours", "paint_hours"]
+# Abbreviations found in estimates and part names, normalized away on both sides
+ABBREVIATIONS = {"rh": "right", "rt": "right", "lh": "left", "lt": "left", "frt": "front", "fr": "front",
+                 "assy": "assembly", "hdlp": "headlamp", "bmpr": "bumper", "qtr": "quarter"}
+# Assessment actions -> estimate operation codes
+ACTION_OPERS = {"replace": "Repl", "repair": "Rpr", "r&i": "R&I", "remove and install": "R&I", "refinish": "Refn"}
+
+SCHEMA = """
+CREATE TABLE parts (
+    PartID INTEGER PRIMARY KEY,
+    PartNumber TEXT,
+    PartName TEXT,
+    Make TEXT,
+    Model TEXT,
+    YearFrom INTEGER,
+    YearTo INTEGER,
+    PartCost REAL,
+    LaborHours REAL,
+    PaintHours REAL,
+    MakeKey TEXT,
+    ModelKey TEXT,
+    NameKey TEXT
+);
+CREATE TABLE words (word TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+INDEXES = """
+CREATE INDEX idx_parts_vehicle_name ON parts (MakeKey, ModelKey, NameKey);
+CREATE INDEX idx_parts_name ON parts (NameKey);
+CREATE VIRTUAL TABLE parts_search USING fts5(NameKey, Vehicle, content='', columnsize=0);
+"""
+
+_vocabularies = {}  # (catalog file, mtime) -> {first letter: catalog words}
+_lock = threading.Lock()
+
+def words(text):
+    """Normalized words of a part name or vehicle: lowercase, abbreviations spelled out."""
+    return [ABBREVIATIONS.get(w, w) for w in re.findall(r"[a-z0-9]+", str(text or "").lower())]
+
+def _model_key(model):
+    """A vehicle model's catalog key: its first word ("Q5 Premium Quattro" -> "q5")."""
+    return (words(model) or [""])[0]
+
+# =========================================================
+# Loading
+# =========================================================
+def _read_rows(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            yield {c: (row.get(c) or "").strip() for c in CATALOG_COLUMNS}
+
+def _year_tokens(year_from, year_to):
+    """A fitment's model years as search words ("y2021 y2022 ..."), "yall" if it fits every year."""
+    if year_from is None and year_to is None: return "yall"
+    return " ".join(f"y{y}" for y in range(year_from or YEAR_MIN, (year_to or YEAR_MAX) + 1))
+
+def _number(value, kind=float):
+    return kind(value) if value not in ("", None) else None
+
+def load(path, db_file=None):
+    """
+    Builds the catalog in `path` (CSV, see the module docstring) into a new index file
+    and atomically replaces `db_file` with it. Returns the number of parts.
+    """
+    db_file = db_file or CATALOG_DB
+    tmp_file = f"{db_file}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_file): os.remove(tmp_file)
+    vocabulary = set()
+    count = 0
+    with closing(sqlite3.connect(tmp_file)) as conn:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        with conn:
+            rows = _read_rows(path)
+            while batch := list(itertools.islice(rows, 10000)):
+                records = []
+                for row in batch:
+                    name = words(row["part_name"])
+                    vocabulary.update(name)
+                    records.append((
+                        row["part_number"], row["part_name"], row["make"], row["model"],
+                        _number(row["year_from"], int), _number(row["year_to"], int), _number(row["part_cost"]) or 0.0,
+                        _number(row["labor_hours"]) or 0.0, _number(row["paint_hours"]) or 0.0,
+                        " ".join(words(row["make"])), _model_key(row["model"]), " ".join(name),
+                    ))
+                conn.executemany(
+                    "INSERT INTO parts (PartNumber, PartName, Make, Model, YearFrom, YearTo, PartCost, LaborHours, PaintHours, "
+                    "MakeKey, ModelKey, NameKey) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", records,
+                )
+                count += len(records)
+            conn.executemany("INSERT INTO words VALUES (?)", ((w,) for w in sorted(vocabulary)))
+        # Indexes after the rows: one sorted build each instead of a b-tree insert per row
+        conn.executescript(INDEXES)
+        with conn:
+            conn.create_function("year_tokens", 2, _year_tokens, deterministic=True)
+            conn.execute(
+                "INSERT INTO parts_search (rowid, NameKey, Vehicle) "
+                "SELECT PartID, NameKey, MakeKey || ' ' || ModelKey || ' ' || year_tokens(YearFrom, YearTo) FROM parts"
+            )
+            conn.execute("INSERT INTO parts_search (parts_search) VALUES ('optimize')")
+        conn.execute("ANALYZE")
+    os.replace(tmp_file, db_file)
+    return count
+
+def connect(db_file=None):
+    db_file = db_file or CATALOG_DB
+    if not os.path.exists(db_file): raise FileNotFoundError(f"No parts catalog at {db_file}; load one with `python -m autoshield.catalog load`")
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def available(db_file=None):
+    return os.path.exists(db_file or CATALOG_DB)
+
+# =========================================================
+# Lookup
+# =========================================================
+def _vocabulary(conn, db_file):
+    """The catalog's distinct name words by first letter, read once per loaded catalog file."""
+    key = (db_file, os.stat(db_file).st_mtime_ns)
+    vocabulary = _vocabularies.get(key)
+    if vocabulary is None:
+        with _lock:
+            vocabulary = _vocabularies.get(key)
+            if vocabulary is None:
+                vocabulary = {}
+                for row in conn.execute("SELECT word FROM words ORDER BY word"): vocabulary.setdefault(row[0][0], []).append(row[0])
+                _vocabularies.clear()  # a reloaded catalog replaces the old words
+                _vocabularies[key] = vocabulary
+    return vocabulary
+
+def _corrected(conn, db_file, query_words):
+    """
+    Each word as is if the catalog has it, else its closest catalog word. Misspellings
+    rarely get the first letter wrong, so only words sharing it are compared.
+    """
+    vocabulary = _vocabulary(conn, db_file)
+    out = []
+    for word in query_words:
+        same_letter = vocabulary.get(word[0], [])
+        at = bisect.bisect_left(same_letter, word)
+        if at < len(same_letter) and same_letter[at] == word: out.append(word)
+        else: out.extend(difflib.get_close_matches(word, same_letter, n=1, cutoff=FUZZY_CUTOFF) or [word])
+    return out
+
+def _completions(conn, db_file, prefix):
+    """
+    The catalog words starting with `prefix` (FTS5 would merge every matching word's
+    postings for a prefix query; a short OR of known words stops at the first matches),
+    None if there are more than PREFIX_WORDS, or the closest word if there are none.
+    """
+    same_letter = _vocabulary(conn, db_file).get(prefix[0], [])
+    at = bisect.bisect_left(same_letter, prefix)
+    found = list(itertools.takewhile(lambda w: w.startswith(prefix), same_letter[at:at + PREFIX_WORDS + 1]))
+    if len(found) > PREFIX_WORDS: return None
+    return found or _corrected(conn, db_file, [prefix])
+
+def _vehicle_clause(make, model, year):
+    clause = ""
+    if make: clause += " AND {Vehicle} : (" + " ".join(f'"{w}"' for w in words(make) + ([_model_key(model)] if model else [])) + ")"
+    if year: clause += f' AND {{Vehicle}} : ("y{year}" OR "yall")'
+    return clause
+
+def _word_search(conn, db_file, query_words, make, model, year, limit, prefix=None):
+    """Parts for the vehicle containing every word, and a word starting with `prefix` if given; unranked."""
+    terms = [f'"{w}"' for w in query_words]
+    if prefix:
+        completions = _completions(conn, db_file, prefix)
+        terms.append(f'"{prefix}"*' if completions is None else "(" + " OR ".join(f'"{w}"' for w in completions) + ")")
+    if not terms: return []
+    return conn.execute(
+        "SELECT * FROM parts WHERE PartID IN (SELECT rowid FROM parts_search WHERE parts_search MATCH ? LIMIT ?)",
+        ("{NameKey} : (" + " AND ".join(terms) + ")" + _vehicle_clause(make, model, year), limit),
+    ).fetchall()
+
+def _best(rows, name_key, limit):
+    """(similarity, row) for `rows`, most similar name to `name_key` first."""
+    matcher, ratios = difflib.SequenceMatcher(None, b=name_key), {}  # the query is analyzed once; names repeat across vehicles
+    def ratio(name):
+        if name not in ratios:
+            matcher.set_seq1(name)
+            ratios[name] = matcher.ratio()
+        return ratios[name]
+    scored = [(ratio(row["NameKey"]), row) for row in rows]
+    scored.sort(key=lambda pair: (-pair[0], pair[1]["PartID"]))
+    return scored[:limit]
+
+def lookup(text, make=None, model=None, year=None, limit=20, db_file=None):
+    """
+    Catalog parts for the type-ahead `text`, as dicts: names starting with it first,
+    then names containing all its words (spelling corrected against the catalog, the
+    last word as a prefix), most similar first. `make` / `model` (any trim; matched on
+    the model's first word) and `year` narrow the search to a vehicle.
+    """
+    db_file = db_file or CATALOG_DB
+    query_words = words(text)
+    if not query_words: return []
+    name_key = " ".join(query_words)
+    with closing(connect(db_file)) as conn:
+        if make:
+            sql, params = "MakeKey = ? AND ", [" ".join(words(make))]
+            if model:
+                sql += "ModelKey = ? AND "
+                params.append(_model_key(model))
+        else: sql, params = "", []
+        if year:
+            sql += "(YearFrom IS NULL OR YearFrom <= ?) AND (YearTo IS NULL OR YearTo >= ?) AND "
+            params += [year, year]
+        found = conn.execute(
+            f"SELECT * FROM parts WHERE {sql}NameKey >= ? AND NameKey < ? ORDER BY NameKey LIMIT ?",
+            params + [name_key, name_key + "\uffff", limit],
+        ).fetchall()
+        if len(found) < limit:
+            seen = {row["PartID"] for row in found}
+            matches = _word_search(conn, db_file, _corrected(conn, db_file, query_words[:-1]), make, model, year, CANDIDATES, query_words[-1])
+            found += [row for _, row in _best([row for row in matches if row["PartID"] not in seen], name_key, limit - len(found))]
+    return [dict(row) for row in found]
+
+def match_part(part_name, make=None, model=None, year=None, db_file=None, conn=None):
+    """
+    The catalog part best matching an assessment's part name for the vehicle, as a dict,
+    or None. Candidates contain all of the name's (spelling-corrected) words; if no part
+    does, words are dropped one at a time until some match; the best is rejected if
+    its name is less than MATCH_CUTOFF similar.
+    """
+    if conn is None:
+        with closing(connect(db_file)) as conn: return match_part(part_name, make, model, year, db_file, conn)
+    db_file = db_file or CATALOG_DB
+    query_words = _corrected(conn, db_file, list(dict.fromkeys(words(part_name)))[:MATCH_WORDS])
+    for size in range(len(query_words), 0, -1):
+        rows = [row for subset in itertools.combinations(query_words, size)
+                for row in _word_search(conn, db_file, list(subset), make, model, year, CANDIDATES)]
+        best = _best(list({row["PartID"]: row for row in rows}.values()), " ".join(query_words), 1)
+        if best: return dict(best[0][1]) if best[0][0] >= MATCH_CUTOFF else None
+    return None
+
+# =========================================================
+# Assessment -> line items
+# =========================================================
+def line_item(part, row, line):
+    """
+    One estimate line item for an assessment part and its catalog row (None if
+    unmatched). Replacing a part prices it with the catalog's part cost and book labor;
+    other actions keep the assessment's labor estimate (the book labor if it has none).
+    Paint time comes from the catalog for every action but R&I.
+    """
+    oper = ACTION_OPERS.get(" ".join(str(part.get("action", "")).lower().split()), "Rpr")
+    estimated_hours = float(part.get("estimated_labor_hours", 0.0))
+    if row is None:
+        return {"line": line, "oper": oper, "desc": f"{oper} {part.get('part_name', '')}".strip(), "part_number": "",
+                "qty": 1, "part_cost": 0.0, "labor_hours": estimated_hours, "paint_hours": 0.0}
+    replace = oper == "Repl"
+    return {
+        "line": line, "oper": oper, "desc": f"{oper} {row['PartName']}", "part_number": row["PartNumber"], "qty": 1,
+        "part_cost": row["PartCost"] if replace else 0.0,
+        "labor_hours": row["LaborHours"] if replace or not estimated_hours else estimated_hours,
+        "paint_hours": 0.0 if oper == "R&I" else row["PaintHours"],
+    }
+
+def line_items(assessment, vehicle, db_file=None):
+    """
+    (line_items, unmatched) for an assessment's parts_to_repair on `vehicle` (a dict with
+    make, model and year, like SAMPLE_DATA["vehicle"]). Unmatched parts still get a
+    line item, carrying the assessment's labor estimate and no part price, and are also
+    returned by name in `unmatched`.
+    """
+    items, unmatched = [], []
+    make, model, year = vehicle.get("make"), vehicle.get("model"), _number(vehicle.get("year"), int)
+    with closing(connect(db_file)) as conn:
+        for i, part in enumerate(assessment.get("parts_to_repair", []), start=1):
+            row = match_part(part.get("part_name", ""), make, model, year, db_file, conn)
+            if row is None: unmatched.append(part.get("part_name", ""))
+            items.append(line_item(part, row, i))
+    return items, unmatched
+
+def estimate(assessment, base, db_file=None):
+    """(estimate, unmatched): a copy of `base` (shaped like SAMPLE_DATA) with its line items priced from the assessment."""
+    data = json.loads(json.dumps(base))
+    data["line_items"], unmatched = line_items(assessment, data.get("vehicle", {}), db_file)
+    return data, unmatched
+
+# =========================================================
+# CLI
+# =========================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m autoshield.catalog", description="AutoShield parts catalog")
+    parser.add_argument("--db", default=CATALOG_DB, help="catalog index file (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ld = sub.add_parser("load", help="build the index from a catalog CSV, replacing the current one")
+    ld.add_argument("csv")
+    for name, help_text in [("lookup", "find parts by name prefix, words or a misspelling"), ("price", "turn an assessment JSON file into line items")]:
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("text" if name == "lookup" else "assessment")
+        cmd.add_argument("--make")
+        cmd.add_argument("--model")
+        cmd.add_argument("--year", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        print(f"Loaded {load(args.csv, args.db)} parts into {args.db}")
+    elif args.command == "lookup":
+        for row in lookup(args.text, args.make, args.model, args.year, db_file=args.db):
+            print(f"{row['PartNumber']:16s} {row['PartName']:40s} {row['Make']} {row['Model']} ${row['PartCost']:,.2f}")
+    else:
+        with open(args.assessment, encoding="utf-8") as fh: assessment = json.load(fh)
+        items, unmatched = line_items(assessment, {"make": args.make, "model": args.model, "year": args.year}, args.db)
+        print(json.dumps({"line_items": items, "unmatched": unmatched}, indent=1))
+
+if __name__ == "__main__":
+    main()
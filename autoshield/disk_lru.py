@@ -0,0 +1,42 @@
+"""
+Size- and age-bounded file caches on disk (rendered reports, thumbnails, session blobs).
+
+Each cache is a flat directory of files shared by all server processes. A file's
+mtime is its last access: readers touch() it on every hit, so no index has to be kept
+in sync across processes. evict() drops files not accessed for `ttl` seconds, then
+the least recently used until the directory fits in `max_bytes`.
+"""
+import os
+import time
+
+def touch(path):
+    """Marks `path` as just used; raises FileNotFoundError if it is not cached."""
+    os.utime(path)
+
+def evict(directory, max_bytes, ttl=None, suffix=""):
+    """
+    Removes the files in `directory` ending with `suffix` that are older than `ttl`
+    seconds (if given), then the least recently used until the rest fit in
+    `max_bytes`. Returns the number of files removed.
+    """
+    entries, now = [], time.time()
+    try: scan = list(os.scandir(directory))
+    except FileNotFoundError: return 0
+    for entry in scan:
+        if not entry.name.endswith(suffix): continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in sorted(entries):
+        if total <= max_bytes and (ttl is None or now - mtime <= ttl): break
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+        total -= size
+    return removed
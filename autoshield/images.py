@@ -0,0 +1,137 @@
+"""
+Content-addressed store for uploaded vehicle photos.
+
+Each upload is streamed to disk in chunks while it is hashed and is stored once
+under its SHA-256 (`<sha256>.<ext>`), so the same photo uploaded under another name
+is not stored twice and a different photo that reuses an existing name is no longer
+dropped. A per-user manifest.json records the original name, upload time, size and
+pixel dimensions of every blob; listing a user's images reads the manifest instead
+of scanning the directory.
+"""
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MANIFEST_NAME = "manifest.json"
+CHUNK_SIZE = 1024 * 1024
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+_manifest_cache = {}  # manifest path -> (mtime_ns, entries)
+_cache_lock = threading.Lock()
+
+@contextmanager
+def _locked(user_folder):
+    """Serializes manifest updates for one user folder across threads and processes."""
+    with open(os.path.join(user_folder, ".manifest.lock"), "a+") as fh:
+        if fcntl is not None: fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None: fcntl.flock(fh, fcntl.LOCK_UN)
+
+def _image_size(path):
+    """(width, height) read from the image header, or (None, None) if unreadable."""
+    from PIL import Image, UnidentifiedImageError
+    try:
+        with Image.open(path) as img: return img.size
+    except (OSError, UnidentifiedImageError):
+        return None, None
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""): digest.update(chunk)
+    return digest.hexdigest()
+
+def _entry(user_folder, file_name, sha256, original_name, uploaded_at):
+    path = os.path.join(user_folder, file_name)
+    width, height = _image_size(path)
+    return {
+        "sha256": sha256, "file": file_name, "name": original_name, "size": os.path.getsize(path),
+        "width": width, "height": height, "uploaded_at": uploaded_at,
+    }
+
+def _write_manifest(user_folder, entries):
+    path = os.path.join(user_folder, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh: json.dump({"images": entries}, fh, indent=1)
+    os.replace(tmp_path, path)
+
+def _build_manifest(user_folder):
+    """Indexes images saved before the manifest existed (kept under their original names)."""
+    entries, seen = [], set()
+    for name in sorted(os.listdir(user_folder)):
+        path = os.path.join(user_folder, name)
+        if not name.lower().endswith(IMAGE_EXTENSIONS) or not os.path.isfile(path): continue
+        sha256 = _sha256_file(path)
+        if sha256 in seen: continue
+        seen.add(sha256)
+        uploaded_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+        entries.append(_entry(user_folder, name, sha256, name, uploaded_at))
+    _write_manifest(user_folder, entries)
+    return entries
+
+def _read_manifest(user_folder):
+    path = os.path.join(user_folder, MANIFEST_NAME)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _cache_lock:
+        cached = _manifest_cache.get(path)
+        if cached and cached[0] == mtime_ns: return cached[1]
+    with open(path, encoding="utf-8") as fh: entries = json.load(fh)["images"]
+    with _cache_lock: _manifest_cache[path] = (mtime_ns, entries)
+    return entries
+
+def list_images(user_folder):
+    """Manifest entries for the user's images, in upload order."""
+    os.makedirs(user_folder, exist_ok=True)
+    entries = _read_manifest(user_folder)
+    if entries is None:
+        with _locked(user_folder):
+            entries = _read_manifest(user_folder)
+            if entries is None: entries = _build_manifest(user_folder)
+    return entries
+
+def image_path(user_folder, entry):
+    return os.path.join(user_folder, entry["file"])
+
+def save_upload(user_folder, uploaded_file, original_name=None):
+    """
+    Streams a file-like upload into the store. Returns (entry, is_new); is_new is False
+    when a blob with the same content was already stored for this user.
+    """
+    os.makedirs(user_folder, exist_ok=True)
+    original_name = original_name or getattr(uploaded_file, "name", "upload")
+    ext = os.path.splitext(original_name)[1].lower() or ".bin"
+    digest = hashlib.sha256()
+    tmp_path = os.path.join(user_folder, f".upload-{os.getpid()}-{threading.get_ident()}.part")
+    if hasattr(uploaded_file, "seek"): uploaded_file.seek(0)
+    with open(tmp_path, "wb") as out:
+        for chunk in iter(lambda: uploaded_file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            out.write(chunk)
+    sha256 = digest.hexdigest()
+
+    with _locked(user_folder):
+        entries = _read_manifest(user_folder)
+        entries = list(entries) if entries is not None else _build_manifest(user_folder)
+        existing = next((e for e in entries if e["sha256"] == sha256), None)
+        if existing is not None:
+            os.remove(tmp_path)
+            return existing, False
+        file_name = sha256 + ext
+        os.replace(tmp_path, os.path.join(user_folder, file_name))
+        entry = _entry(user_folder, file_name, sha256, original_name, datetime.now().isoformat(timespec="seconds"))
+        entries.append(entry)
+        _write_manifest(user_folder, entries)
+    return entry, True
@@ -0,0 +1,167 @@
+"""
+In-process timing spans for the app's hot sections, with a Prometheus text export.
+
+    with metrics.span("repairs_read"): ...
+    @metrics.timed("compute_totals")
+    def compute_totals(data): ...
+
+Every span adds to a per-section counter, a cumulative histogram (BUCKETS, seconds)
+and a window of the last WINDOW durations used for the p50/p95/p99 shown in the admin
+panel. Spans left by an exception also count as errors; Streamlit's rerun/stop
+signals are BaseExceptions and do not. The registry is per server process and covers
+the worker-pool threads as well.
+
+prometheus_text() renders the registry in the Prometheus text format. start_exporters()
+(called by the app on every rerun, a no-op after the first) optionally publishes it:
+
+    AUTOSHIELD_METRICS_FILE=/var/lib/node_exporter/autoshield.prom   # rewritten every AUTOSHIELD_METRICS_INTERVAL s
+    AUTOSHIELD_METRICS_PORT=9464                                     # http://127.0.0.1:9464/metrics
+
+Both are per process; with several server processes give each its own file or port.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+WINDOW = 1024  # recent durations kept per section for percentiles
+METRICS_FILE = os.environ.get("AUTOSHIELD_METRICS_FILE")
+METRICS_PORT = os.environ.get("AUTOSHIELD_METRICS_PORT")
+EXPORT_INTERVAL = float(os.environ.get("AUTOSHIELD_METRICS_INTERVAL", 15))
+
+logger = logging.getLogger(__name__)
+
+class _Section:
+    __slots__ = ("count", "errors", "total", "buckets", "recent")
+
+    def __init__(self):
+        self.count = self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent = deque(maxlen=WINDOW)
+
+_sections = {}
+_lock = threading.Lock()
+
+def observe(name, seconds, error=False):
+    """Records one duration for section `name`."""
+    with _lock:
+        section = _sections.get(name)
+        if section is None: section = _sections[name] = _Section()
+        section.count += 1
+        section.errors += error
+        section.total += seconds
+        section.recent.append(seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                section.buckets[i] += 1
+                break
+
+@contextmanager
+def span(name):
+    """Times the enclosed block as section `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        observe(name, time.perf_counter() - started, error=True)
+        raise
+    except BaseException:  # st.rerun() / st.stop() leaving the block is normal control flow
+        observe(name, time.perf_counter() - started)
+        raise
+    observe(name, time.perf_counter() - started)
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name): return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+def summary():
+    """One dict per section (sorted by name): count, errors, mean and p50/p95/p99/max over the recent window, in seconds."""
+    with _lock: snapshot = [(name, s.count, s.errors, s.total, sorted(s.recent)) for name, s in _sections.items()]
+    return [{
+        "section": name, "count": count, "errors": errors, "mean": total / count,
+        "p50": _percentile(recent, 50), "p95": _percentile(recent, 95), "p99": _percentile(recent, 99), "max": recent[-1],
+    } for name, count, errors, total, recent in sorted(snapshot)]
+
+def reset():
+    with _lock: _sections.clear()
+
+def prometheus_text():
+    """The registry in the Prometheus text exposition format."""
+    with _lock: snapshot = [(name, s.count, s.errors, s.total, list(s.buckets)) for name, s in sorted(_sections.items())]
+    lines = [
+        "# HELP autoshield_section_seconds Time spent in instrumented app sections.",
+        "# TYPE autoshield_section_seconds histogram",
+    ]
+    for name, count, _, total, buckets in snapshot:
+        cumulative = 0
+        for bound, n in zip(BUCKETS, buckets):
+            cumulative += n
+            lines.append(f'autoshield_section_seconds_bucket{{section="{name}",le="{bound:g}"}} {cumulative}')
+        lines.append(f'autoshield_section_seconds_bucket{{section="{name}",le="+Inf"}} {count}')
+        lines.append(f'autoshield_section_seconds_sum{{section="{name}"}} {total:.6f}')
+        lines.append(f'autoshield_section_seconds_count{{section="{name}"}} {count}')
+    lines += [
+        "# HELP autoshield_section_errors_total Instrumented sections left by an exception.",
+        "# TYPE autoshield_section_errors_total counter",
+    ]
+    lines += [f'autoshield_section_errors_total{{section="{name}"}} {errors}' for name, _, errors, _, _ in snapshot]
+    return "\n".join(lines) + "\n"
+
+# =========================================================
+# Exporters
+# =========================================================
+def write_textfile(path):
+    """Atomically writes prometheus_text() to `path` (node_exporter textfile collector format)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh: fh.write(prometheus_text())
+    os.replace(tmp, path)
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+_started = False
+
+def start_exporters(path=METRICS_FILE, port=METRICS_PORT, interval=EXPORT_INTERVAL):
+    """Starts the configured textfile writer and/or /metrics endpoint once per process."""
+    global _started
+    with _lock:
+        if _started: return
+        _started = True
+    if path:
+        def export_loop():
+            while True:
+                try: write_textfile(path)
+                except OSError: pass
+                time.sleep(interval)
+        threading.Thread(target=export_loop, name="autoshield-metrics-file", daemon=True).start()
+    if port:
+        try: server = ThreadingHTTPServer(("127.0.0.1", int(port)), _Handler)
+        except OSError as e:
+            logger.warning("Metrics endpoint not started on port %s: %s", port, e)
+            return
+        threading.Thread(target=server.serve_forever, name="autoshield-metrics-http", daemon=True).start()
@@ -0,0 +1,141 @@
+"""
+Vectorized totals for many estimates at once (admin rollups over the whole book).
+
+batch_totals() takes a columnar table of line items across any number of estimates
+plus one row of header fields per estimate, and computes the same figures as
+reports.compute_totals for every estimate in a single NumPy pass. Sums are
+accumulated with np.add.at, which adds the items of each estimate in input order,
+and the final rounding agrees with Python's round(), so every value matches
+compute_totals exactly rather than just to within a cent.
+"""
+import numpy as np
+import pandas as pd
+
+from autoshield.reports import DEFAULT_BODY_LABOR_RATE, DEFAULT_PAINT_RATE
+
+TOTALS_COLUMNS = [
+    "parts_subtotal", "body_labor_hours", "body_labor_amount", "avg_body_labor_rate",
+    "paint_hours", "paint_labor_amount", "avg_paint_rate", "fpb_hours", "fpb_amount",
+    "paint_supplies_hours", "paint_supplies_amount", "misc", "other", "subtotal",
+    "sales_tax_rate", "sales_tax", "total_cost_of_repairs", "deductible", "net_cost_of_repairs",
+]
+
+# Estimate header fields used by the totals, with compute_totals' defaults
+ESTIMATE_FIELDS = {
+    "default_labor_rate": DEFAULT_BODY_LABOR_RATE,
+    "default_paint_rate": DEFAULT_PAINT_RATE,
+    "feather_prime_and_block_hours": 0.0,
+    "feather_prime_and_block_rate": 0.0,
+    "paint_supplies_hours": 0.0,
+    "paint_supply_rate": 0.0,
+    "misc_charges": 0.0,
+    "other_charges": 0.0,
+    "sales_tax_rate": 0.0,
+    "deductible": 0.0,
+}
+# Line item fields; None means "fall back to the estimate's default rate"
+LINE_ITEM_FIELDS = {
+    "part_cost": 0.0,
+    "qty": 1.0,
+    "labor_hours": 0.0,
+    "labor_rate": None,
+    "paint_hours": 0.0,
+    "paint_rate": None,
+}
+
+def frames_from_estimates(estimates):
+    """
+    Builds the (estimates_df, line_items_df) inputs of batch_totals from
+    (estimate_id, estimate) pairs shaped like SAMPLE_DATA (see reports.read_estimates).
+    """
+    ids = []
+    header = {field: [] for field in ESTIMATE_FIELDS}
+    items = {field: [] for field in ["estimate_id", *LINE_ITEM_FIELDS]}
+    for estimate_id, data in estimates:
+        ids.append(estimate_id)
+        for field, default in ESTIMATE_FIELDS.items():
+            source = data["loss"] if field == "deductible" else data
+            header[field].append(float(source.get(field, default)))
+        for item in data["line_items"]:
+            items["estimate_id"].append(estimate_id)
+            for field, default in LINE_ITEM_FIELDS.items():
+                value = item.get(field, default)
+                items[field].append(np.nan if value is None else float(value))
+    estimates_df = pd.DataFrame(header, index=pd.Index(ids, name="estimate_id"))
+    return estimates_df, pd.DataFrame(items)
+
+def _column(df, name, default, n):
+    if name in df.columns: return df[name].to_numpy(dtype=float)
+    return np.full(n, np.nan if default is None else default, dtype=float)
+
+def _round_cents(values):
+    """
+    round(v, 2) for every element. np.round scales by 100 first and can disagree with
+    Python's correctly rounded round() on near-half-cent values, so those few are
+    re-rounded in Python.
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100.0
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_half): rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+def batch_totals(estimates_df, line_items_df):
+    """
+    Totals for every estimate in one vectorized pass.
+
+    estimates_df is indexed by estimate_id and holds the ESTIMATE_FIELDS columns
+    (missing columns take compute_totals' defaults). line_items_df has an estimate_id
+    column plus the LINE_ITEM_FIELDS columns; NaN labor/paint rates fall back to the
+    estimate's default rates. Returns a DataFrame indexed like estimates_df with one
+    column per compute_totals key.
+    """
+    n = len(estimates_df)
+    est = {field: _column(estimates_df, field, default, n) for field, default in ESTIMATE_FIELDS.items()}
+
+    owner = estimates_df.index.get_indexer(line_items_df["estimate_id"]) if len(line_items_df) else np.empty(0, dtype=np.intp)
+    known = owner >= 0
+    owner = owner[known]
+    m = len(owner)
+    li = {field: _column(line_items_df, field, default, len(line_items_df))[known] for field, default in LINE_ITEM_FIELDS.items()}
+    if m:
+        # A missing column or explicit NaN means the line item uses its estimate's default rate
+        li["labor_rate"] = np.where(np.isnan(li["labor_rate"]), est["default_labor_rate"][owner], li["labor_rate"])
+        li["paint_rate"] = np.where(np.isnan(li["paint_rate"]), est["default_paint_rate"][owner], li["paint_rate"])
+
+    def per_estimate(values):
+        out = np.zeros(n)
+        np.add.at(out, owner, values)
+        return out
+
+    parts_subtotal = per_estimate(li["part_cost"] * li["qty"])
+    body_labor_hours = per_estimate(li["labor_hours"])
+    paint_hours = per_estimate(li["paint_hours"])
+    body_labor_amount = per_estimate(li["labor_hours"] * li["labor_rate"])
+    paint_labor_amount = per_estimate(li["paint_hours"] * li["paint_rate"])
+
+    fpb_amount = est["feather_prime_and_block_hours"] * est["feather_prime_and_block_rate"]
+    paint_supplies_amount = est["paint_supplies_hours"] * est["paint_supply_rate"]
+    misc, other = est["misc_charges"], est["other_charges"]
+    subtotal = parts_subtotal + body_labor_amount + paint_labor_amount + fpb_amount + paint_supplies_amount + misc + other
+    sales_tax = parts_subtotal * est["sales_tax_rate"]
+    total_cost = subtotal + sales_tax
+    net_cost = total_cost - est["deductible"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_body_labor_rate = np.where(body_labor_hours > 0, body_labor_amount / body_labor_hours, est["default_labor_rate"])
+        avg_paint_rate = np.where(paint_hours > 0, paint_labor_amount / paint_hours, est["default_paint_rate"])
+
+    columns = {
+        "parts_subtotal": parts_subtotal, "body_labor_hours": body_labor_hours,
+        "body_labor_amount": body_labor_amount, "avg_body_labor_rate": avg_body_labor_rate,
+        "paint_hours": paint_hours, "paint_labor_amount": paint_labor_amount,
+        "avg_paint_rate": avg_paint_rate, "fpb_hours": est["feather_prime_and_block_hours"],
+        "fpb_amount": fpb_amount, "paint_supplies_hours": est["paint_supplies_hours"],
+        "paint_supplies_amount": paint_supplies_amount, "misc": misc,
+        "other": other, "subtotal": subtotal,
+        "sales_tax": sales_tax, "total_cost_of_repairs": total_cost,
+        "deductible": est["deductible"], "net_cost_of_repairs": net_cost,
+    }
+    result = {name: _round_cents(values) for name, values in columns.items()}
+    result["sales_tax_rate"] = est["sales_tax_rate"]
+    return pd.DataFrame(result, index=estimates_df.index)[TOTALS_COLUMNS]
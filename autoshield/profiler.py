@@ -0,0 +1,170 @@
+"""
+Opt-in sampling profiler for slow dashboard reruns.
+
+ui.main() runs every whole-script rerun inside a Capture, and so does each fragment
+rerun (ui._fragment); a fragment rendered as part of a whole rerun belongs to that
+rerun's capture, since captures on one thread do not nest. A capture is armed when the
+session asked for it (an admin ticked "Profile every rerun of this session", or the
+user is on the watch list) or when auto-capture is on (slow_rerun_seconds > 0); an
+armed capture samples the script thread's stack every SAMPLE_INTERVAL seconds from a
+helper thread.
+When the rerun ends, the samples are written if the session asked for them or if
+the rerun took at least slow_rerun_seconds; otherwise they are dropped.
+
+Each capture is a pair of files in PROFILE_DIR, the newest MAX_CAPTURES kept:
+
+    <YYYYmmdd-HHMMSS>-<ms>ms-<user>-<id>.folded   one "frame;frame;frame count" line per stack
+    <same name>.json                              metadata and the top functions
+
+The .folded files go straight into flamegraph.pl or speedscope. The admin panel lists
+the slowest captures; so does
+
+    python -m autoshield.profiler [--dir profiles] [--top 20]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+PROFILE_DIR = os.environ.get("AUTOSHIELD_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL = float(os.environ.get("AUTOSHIELD_PROFILE_INTERVAL", 0.005))
+MAX_CAPTURES = int(os.environ.get("AUTOSHIELD_PROFILE_KEEP", 50))
+
+# Settings shared by every session of this server process (changed from the admin panel)
+slow_rerun_seconds = float(os.environ.get("AUTOSHIELD_PROFILE_SLOW_RERUN", 0))  # 0 = auto-capture off
+watched_users = set()
+
+class _Sampler(threading.Thread):
+    """Counts the stacks of thread `target` above its lowest `base_depth` frames, one sample per interval."""
+
+    def __init__(self, target, base_depth, interval):
+        super().__init__(name="autoshield-profiler", daemon=True)
+        self.target, self.base_depth, self.interval = target, base_depth, interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if len(stack) > self.base_depth: self.stacks[";".join(reversed(stack[:len(stack) - self.base_depth]))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+def _depth(frame):
+    depth = 0
+    while frame is not None:
+        depth, frame = depth + 1, frame.f_back
+    return depth
+
+_active = threading.local()  # .capture: the Capture open on this thread, if any
+
+class Capture:
+    """
+    Context manager around one rerun. `requested` forces the capture to be kept;
+    otherwise it is kept only if the rerun was slower than slow_rerun_seconds. Inside
+    another capture on the same thread it does nothing.
+    """
+
+    def __init__(self, label, requested=False, profile_dir=None):
+        self.label, self.requested, self.profile_dir = label, requested, profile_dir or PROFILE_DIR
+        self.path = None  # the .json written, if any
+
+    def __enter__(self):
+        self.threshold = slow_rerun_seconds
+        self._sampler = None
+        self._outer = getattr(_active, "capture", None)
+        if self._outer is not None: return self
+        _active.capture = self
+        if self.requested or self.threshold > 0:
+            # Frames below the caller (Streamlit's script runner) are the same in every sample
+            self._sampler = _Sampler(threading.get_ident(), _depth(sys._getframe(1).f_back), SAMPLE_INTERVAL)
+            self._sampler.start()
+        self._started = time.perf_counter()
+        self._wall = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._outer is not None: return False
+        _active.capture = None
+        elapsed = time.perf_counter() - self._started
+        if self._sampler is None: return False
+        self._sampler.stop()
+        if self.requested or elapsed >= self.threshold:
+            try: self.path = _write(self.profile_dir, self.label, elapsed, self._wall, self._sampler.stacks, "requested" if self.requested else "slow")
+            except OSError: pass  # profiling must never break the page
+        return False
+
+# =========================================================
+# Captures on disk
+# =========================================================
+def top_functions(stacks, n=15):
+    """(function, self samples, inclusive samples) for the `n` functions with most inclusive samples."""
+    own, inclusive = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for frame in set(frames): inclusive[frame] += count
+    return [(f, own[f], c) for f, c in inclusive.most_common(n)]
+
+def _write(profile_dir, label, elapsed, started, stacks, reason):
+    os.makedirs(profile_dir, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{round(elapsed * 1e3)}ms-{re.sub(r'[^A-Za-z0-9_.-]', '_', label)}-{uuid.uuid4().hex[:6]}"
+    base = os.path.join(profile_dir, name)
+    with open(f"{base}.folded", "w", encoding="utf-8") as fh:
+        for stack, count in stacks.items(): fh.write(f"{stack} {count}\n")
+    meta = {
+        "name": name, "label": label, "reason": reason, "started": started, "elapsed": elapsed,
+        "samples": sum(stacks.values()), "interval": SAMPLE_INTERVAL, "top": top_functions(stacks),
+    }
+    with open(f"{base}.json", "w", encoding="utf-8") as fh: json.dump(meta, fh)  # written last: marks the capture complete
+    _rotate(profile_dir)
+    return f"{base}.json"
+
+def _rotate(profile_dir, keep=None):
+    keep = MAX_CAPTURES if keep is None else keep
+    names = sorted(f[:-5] for f in os.listdir(profile_dir) if f.endswith(".json"))  # names start with the timestamp
+    for name in names[:max(0, len(names) - keep)]:
+        for ext in (".json", ".folded"):
+            try: os.remove(os.path.join(profile_dir, name + ext))
+            except FileNotFoundError: pass
+
+def captures(profile_dir=None):
+    """Metadata of every capture on disk, slowest first."""
+    profile_dir = profile_dir or PROFILE_DIR
+    try: files = [f for f in os.listdir(profile_dir) if f.endswith(".json")]
+    except FileNotFoundError: return []
+    found = []
+    for f in files:
+        try:
+            with open(os.path.join(profile_dir, f), encoding="utf-8") as fh: found.append(json.load(fh))
+        except (OSError, ValueError): continue  # rotated away or half-written by another process
+    return sorted(found, key=lambda m: -m["elapsed"])
+
+def folded_path(name, profile_dir=None):
+    return os.path.join(profile_dir or PROFILE_DIR, f"{name}.folded")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m autoshield.profiler", description="List the slowest captured reruns")
+    parser.add_argument("--dir", default=PROFILE_DIR, help="capture directory (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=10, help="functions shown per capture (default: %(default)s)")
+    parser.add_argument("--limit", type=int, default=5, help="captures shown (default: %(default)s)")
+    args = parser.parse_args(argv)
+    for meta in captures(args.dir)[:args.limit]:
+        print(f"{meta['elapsed'] * 1e3:8.0f} ms  {meta['label']}  ({meta['reason']}, {meta['samples']} samples)  {folded_path(meta['name'], args.dir)}")
+        for function, own, inclusive in meta["top"][:args.top]:
+            print(f"    {inclusive / max(meta['samples'], 1):6.1%} incl {own / max(meta['samples'], 1):6.1%} self  {function}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Process-wide read cache of the repairs table.
+
+The dashboard shows the customer's repair jobs on every rerun, including each
+keystroke-triggered one. The table is loaded once per process into a DataFrame,
+alongside an index of lowercased CustomerEmail -> row positions, and every session
+is served from that snapshot. A rerun costs one counter read (meta.repairs_version,
+bumped by a storage trigger on every write to the table, from any process) and a
+dict lookup; the table is re-read only after it has changed. invalidate() drops the
+snapshot immediately, for writers that want the next read to reload.
+"""
+import threading
+from contextlib import closing
+
+from autoshield import storage
+
+_snapshots = {}  # database file -> (repairs_version, DataFrame, lowercased email -> row positions)
+_lock = threading.Lock()
+
+def _load(db_file=None):
+    import pandas as pd
+    with closing(storage.connect(db_file)) as conn:
+        version = storage.table_version(conn, "repairs")
+        df = pd.read_sql_query(f"SELECT {', '.join(storage.REPAIR_COLUMNS)} FROM repairs ORDER BY rowid", conn)
+    by_email = {}
+    for pos, email in enumerate(df["CustomerEmail"]):
+        if isinstance(email, str): by_email.setdefault(email.lower(), []).append(pos)
+    return version, df, by_email
+
+def _current(db_file=None):
+    key = db_file or storage.DB_FILE
+    version = storage.current_version("repairs", db_file)
+    snapshot = _snapshots.get(key)
+    if snapshot is None or snapshot[0] != version:
+        with _lock:
+            snapshot = _snapshots.get(key)
+            if snapshot is None or snapshot[0] != version: snapshot = _snapshots[key] = _load(db_file)
+    return snapshot
+
+def jobs(cust_email=None, db_file=None):
+    """
+    All repair jobs, or only the jobs of `cust_email` (case-insensitive), as a new
+    DataFrame; the cached snapshot itself is never handed out.
+    """
+    _, df, by_email = _current(db_file)
+    if cust_email is None: return df.copy()
+    return df.iloc[by_email.get(cust_email.lower(), [])].reset_index(drop=True)
+
+def invalidate():
+    with _lock: _snapshots.clear()
@@ -0,0 +1,101 @@
+"""
+Content-addressed cache for rendered claim report PDFs.
+
+Reports are keyed by a SHA-256 over the canonical JSON of the estimate data, its
+totals, the report template version and the report date (the PDF prints today's
+date). Lookups go to an in-memory LRU tier first and then to an on-disk tier shared
+by all server processes; both tiers evict least-recently-used entries once they
+exceed their size limits.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from autoshield import disk_lru
+
+CACHE_DIR = os.environ.get("AUTOSHIELD_REPORT_CACHE", "report_cache")
+MEMORY_LIMIT_BYTES = 64 * 1024 * 1024
+DISK_LIMIT_BYTES = 512 * 1024 * 1024
+
+def report_key(data, totals, template_version):
+    """Canonical content hash of one report."""
+    payload = {"data": data, "totals": totals, "template": template_version, "date": date.today().isoformat()}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ReportCache:
+    """Two-tier (memory LRU + disk) byte cache keyed by report_key()."""
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_limit=MEMORY_LIMIT_BYTES, disk_limit=DISK_LIMIT_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _remember(self, key, blob):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = blob
+            self._memory_bytes += len(blob)
+            while self._memory_bytes > self.memory_limit and len(self._memory) > 1:
+                _, old = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old)
+
+    def get(self, key):
+        """Returns the cached PDF bytes for `key`, or None."""
+        with self._lock:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+                return blob
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh: blob = fh.read()
+            disk_lru.touch(path)
+        except OSError:
+            return None
+        self._remember(key, blob)
+        return blob
+
+    def put(self, key, blob):
+        self._remember(key, blob)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as fh: fh.write(blob)
+        os.replace(tmp_path, self._path(key))
+        self._evict_disk()
+
+    def _evict_disk(self):
+        disk_lru.evict(self.cache_dir, self.disk_limit, suffix=".pdf")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if os.path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".pdf"): os.remove(entry.path)
+
+_default_cache = ReportCache()
+
+def get(key): return _default_cache.get(key)
+def put(key, blob): _default_cache.put(key, blob)
+
+def get_or_render(data, totals, render, template_version):
+    """Returns cached PDF bytes for the estimate, rendering and caching them on a miss."""
+    key = report_key(data, totals, template_version)
+    blob = get(key)
+    if blob is None:
+        blob = render(data, totals)
+        if blob is not None: put(key, blob)
+    return blob
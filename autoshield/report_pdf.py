@@ -0,0 +1,255 @@
+"""
+ReportLab layout of the claim report PDF.
+
+Kept apart from autoshield.reports so that ReportLab (the slowest import in the app
+after pandas) is only loaded when a report is actually rendered: reports.build_pdf
+and reports.generate_pdf import this module on first use.
+
+Estimates with more than LARGE_ESTIMATE_ITEMS line items are laid out in chunked
+mode. Instead of one Table holding a Paragraph per line item (which ReportLab wraps
+and re-splits page after page, so time grows steeply with the row count), the line
+items enter the story as a single _LineItemChunks flowable. Every time the layout
+reaches it, it builds a table of just the rows that fit the rest of the page, so at
+most about one page of Paragraphs exists at a time and layout time stays linear.
+"""
+from datetime import date
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Flowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from autoshield.reports import DEFAULT_BODY_LABOR_RATE, DEFAULT_PAINT_RATE, SAMPLE_DATA, get_current_formatted_time
+
+LARGE_ESTIMATE_ITEMS = 500  # more line items than this are rendered in chunked mode
+CHUNK_ROWS = 60  # first guess at line-item rows per page (adapts to the rows that actually fit)
+LINE_ITEM_COL_WIDTHS = [36, 200, 80, 28, 60, 95, 95]
+
+def _header_footer(canvas_obj, doc):
+    """Callback function for drawing page headers and footers (`doc.estimate` is the report's data)."""
+    canvas_obj.saveState()
+    width, height = letter
+    estimate = getattr(doc, "estimate", SAMPLE_DATA)
+    company_name = estimate.get("company_name", SAMPLE_DATA["company_name"])
+    written_by = estimate.get("written_by", SAMPLE_DATA["written_by"])
+    current_time_str = get_current_formatted_time()
+    canvas_obj.setFont("Helvetica-Bold", 10)
+    canvas_obj.drawString(36, height - 36, company_name)
+    canvas_obj.setFont("Helvetica", 8)
+    meta = f"Estimate of Record       Written By: {written_by}       {current_time_str}"
+    canvas_obj.drawRightString(width - 36, height - 36, meta)
+    page_num_text = f"Page {doc.page}"
+    canvas_obj.setFont("Helvetica", 8)
+    canvas_obj.drawRightString(width - 36, 20, page_num_text)
+    canvas_obj.restoreState()
+
+_PDF_STYLES = None
+def _pdf_styles():
+    """Builds the report's paragraph and table styles once per process instead of once per render."""
+    global _PDF_STYLES
+    if _PDF_STYLES is None:
+        styles = getSampleStyleSheet()
+        normal = styles["Normal"]
+        _PDF_STYLES = {
+            "normal": normal,
+            "small": ParagraphStyle("Small", parent=normal, fontSize=8),
+            "title": ParagraphStyle("Title", fontSize=14, leading=16),
+            "line_item": ParagraphStyle("LineItemDesc", parent=normal, fontSize=7, leading=8),
+            "notice": ParagraphStyle("Notice", fontSize=7, leading=9),
+            "line_table": TableStyle([
+                ("GRID", (0,0), (-1,-1), 0.25, colors.grey), ("BACKGROUND", (0,0), (-1,0), colors.lightgrey),
+                ("VALIGN", (0,0), (-1,-1), "TOP"), ("FONTSIZE", (0, 0), (-1, -1), 7),
+                ("ALIGN", (0,0), (0,-1), "CENTER"), ("ALIGN", (3,0), (3,-1), "CENTER"),
+                ("ALIGN", (4,0), (4,-1), "RIGHT"), ("ALIGN", (5,0), (5,-1), "RIGHT"),
+                ("ALIGN", (6,0), (6,-1), "RIGHT"),
+            ]),
+        }
+    return _PDF_STYLES
+
+def _line_item_header(small):
+    return [
+        Paragraph("<b>Oper</b>", small), Paragraph("<b>Description</b>", small),
+        Paragraph("<b>Part Number</b>", small), Paragraph("<b>Qty</b>", small),
+        Paragraph("<b>Ext Price $</b>", small), Paragraph("<b>Labor</b>", small),
+        Paragraph("<b>Paint</b>", small)
+    ]
+
+def _line_item_row(item, default_lr, default_pr, line_item_style):
+    oper = item.get("oper", "")
+    desc = item.get("desc", "")
+    part_number = item.get("part_number", "")
+    qty = item.get("qty", 1)
+    ext_price = item.get("part_cost", 0.0) * qty
+
+    labor_hours = item.get("labor_hours", 0.0)
+    labor_rate = item.get("labor_rate", default_lr)
+    labor_amt = labor_hours * labor_rate
+
+    paint_hours = item.get("paint_hours", 0.0)
+    paint_rate = item.get("paint_rate", default_pr)
+    paint_amt = paint_hours * paint_rate
+
+    labor_text = f"{labor_hours:.2f} hrs = ${labor_amt:.2f}" if labor_hours > 0 and labor_rate > 0 else ""
+    paint_text = f"{paint_hours:.2f} hrs = ${paint_amt:.2f}" if paint_hours > 0 and paint_rate > 0 else ""
+
+    return [oper, Paragraph(desc, line_item_style), part_number, f"{qty}", f"{ext_price:.2f}", labor_text, paint_text]
+
+class _LineItemChunks(Flowable):
+    """
+    Line items [start:] of an estimate, laid out a page at a time. It never fits as a
+    whole: ReportLab asks it to split, and split() answers with a table of the rows
+    that fit the space left in the frame, followed by a _LineItemChunks for the rows
+    after them. Rows are built `guess` at a time (the previous page's count plus a
+    few); rows built but not shown are handed on in `pending`, so each is built once.
+    """
+
+    def __init__(self, items, default_lr, default_pr, start=0, guess=CHUNK_ROWS, pending=()):
+        super().__init__()
+        self.items, self.default_lr, self.default_pr = items, default_lr, default_pr
+        self.start, self.guess, self.pending = start, guess, list(pending)
+
+    def wrap(self, availWidth, availHeight):
+        if self.start >= len(self.items): return (0, 0)
+        return (availWidth, availHeight + 1)  # always split, so rows are only built page by page
+
+    def draw(self): pass
+
+    def split(self, availWidth, availHeight):
+        if self.start >= len(self.items): return []
+        styles = _pdf_styles()
+        rows, guess = self.pending, self.guess
+        while True:
+            end = self.start + len(rows)
+            more = self.items[end:self.start + max(guess, len(rows) + 1)]
+            rows += [_line_item_row(item, self.default_lr, self.default_pr, styles["line_item"]) for item in more]
+            table = Table([_line_item_header(styles["small"])] + rows, colWidths=LINE_ITEM_COL_WIDTHS)
+            table.setStyle(styles["line_table"])
+            if table.wrap(availWidth, availHeight)[1] > availHeight: break
+            if self.start + len(rows) == len(self.items): return [table]  # the last rows all fit
+            guess = len(rows) + CHUNK_ROWS // 4  # room left on this page: add rows
+        # Rows that fit, from the heights the candidate just measured (header is row 0)
+        heights, used, fitted = table._rowHeights, 0.0, -1
+        for h in heights:
+            if used + h > availHeight: break
+            used, fitted = used + h, fitted + 1
+        if fitted < 1: return []  # not even one row fits: ReportLab moves on to the next frame
+        page = Table([_line_item_header(styles["small"])] + rows[:fitted], colWidths=LINE_ITEM_COL_WIDTHS, rowHeights=heights[:fitted + 1])
+        page.setStyle(styles["line_table"])
+        return [page, _LineItemChunks(self.items, self.default_lr, self.default_pr, self.start + fitted, fitted + 4, rows[fitted:])]
+
+def build_pdf(data, totals, out, chunked=None):
+    """
+    Renders the PDF report into `out` (a binary file object or a path); raises on
+    failure. `chunked` forces chunked line-item layout on or off; by default it is
+    used for estimates with more than LARGE_ESTIMATE_ITEMS line items.
+    """
+
+    pdf_styles = _pdf_styles()
+    normal = pdf_styles["normal"]
+    small = pdf_styles["small"]
+    if chunked is None: chunked = len(data["line_items"]) > LARGE_ESTIMATE_ITEMS
+
+    doc = SimpleDocTemplate(
+        out, pagesize=letter, rightMargin=36, leftMargin=36,
+        topMargin=72, bottomMargin=36,
+    )
+    doc.estimate = data
+    story = []
+    default_lr = float(data.get("default_labor_rate", DEFAULT_BODY_LABOR_RATE))
+    default_pr = float(data.get("default_paint_rate", DEFAULT_PAINT_RATE))
+
+    story.append(Paragraph(f"<b>Estimate of Record</b>", pdf_styles["title"]))
+    story.append(Spacer(1, 6))
+
+    header_meta = [
+        f"Claim #: {data['claim_number']}",
+        f"Workfile ID: {data['workfile_id']}",
+        f"Date: {date.today().strftime('%m/%d/%Y')}"
+    ]
+    story.append(Paragraph(" &nbsp;&nbsp; ".join(header_meta), small))
+    story.append(Spacer(1, 8))
+
+    # Insured / Vehicle / Loss info table
+    info_table = Table([
+        ["Insured:", data["insured"], "Inspection Location:", data["inspection_location"]],
+        ["Type of Loss:", data["loss"]["type_of_loss"], "Date of Loss:", data["loss"]["date_of_loss"]],
+        ["Point of Impact:", data["loss"]["point_of_impact"], "Deductible:", f"${data['loss']['deductible']:.2f}"],
+        ["Vehicle:", f"{data['vehicle']['year']} {data['vehicle']['make']} {data['vehicle']['model']}", "VIN:", data["vehicle"]["vin"]],
+    ], colWidths=[80, 220, 90, 150])
+    info_table.setStyle(TableStyle([
+        ("VALIGN", (0,0), (-1,-1), "TOP"),
+        ("LINEBELOW", (0,0), (-1,-1), 0.25, colors.grey),
+    ]))
+    story.append(info_table)
+    story.append(Spacer(1, 12))
+
+    # Line items table (page-sized chunks built during layout for large estimates)
+    if chunked: story.append(_LineItemChunks(data["line_items"], default_lr, default_pr))
+    else:
+        li_data = [_line_item_header(small)]
+        li_data += [_line_item_row(item, default_lr, default_pr, pdf_styles["line_item"]) for item in data["line_items"]]
+        line_table = Table(li_data, colWidths=LINE_ITEM_COL_WIDTHS, repeatRows=1)
+        line_table.setStyle(pdf_styles["line_table"])
+        story.append(line_table)
+    story.append(Spacer(1, 12))
+
+    # Totals block
+    totals_rows = []
+    totals_rows.append(["Parts", f"${totals['parts_subtotal']:.2f}"])
+
+    # Body Labor
+    if totals["body_labor_amount"] > 0:
+        rate_display = totals["avg_body_labor_rate"]
+        totals_rows.append([f"Body Labor {totals['body_labor_hours']:.2f} hrs @ ${rate_display:.2f} /hr", f"${totals['body_labor_amount']:.2f}"])
+    else: totals_rows.append(["Body Labor", f"${totals['body_labor_amount']:.2f}"])
+
+    # Paint Labor
+    if totals["paint_labor_amount"] > 0:
+        rate_display = totals["avg_paint_rate"]
+        totals_rows.append([f"Paint Labor {totals['paint_hours']:.2f} hrs @ ${rate_display:.2f} /hr", f"${totals['paint_labor_amount']:.2f}"])
+    else: totals_rows.append(["Paint Labor", f"${totals['paint_labor_amount']:.2f}"])
+
+    # Check for Mechanical Labor (if it were computed)
+    if totals.get("mechanical_labor_amount", 0.0) > 0: totals_rows.append(["Mechanical Labor", f"${totals['mechanical_labor_amount']:.2f}"])
+
+    # Feather, Prime, and Block (FPB)
+    if totals.get("fpb_amount", 0.0) > 0:
+        fpb_rate = data.get('feather_prime_and_block_rate', 0.0)
+        totals_rows.append([f"Feather Prime and Block {totals['fpb_hours']:.2f} hrs @ ${fpb_rate:.2f} /hr", f"${totals['fpb_amount']:.2f}"])
+
+    # Paint Supplies
+    if totals.get("paint_supplies_amount", 0.0) > 0:
+        paint_supply_rate = data.get('paint_supply_rate', 0.0)
+        totals_rows.append([f"Paint Supplies {totals['paint_supplies_hours']:.2f} hrs @ ${paint_supply_rate:.2f} /hr", f"${totals['paint_supplies_amount']:.2f}"])
+
+    # Miscellaneous
+    totals_rows.append(["Miscellaneous", f"${totals['misc']:.2f}"])
+    totals_rows.append(["Other Charges", f"${totals['other']:.2f}"])
+
+    totals_rows.append([Paragraph("<b>Subtotal</b>", normal), Paragraph(f"<b>${totals['subtotal']:.2f}</b>", normal)])
+
+    # Tax
+    tax_rate_pct = totals["sales_tax_rate"] * 100.0
+    totals_rows.append([f"Sales Tax ${totals['parts_subtotal']:.2f} @ {tax_rate_pct:.4f} %", f"${totals['sales_tax']:.2f}"])
+
+    totals_rows.append([Paragraph("<b>Total Cost of Repairs</b>", normal), Paragraph(f"<b>${totals['total_cost_of_repairs']:.2f}</b>", normal)])
+    totals_rows.append(["Less: Deductible", f"(${totals['deductible']:.2f})"])
+    totals_rows.append([Paragraph("<b>Net Cost of Repairs</b>", normal), Paragraph(f"<b>${totals['net_cost_of_repairs']:.2f}</b>", normal)])
+
+    totals_table = Table(totals_rows, colWidths=[360, 120], hAlign="RIGHT")
+    totals_table_style = TableStyle([
+        ("ALIGN", (1,0), (1,-1), "RIGHT"), ("VALIGN", (0,0), (-1,-1), "MIDDLE"),
+        ("LINEABOVE", (0, -4), (-1, -4), 0.5, colors.black), ("LINEABOVE", (0, -1), (-1, -1), 1.0, colors.black),
+    ])
+    totals_table.setStyle(totals_table_style)
+    story.append(totals_table)
+    story.append(Spacer(1, 12))
+
+    # Footer note / legal block (short)
+    notice = ("FOR YOUR PROTECTION CALIFORNIA LAW REQUIRES THE FOLLOWING TO APPEAR ON THIS FORM: "
+              "ANY PERSON WHO KNOWINGLY PRESENTS FALSE OR FRAUDULENT CLAIM FOR THE PAYMENT OF A LOSS "
+              "IS GUILTY OF A CRIME AND MAY BE SUBJECT TO FINES AND CONFINEMENT IN STATE PRISON.")
+    story.append(Paragraph(notice, pdf_styles["notice"]))
+    story.append(Spacer(1, 12))
+
+    doc.build(story, onFirstPage=_header_footer, onLaterPages=_header_footer)
@@ -0,0 +1,348 @@
+"""
+Claim report generation: estimate totals and the ReportLab PDF.
+
+Has no Streamlit dependency so it can run headless. The batch entry point renders
+many estimates in parallel across CPU cores:
+
+    python -m autoshield.reports estimates.jsonl --out reports/ --jobs 8
+    python -m autoshield.reports estimates.xlsx --out reports/
+
+JSON-lines input holds one estimate per line, shaped like SAMPLE_DATA. xlsx input
+holds an "Estimates" sheet with one row per estimate (nested fields as dotted
+columns, e.g. "vehicle.make", "loss.deductible") and a "LineItems" sheet whose rows
+reference their estimate through an "estimate_id" column.
+
+The layout lives in autoshield.report_pdf, imported on the first render so that
+importing this module (and the dashboard) does not load ReportLab. Estimates with
+more than report_pdf.LARGE_ESTIMATE_ITEMS line items are laid out in page-sized
+chunks: peak memory stays flat instead of growing with the item count.
+generate_pdf_file() writes such reports to a file (or a spooled temporary file)
+rather than returning the bytes.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from autoshield import metrics, report_cache
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------
+# Default Rates & Sample Data
+# ----------------------------
+DEFAULT_BODY_LABOR_RATE = 80.00
+DEFAULT_PAINT_RATE = 80.00
+SAMPLE_DATA = {
+    "company_name": "XXXXX XXXX INSURANCE COMPANIES",
+    "claim_number": "XX-XXXX-XXX*X",
+    "workfile_id": "XXXXXXXX",
+    "written_by": "XXX, License Number: XXXXXXX",
+    "insured": "XXX XXX",
+    "inspection_location": "XXX Auto Repair, xxxx, CA",
+    "vehicle": {
+        "year": 2025,
+        "make": "AUDI",
+        "model": "Q5 Premium Quattro TFSI",
+        "vin": "XXX",
+        "color": "Black",
+        "odometer": 109,
+    },
+    "loss": {
+        "type_of_loss": "Collision",
+        "date_of_loss": "XX/XX/XXXX XXXX",
+        "point_of_impact": "01 Right Front",
+        "deductible": 1000.00,
+    },
+    "default_labor_rate": DEFAULT_BODY_LABOR_RATE,
+    "default_paint_rate": DEFAULT_PAINT_RATE,
+    "line_items": [
+        {"line": 2, "oper": "R&I", "desc": "R&I bumper assy", "part_number": "8MA807065AGRU", "qty": 1, "part_cost": 0.0, "labor_hours": 2.0, "paint_hours": 0.0},
+        {"line": 3, "oper": "Rpr", "desc": "Rpr Bumper cover (bumper code 2K5)", "part_number": "8MA807065AGRU", "qty": 1, "part_cost": 0.0, "labor_hours": 3.2, "paint_hours": 3.0},
+        {"line": 7, "oper": "Repl", "desc": "RT Air duct", "part_number": "8MA1217649B9", "qty": 1, "part_cost": 52.92, "labor_hours": 0.2, "paint_hours": 0.0},
+        {"line": 8, "oper": "Repl", "desc": "RT Outer grille (bumper code 2K3,2K7)", "part_number": "8MA807682A3FZ", "qty": 1, "part_cost": 181.67, "labor_hours": 0.1, "paint_hours": 0.0},
+        {"line": 15, "oper": "R&I", "desc": "RT headlamp assy", "part_number": "8MA941774A", "qty": 1, "part_cost": 0.0, "labor_hours": 0.6, "paint_hours": 0.0},
+        {"line": 17, "oper": "Rpr", "desc": "Rpr RT Fender", "part_number": "8MA821106STL", "qty": 1, "part_cost": 0.0, "labor_hours": 4.7, "paint_hours": 2.4},
+        {"line": 30, "oper": "Scan", "desc": "Pre-Repair Scan", "part_number": "", "qty": 1, "part_cost": 0.0, "labor_hours": 0.5, "paint_hours": 0.0},
+        {"line": 31, "oper": "Scan", "desc": "Post-Repair Scan", "part_number": "", "qty": 1, "part_cost": 0.0, "labor_hours": 0.5, "paint_hours": 0.0},
+    ],
+    "feather_prime_and_block_hours": 0.6,
+    "feather_prime_and_block_rate": 80.0,
+    "paint_supplies_hours": 7.6,
+    "paint_supply_rate": 55.0,
+    "misc_charges": 180.00,
+    "other_charges": 5.00,
+    "sales_tax_rate": 0.1075,
+}
+
+# --- Utility Functions (Kept the same) ---
+
+def get_current_formatted_time():
+    """Returns the current local time formatted as 'MM/DD/YYYY HH:MM:SS AM/PM'."""
+    import pytz
+    now = datetime.now(pytz.timezone('America/Los_Angeles'))
+    return now.strftime('%m/%d/%Y %I:%M:%S %p')
+
+def parse_vehicle(text):
+    """A repair job's Vehicle text ("2021 Audi Q5 Premium") as {"year", "make", "model"}; the year may also come last."""
+    words = str(text or "").split()
+    year = next((w for w in (words[:1] + words[-1:]) if re.fullmatch(r"(19|20)\d\d", w)), "")
+    if year: words.remove(year)
+    return {"year": int(year) if year else "", "make": words[0] if words else "", "model": " ".join(words[1:])}
+
+def job_estimate(job):
+    """
+    Base estimate for a repair job (a dict with REPAIR_COLUMNS): SAMPLE_DATA with the
+    job's vehicle and customer, so its parts are priced for that vehicle. SAMPLE_DATA
+    itself if `job` is None.
+    """
+    if job is None: return SAMPLE_DATA
+    data = json.loads(json.dumps(SAMPLE_DATA))
+    data["insured"] = job.get("CustomerName") or ""
+    data["vehicle"] = {**parse_vehicle(job.get("Vehicle")), "vin": "", "color": "", "odometer": ""}
+    return data
+
+@metrics.timed("compute_totals")
+def compute_totals(data):
+    """Calculates all financial totals based on the detailed estimate data."""
+    parts_subtotal = 0.0
+    total_body_labor_hours = 0.0
+    total_paint_hours = 0.0
+    default_lr = float(data.get("default_labor_rate", DEFAULT_BODY_LABOR_RATE))
+    default_pr = float(data.get("default_paint_rate", DEFAULT_PAINT_RATE))
+    body_labor_amount = 0.0
+    paint_labor_amount = 0.0
+    for item in data["line_items"]:
+        parts_subtotal += float(item.get("part_cost", 0.0)) * float(item.get("qty", 1))
+        lh = float(item.get("labor_hours", 0.0))
+        lr = float(item.get("labor_rate", default_lr))
+        ph = float(item.get("paint_hours", 0.0))
+        pr = float(item.get("paint_rate", default_pr))
+        total_body_labor_hours += lh
+        total_paint_hours += ph
+        body_labor_amount += lh * lr
+        paint_labor_amount += ph * pr
+    
+    # Use explicit keys from SAMPLE_DATA, not dynamic calculation
+    fpb_hours = float(data.get("feather_prime_and_block_hours", 0.0))
+    fpb_rate = float(data.get("feather_prime_and_block_rate", 0.0))
+    fpb_amount = fpb_hours * fpb_rate
+    paint_supply_hours = float(data.get("paint_supplies_hours", 0.0))
+    paint_supply_rate = float(data.get("paint_supply_rate", 0.0))
+    paint_supplies_amount = paint_supply_hours * paint_supply_rate
+    
+    misc = float(data.get("misc_charges", 0.0))
+    other = float(data.get("other_charges", 0.0))
+    subtotal = parts_subtotal + body_labor_amount + paint_labor_amount + fpb_amount + paint_supplies_amount + misc + other
+    sales_tax = parts_subtotal * float(data.get("sales_tax_rate", 0.0))
+    total_cost = subtotal + sales_tax
+    deductible = float(data["loss"].get("deductible", 0.0))
+    net_cost = total_cost - deductible
+    avg_body_labor_rate = default_lr
+    if total_body_labor_hours > 0: avg_body_labor_rate = body_labor_amount / total_body_labor_hours
+    avg_paint_rate = default_pr
+    if total_paint_hours > 0: avg_paint_rate = paint_labor_amount / total_paint_hours
+    
+    return {
+        "parts_subtotal": round(parts_subtotal, 2), "body_labor_hours": round(total_body_labor_hours, 2),
+        "body_labor_amount": round(body_labor_amount, 2), "avg_body_labor_rate": round(avg_body_labor_rate, 2),
+        "paint_hours": round(total_paint_hours, 2), "paint_labor_amount": round(paint_labor_amount, 2),
+        "avg_paint_rate": round(avg_paint_rate, 2), "fpb_hours": round(fpb_hours, 2),
+        "fpb_amount": round(fpb_amount, 2), "paint_supplies_hours": round(paint_supply_hours, 2),
+        "paint_supplies_amount": round(paint_supplies_amount, 2), "misc": round(misc, 2),
+        "other": round(other, 2), "subtotal": round(subtotal, 2),
+        "sales_tax_rate": float(data.get("sales_tax_rate", 0.0)), "sales_tax": round(sales_tax, 2),
+        "total_cost_of_repairs": round(total_cost, 2), "deductible": round(deductible, 2),
+        "net_cost_of_repairs": round(net_cost, 2),
+    }
+
+# Bump whenever the layout produced by generate_pdf changes (invalidates cached reports)
+REPORT_TEMPLATE_VERSION = 1
+SPOOL_LIMIT_BYTES = 8 * 1024 * 1024  # generate_pdf_file keeps smaller reports in memory
+
+# --- START: ORIGINAL PDF GENERATION LOGIC (layout in autoshield.report_pdf) ---
+def build_pdf(data, totals, out, chunked=None):
+    """Renders the PDF report into the binary file object (or path) `out`; raises on failure."""
+    from autoshield import report_pdf # ReportLab is imported on the first render, not at startup
+    report_pdf.build_pdf(data, totals, out, chunked)
+
+@metrics.timed("generate_pdf")
+def generate_pdf(data, totals):
+    """Generates the PDF report and returns the binary data, or None on failure."""
+    buffer = io.BytesIO()
+    try:
+        build_pdf(data, totals, buffer)
+    except Exception as e:
+        logger.error("PDF Generation Failed (ReportLab Error): %s", e)
+        return None
+    return buffer.getvalue()
+
+@metrics.timed("generate_pdf")
+def generate_pdf_file(data, totals, out=None, chunked=None):
+    """
+    Large-estimate variant of generate_pdf: renders into `out` (a path or binary file)
+    or, by default, into a temporary file that stays in memory up to
+    SPOOL_LIMIT_BYTES and spills to disk beyond. Returns the file object rewound to the
+    start (or `out` if it was a path), or None on failure.
+    """
+    target = tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT_BYTES) if out is None else out
+    try:
+        build_pdf(data, totals, target, chunked)
+    except Exception as e:
+        logger.error("PDF Generation Failed (ReportLab Error): %s", e)
+        if out is None: target.close()
+        return None
+    if hasattr(target, "seek"): target.seek(0)
+    return target
+# --- END: ORIGINAL PDF GENERATION LOGIC ---
+
+# =========================================================
+# Dashboard worker-pool task
+# =========================================================
+REPORT_DELAY = float(os.environ.get("AUTOSHIELD_REPORT_DELAY", 20))  # fake backend delay in seconds
+
+def _simulate_work(report, seconds, end=1.0, step=0.5):
+    """Stands in for the slow backend call while publishing progress up to `end`."""
+    elapsed = 0.0
+    while elapsed < seconds:
+        time.sleep(min(step, seconds - elapsed))
+        elapsed += step
+        report(end * min(elapsed / seconds, 1.0))
+
+def run_report_task(report, data=None, owner=None, job_id=None):
+    """
+    Background report task for `data` (an estimate shaped like SAMPLE_DATA; SAMPLE_DATA
+    itself if None). With an `owner`, the estimate is recorded for `job_id` once the
+    PDF is ready (see record_estimate).
+    """
+    data = data or SAMPLE_DATA
+    _simulate_work(report, REPORT_DELAY, end=0.8) # Simulate long report processing time
+    totals = compute_totals(data)
+    pdf_bytes = report_cache.get_or_render(data, totals, generate_pdf, REPORT_TEMPLATE_VERSION)
+    if pdf_bytes is None: raise RuntimeError("PDF generation failed (ReportLab error).")
+    if owner is not None: record_estimate(owner, data, totals, job_id)
+    return pdf_bytes
+
+def record_estimate(owner, data, totals, job_id=None):
+    """
+    Adds a successfully reported estimate to the admin analytics rollups. Storage
+    records each (job, estimate) once, so regenerating the same report does not count
+    it again.
+    """
+    from autoshield import storage
+    return storage.add_estimate(owner, data, totals, job_id)
+
+# =========================================================
+# Batch / headless generation
+# =========================================================
+def _set_dotted(record, dotted_key, value):
+    """record["vehicle"]["make"] = value for dotted_key "vehicle.make"."""
+    *parents, leaf = dotted_key.split(".")
+    for key in parents: record = record.setdefault(key, {})
+    record[leaf] = value
+
+def _xlsx_records(ws):
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None) or ()
+    for row in rows:
+        if all(v is None for v in row): continue
+        yield {h: v for h, v in zip(header, row) if h is not None and v is not None}
+
+def read_estimates(path):
+    """Yields (estimate_id, estimate) pairs from a .jsonl or .xlsx input file."""
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True)
+        line_items = {}
+        if "LineItems" in wb.sheetnames:
+            for row in _xlsx_records(wb["LineItems"]):
+                line_items.setdefault(str(row.pop("estimate_id", "")), []).append(row)
+        for n, row in enumerate(_xlsx_records(wb["Estimates"]), 1):
+            estimate = {}
+            for key, value in row.items(): _set_dotted(estimate, key, value)
+            estimate_id = str(estimate.pop("estimate_id", n))
+            estimate["line_items"] = line_items.get(estimate_id, [])
+            yield estimate_id, estimate
+    else:
+        with open(path, encoding="utf-8") as fh:
+            for n, line in enumerate(fh, 1):
+                if not line.strip(): continue
+                estimate = json.loads(line)
+                yield str(estimate.get("estimate_id") or estimate.get("claim_number") or n), estimate
+
+def _report_filename(estimate_id):
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", estimate_id) + ".pdf"
+
+def render_to_file(estimate_id, estimate, out_dir):
+    """Worker: computes totals and renders one estimate to `out_dir`. Returns a summary dict."""
+    started = time.perf_counter()
+    try:
+        totals = compute_totals(estimate)
+        path = os.path.join(out_dir, _report_filename(estimate_id))
+        tmp_path = path + ".part"
+        with open(tmp_path, "wb") as fh: build_pdf(estimate, totals, fh)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        return {"estimate_id": estimate_id, "ok": False, "error": f"{type(e).__name__}: {e}",
+                "seconds": round(time.perf_counter() - started, 4)}
+    return {"estimate_id": estimate_id, "ok": True, "file": path, "net_cost_of_repairs": totals["net_cost_of_repairs"],
+            "seconds": round(time.perf_counter() - started, 4)}
+
+def render_batch(estimates, out_dir, jobs=None, on_result=None):
+    """
+    Renders (estimate_id, estimate) pairs across a process pool, keeping at most a few
+    estimates per worker in flight so large inputs stream through. Calls
+    on_result(summary) as each report finishes and returns the list of summaries.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    results, pending = [], set()
+
+    def drain(return_when):
+        nonlocal pending
+        done, pending = wait(pending, return_when=return_when)
+        for future in done:
+            summary = future.result()
+            results.append(summary)
+            if on_result: on_result(summary)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for estimate_id, estimate in estimates:
+            pending.add(pool.submit(render_to_file, estimate_id, estimate, out_dir))
+            if len(pending) >= jobs * 4: drain(FIRST_COMPLETED)
+        if pending: drain(ALL_COMPLETED)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m autoshield.reports", description="Render claim report PDFs in bulk")
+    parser.add_argument("input", help="estimates as .jsonl (one estimate per line) or .xlsx (Estimates + LineItems sheets)")
+    parser.add_argument("--out", default="reports", help="output directory (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    summary_path = os.path.join(args.out, "summary.jsonl")
+    os.makedirs(args.out, exist_ok=True)
+    started = time.perf_counter()
+    with open(summary_path, "w", encoding="utf-8") as summary_file:
+        def on_result(summary):
+            summary_file.write(json.dumps(summary) + "\n")
+            if not summary["ok"]: print(f"FAILED {summary['estimate_id']}: {summary['error']}", file=sys.stderr)
+
+        results = render_batch(read_estimates(args.input), args.out, args.jobs, on_result)
+    elapsed = time.perf_counter() - started
+
+    failures = sum(1 for r in results if not r["ok"])
+    rendered = len(results) - failures
+    rate = rendered / elapsed if elapsed > 0 else 0.0
+    print(f"Rendered {rendered} report(s) in {elapsed:.2f}s ({rate:.1f} reports/sec), {failures} failed. Summary: {summary_path}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Shop-level operational numbers for the admin analytics panel.
+
+Jobs per status, message volume per day, and the count, average total and labor /
+paint hours of generated estimates are pre-aggregated in the storage database's
+rollups table. Triggers on repairs, messages and estimates adjust the affected
+counters in the same transaction as each write (a new job, a status change, a posted
+message, a recorded estimate), from any process. snapshot() reads a fixed number of
+rows by primary key, so the panel costs the same with a thousand jobs or a million,
+and nothing re-reads the workbook or re-runs compute_totals.
+
+rebuild() recomputes everything from the tables for recovery, e.g. after rows were
+changed with the triggers dropped or the totals formula changed. It reprices every
+stored estimate with portfolio.batch_totals first:
+
+    python -m autoshield.rollups rebuild
+    python -m autoshield.rollups show --days 14
+"""
+import argparse
+import json
+from contextlib import closing
+
+from autoshield import storage
+
+DAYS = 30  # days of message activity shown by default
+
+def snapshot(days=DAYS, db_file=None):
+    """
+    The panel's numbers: {"jobs_by_status": {status: jobs}, "jobs", "messages",
+    "estimates", "average_estimate", "labor_hours", "paint_hours", "daily": [(day,
+    messages, jobs with messages, messages per job), ...] for the last `days` days
+    with messages, newest first}.
+    """
+    with closing(storage.connect(db_file)) as conn:
+        values = {}
+        for metric, key, value in conn.execute("SELECT Metric, Key, Value FROM rollups WHERE Metric IN ('jobs_by_status', 'messages', 'estimates')"):
+            values.setdefault(metric, {})[key] = value
+        per_day = conn.execute(
+            "SELECT Key, Value FROM rollups WHERE Metric = 'messages_by_day' AND Value > 0 ORDER BY Key DESC LIMIT ?", (days,),
+        ).fetchall()
+        job_days = dict(conn.execute(
+            "SELECT Key, Value FROM rollups WHERE Metric = 'job_days' AND Key >= ?", (per_day[-1][0] if per_day else "",),
+        ).fetchall())
+    by_status = {status: int(n) for status, n in sorted(values.get("jobs_by_status", {}).items()) if n}
+    estimates = values.get("estimates", {})
+    count = int(estimates.get("count", 0))
+    daily = [(day, int(n), int(job_days.get(day, 0)), round(n / job_days[day], 2) if job_days.get(day) else 0.0) for day, n in per_day]
+    return {
+        "jobs_by_status": by_status, "jobs": sum(by_status.values()),
+        "messages": int(values.get("messages", {}).get("all", 0)), "estimates": count,
+        "average_estimate": round(estimates.get("total_cost", 0.0) / count, 2) if count else 0.0,
+        "labor_hours": round(estimates.get("labor_hours", 0.0), 2), "paint_hours": round(estimates.get("paint_hours", 0.0), 2),
+        "daily": daily,
+    }
+
+def job_activity(job_id, db_file=None):
+    """[(day, messages), ...] posted on one job, oldest first."""
+    with closing(storage.connect(db_file)) as conn:
+        return [tuple(row) for row in conn.execute(
+            "SELECT Day, Messages FROM message_days WHERE JobID = ? ORDER BY Day", (str(job_id),),
+        )]
+
+def rebuild(db_file=None):
+    """
+    Reprices every stored estimate (one vectorized batch_totals pass) and recomputes
+    all rollups from the tables, in one transaction. Returns the number of estimates.
+    """
+    from autoshield import portfolio
+    with storage.transaction(db_file) as conn:
+        estimates = [(row[0], json.loads(row[1])) for row in conn.execute("SELECT EstimateID, Estimate FROM estimates")]
+        if estimates:
+            totals = portfolio.batch_totals(*portfolio.frames_from_estimates(estimates))
+            conn.executemany(
+                "UPDATE estimates SET TotalCost = ?, LaborHours = ?, PaintHours = ? WHERE EstimateID = ?",
+                zip(totals["total_cost_of_repairs"].tolist(), totals["body_labor_hours"].tolist(),
+                    totals["paint_hours"].tolist(), totals.index.tolist()),
+            )
+        storage.rebuild_rollups(conn)
+    return len(estimates)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m autoshield.rollups", description="AutoShield operational rollups")
+    parser.add_argument("--db", default=storage.DB_FILE, help="SQLite database file (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="recompute every rollup from the tables")
+    show = sub.add_parser("show", help="print the current rollups")
+    show.add_argument("--days", type=int, default=DAYS)
+    args = parser.parse_args(argv)
+
+    storage.init_db(args.db)
+    if args.command == "rebuild":
+        print(f"Rebuilt rollups of {args.db} ({rebuild(args.db)} estimates repriced)")
+    else:
+        print(json.dumps(snapshot(args.days, args.db), indent=1))
+
+if __name__ == "__main__":
+    main()
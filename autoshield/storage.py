@@ -0,0 +1,923 @@
+"""
+SQLite storage engine for users, repair jobs and job messages.
+
+The Streamlit app used to read and rewrite Users.xlsx / AutoShield_Repairs.xlsx on
+every request. The same data now lives in an embedded SQLite database with indexes
+on JobID, CustomerEmail and Username. The xlsx files are only used for the one-shot
+import and for the back-office export.
+
+    python -m autoshield.storage import --users Users.xlsx --repairs AutoShield_Repairs.xlsx
+    python -m autoshield.storage export --repairs Repairs_Export.xlsx --users Users_Export.xlsx
+    python -m autoshield.storage compact --repairs AutoShield_Repairs.xlsx
+
+Messages form an append-only journal: the database runs in WAL mode, so posts from
+several server processes serialize on SQLite's write lock and each gets the next
+value of an AUTOINCREMENT sequence as its MessageID. New messages are folded back
+into the Messages sheet of the reporting workbook by a periodic compaction, which
+rewrites the workbook once per batch instead of once per post.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DB_FILE = os.environ.get("AUTOSHIELD_DB", "autoshield.db")
+COMPACT_INTERVAL = float(os.environ.get("AUTOSHIELD_COMPACT_INTERVAL", 300))  # seconds between workbook compactions
+MESSAGE_PAGE_SIZE = 20
+MESSAGE_SEARCH_LIMIT = 50
+MESSAGE_SEARCH_WINDOW = 2000  # newest matches ranked by an unscoped message search
+
+USER_COLUMNS = ["UserID", "Username", "Password", "PasswordHash", "CustomerName", "CustomerEmail", "Role"]
+REPAIR_COLUMNS = ["JobID", "CustomerName", "CustomerEmail", "Vehicle", "RepairShop", "Status", "LastUpdate", "LatestMessage", "Notes"]
+MESSAGE_COLUMNS = ["MessageID", "JobID", "PostedBy", "PostedAt", "Subject", "Body"]
+ESTIMATE_COLUMNS = ["EstimateID", "JobID", "Owner", "CreatedAt", "Estimate", "TotalCost", "LaborHours", "PaintHours"]
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Timestamp columns, compared and sorted as TIMESTAMP_FORMAT text
+DATE_COLUMNS = {"repairs": "LastUpdate", "messages": "PostedAt"}
+EXCEL_EPOCH, EXCEL_MAX_SERIAL = datetime(1899, 12, 30), 2958466  # serial day 0 and 10000-01-01
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    UserID INTEGER,
+    Username TEXT NOT NULL,
+    Password TEXT,
+    PasswordHash TEXT,
+    CustomerName TEXT,
+    CustomerEmail TEXT COLLATE NOCASE,
+    Role TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (Username);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users (CustomerEmail);
+
+CREATE TABLE IF NOT EXISTS repairs (
+    JobID TEXT NOT NULL,
+    CustomerName TEXT,
+    CustomerEmail TEXT COLLATE NOCASE,
+    Vehicle TEXT,
+    RepairShop TEXT,
+    Status TEXT,
+    LastUpdate TEXT,
+    LatestMessage TEXT,
+    Notes TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_repairs_jobid ON repairs (JobID);
+CREATE INDEX IF NOT EXISTS idx_repairs_email ON repairs (CustomerEmail);
+-- Admin job browser: status filter and the sortable columns
+CREATE INDEX IF NOT EXISTS idx_repairs_status ON repairs (Status, LastUpdate);
+CREATE INDEX IF NOT EXISTS idx_repairs_updated ON repairs (LastUpdate);
+CREATE INDEX IF NOT EXISTS idx_repairs_customer ON repairs (CustomerName);
+CREATE INDEX IF NOT EXISTS idx_repairs_vehicle ON repairs (Vehicle);
+CREATE INDEX IF NOT EXISTS idx_repairs_jobnumber ON repairs (CAST(JobID AS INTEGER), JobID);
+
+CREATE TABLE IF NOT EXISTS messages (
+    Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    MessageID TEXT,
+    JobID TEXT,
+    PostedBy TEXT,
+    PostedAt TEXT,
+    Subject TEXT,
+    Body TEXT
+);
+DROP INDEX IF EXISTS idx_messages_jobid;
+CREATE INDEX IF NOT EXISTS idx_messages_job_posted ON messages (JobID, PostedAt, Seq);
+CREATE INDEX IF NOT EXISTS idx_messages_posted ON messages (PostedAt, Seq);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    TaskID TEXT PRIMARY KEY,
+    Kind TEXT,
+    Owner TEXT,
+    Status TEXT,
+    Progress REAL,
+    Detail TEXT,
+    Result BLOB,
+    Error TEXT,
+    CreatedAt REAL,
+    UpdatedAt REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_owner ON tasks (Owner, Kind, CreatedAt);
+
+CREATE TABLE IF NOT EXISTS assessments (
+    CacheKey TEXT PRIMARY KEY,
+    ImageSHA256 TEXT,
+    ModelName TEXT,
+    PromptHash TEXT,
+    Result TEXT,
+    CreatedAt REAL
+);
+CREATE INDEX IF NOT EXISTS idx_assessments_image ON assessments (ImageSHA256);
+
+CREATE TABLE IF NOT EXISTS estimates (
+    EstimateID INTEGER PRIMARY KEY AUTOINCREMENT,
+    JobID TEXT,
+    Owner TEXT,
+    CreatedAt TEXT,
+    Estimate TEXT,
+    TotalCost REAL,
+    LaborHours REAL,
+    PaintHours REAL,
+    EstimateKey TEXT
+);
+
+-- Pre-aggregated counters for the admin analytics panel, kept current by triggers
+CREATE TABLE IF NOT EXISTS rollups (
+    Metric TEXT NOT NULL,
+    Key TEXT NOT NULL,
+    Value REAL NOT NULL,
+    PRIMARY KEY (Metric, Key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS message_days (
+    Day TEXT NOT NULL,
+    JobID TEXT NOT NULL,
+    Messages INTEGER NOT NULL,
+    PRIMARY KEY (Day, JobID)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+# Every write to a versioned table bumps meta.<table>_version, so in-process caches of
+# the table can tell with one primary-key read whether they are still current
+VERSIONED_TABLES = ["users", "repairs"]
+_VERSION_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS {table}_version_{event} AFTER {event} ON {table} BEGIN
+    INSERT OR REPLACE INTO meta (key, value)
+    VALUES ('{table}_version', COALESCE((SELECT value FROM meta WHERE key = '{table}_version'), 0) + 1);
+END;
+"""
+# Word indexes kept in step with their table by triggers (external-content FTS5 tables):
+# the jobs' customer and vehicle text for the admin job browser, and message text for
+# message search. An update reindexes a row only when an indexed column changes.
+SEARCH_TABLES = {
+    "repairs_search": ("repairs", ["CustomerName", "CustomerEmail", "Vehicle"]),
+    "messages_search": ("messages", ["Subject", "Body"]),
+}
+_SEARCH_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({columns}, content='{table}', content_rowid='rowid');
+CREATE VIRTUAL TABLE IF NOT EXISTS {name}_vocab USING fts5vocab({name}, row);
+CREATE TRIGGER IF NOT EXISTS {name}_insert AFTER INSERT ON {table} BEGIN
+    INSERT INTO {name} (rowid, {columns}) VALUES (new.rowid, {new});
+END;
+CREATE TRIGGER IF NOT EXISTS {name}_delete AFTER DELETE ON {table} BEGIN
+    INSERT INTO {name} ({name}, rowid, {columns}) VALUES ('delete', old.rowid, {old});
+END;
+CREATE TRIGGER IF NOT EXISTS {name}_update AFTER UPDATE OF {columns} ON {table} BEGIN
+    INSERT INTO {name} ({name}, rowid, {columns}) VALUES ('delete', old.rowid, {old});
+    INSERT INTO {name} (rowid, {columns}) VALUES (new.rowid, {new});
+END;
+"""
+# Rollups: every write to repairs, messages or estimates adjusts the counters it affects
+# in the same transaction, so reading them costs the same however large the tables are.
+#   jobs_by_status / <Status>        jobs per status
+#   messages / all                   messages
+#   messages_by_day / <YYYY-MM-DD>   messages posted that day
+#   job_days / <YYYY-MM-DD>          jobs with a message that day (per-job counts in message_days)
+#   estimates / count, total_cost, labor_hours, paint_hours
+_ADD = "ON CONFLICT (Metric, Key) DO UPDATE SET Value = Value + excluded.Value"
+_DAY = "COALESCE(substr({row}.PostedAt, 1, 10), '')"
+_MESSAGE_ADDED = f"""
+    INSERT INTO message_days VALUES ({_DAY}, COALESCE({{row}}.JobID, ''), 1)
+        ON CONFLICT (Day, JobID) DO UPDATE SET Messages = Messages + 1;
+    INSERT INTO rollups VALUES ('messages', 'all', 1) {_ADD};
+    INSERT INTO rollups VALUES ('messages_by_day', {_DAY}, 1) {_ADD};
+    INSERT INTO rollups SELECT 'job_days', Day, 1 FROM message_days
+        WHERE Day = {_DAY} AND JobID = COALESCE({{row}}.JobID, '') AND Messages = 1 {_ADD};
+"""
+_MESSAGE_REMOVED = f"""
+    INSERT INTO rollups VALUES ('messages', 'all', -1) {_ADD};
+    INSERT INTO rollups VALUES ('messages_by_day', {_DAY}, -1) {_ADD};
+    INSERT INTO rollups SELECT 'job_days', Day, -1 FROM message_days
+        WHERE Day = {_DAY} AND JobID = COALESCE({{row}}.JobID, '') AND Messages = 1 {_ADD};
+    DELETE FROM message_days WHERE Day = {_DAY} AND JobID = COALESCE({{row}}.JobID, '') AND Messages = 1;
+    UPDATE message_days SET Messages = Messages - 1 WHERE Day = {_DAY} AND JobID = COALESCE({{row}}.JobID, '');
+"""
+_ESTIMATE_ROLLUP = "".join(
+    f"\n    INSERT INTO rollups VALUES ('estimates', '{key}', {{sign}}{value}) {_ADD};"
+    for key, value in [("count", "1"), ("total_cost", "COALESCE({row}.TotalCost, 0)"),
+                       ("labor_hours", "COALESCE({row}.LaborHours, 0)"), ("paint_hours", "COALESCE({row}.PaintHours, 0)")]
+)
+_ROLLUP_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS repairs_rollup_insert AFTER INSERT ON repairs BEGIN
+    INSERT INTO rollups VALUES ('jobs_by_status', COALESCE(new.Status, ''), 1) {_ADD};
+END;
+CREATE TRIGGER IF NOT EXISTS repairs_rollup_delete AFTER DELETE ON repairs BEGIN
+    INSERT INTO rollups VALUES ('jobs_by_status', COALESCE(old.Status, ''), -1) {_ADD};
+END;
+CREATE TRIGGER IF NOT EXISTS repairs_rollup_update AFTER UPDATE OF Status ON repairs WHEN old.Status IS NOT new.Status BEGIN
+    INSERT INTO rollups VALUES ('jobs_by_status', COALESCE(old.Status, ''), -1) {_ADD};
+    INSERT INTO rollups VALUES ('jobs_by_status', COALESCE(new.Status, ''), 1) {_ADD};
+END;
+CREATE TRIGGER IF NOT EXISTS messages_rollup_insert AFTER INSERT ON messages BEGIN{_MESSAGE_ADDED.format(row="new")}END;
+CREATE TRIGGER IF NOT EXISTS messages_rollup_delete AFTER DELETE ON messages BEGIN{_MESSAGE_REMOVED.format(row="old")}END;
+CREATE TRIGGER IF NOT EXISTS messages_rollup_update AFTER UPDATE OF JobID, PostedAt ON messages
+WHEN old.JobID IS NOT new.JobID OR substr(old.PostedAt, 1, 10) IS NOT substr(new.PostedAt, 1, 10) BEGIN{_MESSAGE_REMOVED.format(row="old")}{_MESSAGE_ADDED.format(row="new")}END;
+CREATE TRIGGER IF NOT EXISTS estimates_rollup_insert AFTER INSERT ON estimates BEGIN{_ESTIMATE_ROLLUP.format(row="new", sign="")}
+END;
+CREATE TRIGGER IF NOT EXISTS estimates_rollup_delete AFTER DELETE ON estimates BEGIN{_ESTIMATE_ROLLUP.format(row="old", sign="-")}
+END;
+CREATE TRIGGER IF NOT EXISTS estimates_rollup_update AFTER UPDATE OF TotalCost, LaborHours, PaintHours ON estimates BEGIN{_ESTIMATE_ROLLUP.format(row="old", sign="-")}{_ESTIMATE_ROLLUP.format(row="new", sign="")}
+END;
+"""
+# Recomputes every counter from the tables (rebuild_rollups and new databases)
+_ROLLUP_REBUILD = [
+    "DELETE FROM rollups",
+    "DELETE FROM message_days",
+    "INSERT INTO rollups SELECT 'jobs_by_status', COALESCE(Status, ''), COUNT(*) FROM repairs GROUP BY 2",
+    "INSERT INTO message_days SELECT COALESCE(substr(PostedAt, 1, 10), ''), COALESCE(JobID, ''), COUNT(*) FROM messages GROUP BY 1, 2",
+    "INSERT INTO rollups SELECT 'messages', 'all', COUNT(*) FROM messages",
+    "INSERT INTO rollups SELECT 'messages_by_day', Day, SUM(Messages) FROM message_days GROUP BY Day",
+    "INSERT INTO rollups SELECT 'job_days', Day, COUNT(*) FROM message_days GROUP BY Day",
+    """INSERT INTO rollups SELECT 'estimates', key, value FROM (
+        SELECT 'count' AS key, COUNT(*) AS value FROM estimates UNION ALL SELECT 'total_cost', TOTAL(TotalCost) FROM estimates
+        UNION ALL SELECT 'labor_hours', TOTAL(LaborHours) FROM estimates UNION ALL SELECT 'paint_hours', TOTAL(PaintHours) FROM estimates
+    )""",
+]
+
+# Columns added after the first release, created on existing databases by init_db
+ADDED_COLUMNS = {"users": {"PasswordHash": "TEXT"}, "estimates": {"EstimateKey": "TEXT"}}
+# Indexes on ADDED_COLUMNS, created once the columns exist
+ADDED_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_estimates_key ON estimates (EstimateKey);
+"""
+
+_initialized = set()
+# current_version()'s connections, one per database file shared by every thread (Streamlit
+# runs each rerun on a new thread, so per-thread connections would be opened per rerun)
+_version_conns = {}
+_version_lock = threading.Lock()
+
+# =========================================================
+# Connections
+# =========================================================
+def connect(db_file=None, check_same_thread=True):
+    """Opens a connection to the storage database (rows come back as sqlite3.Row)."""
+    conn = sqlite3.connect(db_file or DB_FILE, timeout=30, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous = NORMAL")
+    # Rows deleted by INSERT OR REPLACE (a repeated JobID in an imported workbook) must
+    # fire the DELETE triggers that keep the search indexes and rollups in step
+    conn.execute("PRAGMA recursive_triggers = ON")
+    return conn
+
+@contextmanager
+def transaction(db_file=None):
+    """Yields a connection and commits on success / rolls back on error."""
+    with closing(connect(db_file)) as conn:
+        with conn:
+            yield conn
+
+def init_db(db_file=None):
+    """Creates the tables and indexes if they do not exist yet and switches to WAL mode."""
+    with closing(connect(db_file)) as conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+    with transaction(db_file) as conn:
+        new_rollups = not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'rollups'").fetchone()
+        conn.executescript(SCHEMA)
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for column, decl in columns.items():
+                if column not in existing: conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        conn.executescript(ADDED_INDEXES)
+        for table in VERSIONED_TABLES:
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.executescript(_VERSION_TRIGGER.format(table=table, event=event))
+        for name, (table, columns) in SEARCH_TABLES.items():
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+            conn.executescript(_SEARCH_TABLE.format(
+                name=name, table=table, columns=", ".join(columns),
+                new=", ".join(f"new.{c}" for c in columns), old=", ".join(f"old.{c}" for c in columns),
+            ))
+            if not exists: conn.execute(f"INSERT INTO {name} ({name}) VALUES ('rebuild')")  # index the rows already there
+        conn.executescript(_ROLLUP_TRIGGERS)
+        if new_rollups: rebuild_rollups(conn)  # count the rows already there
+        if _get_meta(conn, "excel_dates_converted") is None:
+            # Databases imported before serial dates were converted on import
+            if _convert_excel_dates(conn): rebuild_rollups(conn)
+            _set_meta(conn, "excel_dates_converted", 1)
+        if not _has_statistics(conn): conn.execute("ANALYZE")
+
+def _convert_excel_dates(conn):
+    """Rewrites Excel serial day numbers in DATE_COLUMNS as TIMESTAMP_FORMAT text (see _excel_date); returns the rows changed."""
+    changed = 0
+    for table, column in DATE_COLUMNS.items():
+        changed += conn.execute(
+            f"UPDATE {table} SET {column} = strftime('%Y-%m-%d %H:%M:%S', julianday('1899-12-30') + round({column} * 86400) / 86400.0) "
+            f"WHERE {column} GLOB '*[0-9]*' AND {column} NOT GLOB '*[^0-9.]*' AND CAST({column} AS REAL) > 0 AND CAST({column} AS REAL) < ?",
+            (EXCEL_MAX_SERIAL,),
+        ).rowcount
+    return changed
+
+def _has_statistics(conn):
+    """
+    Whether the planner has statistics for a non-empty repairs table. Without them it
+    sorts every job matching a status filter instead of walking the sort column's index.
+    """
+    if not conn.execute("SELECT 1 FROM repairs LIMIT 1").fetchone(): return True  # nothing to measure yet
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone(): return False
+    return conn.execute("SELECT 1 FROM sqlite_stat1 WHERE tbl = 'repairs'").fetchone() is not None
+
+def analyze(db_file=None):
+    """Refreshes the query planner's statistics and merges the word indexes; run after bulk loads."""
+    with transaction(db_file) as conn:
+        conn.execute("ANALYZE")
+        for name in SEARCH_TABLES: conn.execute(f"INSERT INTO {name} ({name}) VALUES ('optimize')")
+
+def is_empty(db_file=None):
+    with closing(connect(db_file)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+
+def ensure_db(users_file, repairs_file, db_file=None):
+    """Creates the database on first use and seeds it from the existing xlsx files."""
+    key = os.path.abspath(db_file or DB_FILE)
+    if key in _initialized and os.path.exists(key): return
+    init_db(db_file)
+    if is_empty(db_file) and os.path.exists(users_file):
+        import_xlsx(users_file, repairs_file, db_file)
+    _initialized.add(key)
+
+def init_workspace(users_file, repairs_file, upload_dir, db_file=None):
+    """
+    First-run setup of the app's working directory: demo Users.xlsx (and Repairs.xlsx)
+    when missing, the upload directory, then ensure_db(). A no-op after the first call.
+    """
+    if not os.path.exists(users_file):
+        import pandas as pd
+        from openpyxl import Workbook
+        try:
+            df = pd.read_excel(repairs_file)
+            rows = df.to_dict(orient="records")
+        except FileNotFoundError:
+            # Create dummy Repairs.xlsx if it doesn't exist
+            wb = Workbook()
+            ws = wb.active
+            ws.title = "Repairs"
+            ws.append(["JobID", "CustomerName", "CustomerEmail", "Vehicle", "Status"])
+            ws.append([1, "User One", "user1@example.com", "Audi Q5", "In Progress"])
+            ws.append([2, "User Two", "user2@example.com", "BMW X5", "Waiting for Parts"])
+            ws.append([3, "User Three", "user3@example.com", "Ford F150", "Completed"])
+            wb.save(repairs_file)
+            rows = pd.read_excel(repairs_file).to_dict(orient="records")
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Users"
+        ws.append(["UserID", "Username", "Password", "CustomerName", "CustomerEmail", "Role"])
+
+        default_passwords = ["pass1", "pass2", "pass3"]
+
+        for i, row in enumerate(rows[:3]):
+            uid = i + 1
+            username = f"user{i+1}"
+            ws.append([
+                uid, username, default_passwords[i], row["CustomerName"], row["CustomerEmail"], "user"
+            ])
+
+        ws.append([4, "admin", "adminpass", "Admin", "admin@autos.com", "admin"])
+        wb.save(users_file)
+
+    if not os.path.exists(upload_dir):
+        os.makedirs(upload_dir)
+
+    # Seed the SQLite store from the xlsx files on first run
+    ensure_db(users_file, repairs_file, db_file)
+
+# =========================================================
+# xlsx import / export
+# =========================================================
+def _cell(value, timestamp=False):
+    """Normalizes a worksheet cell for storage (datetimes become sortable text)."""
+    if isinstance(value, datetime): return value.strftime(TIMESTAMP_FORMAT)
+    return _excel_date(value) if timestamp else value
+
+def _excel_date(value):
+    """
+    A timestamp cell as TIMESTAMP_FORMAT text: cells not formatted as dates hold Excel's
+    serial day number (45978 is 2025-11-17) instead. Other values are kept as they are.
+    """
+    if isinstance(value, bool): return value
+    try: days = float(value)
+    except (TypeError, ValueError): return value
+    if not 0 < days < EXCEL_MAX_SERIAL: return value
+    return (EXCEL_EPOCH + timedelta(seconds=round(days * 86400))).strftime(TIMESTAMP_FORMAT)
+
+def _sheet_records(wb, sheet_name):
+    if sheet_name not in wb.sheetnames: return []
+    rows = wb[sheet_name].iter_rows(values_only=True)
+    header = next(rows, None)
+    if not header: return []
+    records = []
+    for row in rows:
+        if all(v is None for v in row): continue
+        records.append({h: _cell(v, h in DATE_COLUMNS.values()) for h, v in zip(header, row) if h is not None})
+    return records
+
+def _insert(conn, table, columns, records):
+    sql = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    conn.executemany(sql, ([r.get(c) for c in columns] for r in records))
+
+def import_xlsx(users_file, repairs_file, db_file=None):
+    """
+    One-shot importer: replaces the database contents with the rows of Users.xlsx and
+    the Repairs / Messages sheets of AutoShield_Repairs.xlsx. Returns the row counts.
+    """
+    from openpyxl import load_workbook
+
+    users = _sheet_records(load_workbook(users_file, read_only=True), "Users") if os.path.exists(users_file) else []
+    repairs, messages = [], []
+    if os.path.exists(repairs_file):
+        wb = load_workbook(repairs_file, read_only=True)
+        repairs = _sheet_records(wb, "Repairs")
+        messages = _sheet_records(wb, "Messages")
+
+    init_db(db_file)
+    with transaction(db_file) as conn:
+        conn.execute("DELETE FROM users")
+        conn.execute("DELETE FROM repairs")
+        conn.execute("DELETE FROM messages")
+        _insert(conn, "users", USER_COLUMNS, users)
+        _insert(conn, "repairs", REPAIR_COLUMNS, repairs)
+        _insert(conn, "messages", MESSAGE_COLUMNS, messages)
+        # Imported messages are already in the workbook; only later posts need compacting
+        _set_meta(conn, "compacted_seq", conn.execute("SELECT COALESCE(MAX(Seq), 0) FROM messages").fetchone()[0])
+        _set_meta(conn, "compacted_at", time.time())
+    analyze(db_file)
+    return {"users": len(users), "repairs": len(repairs), "messages": len(messages)}
+
+def _write_sheet(wb, title, columns, rows):
+    ws = wb.create_sheet(title)
+    ws.append(columns)
+    for row in rows: ws.append(list(row))
+
+def export_xlsx(repairs_file, users_file=None, db_file=None):
+    """Writes the Repairs / Messages sheets (and optionally Users) back out as xlsx."""
+    from openpyxl import Workbook
+
+    with closing(connect(db_file)) as conn:
+        wb = Workbook(write_only=True)
+        _write_sheet(wb, "Repairs", REPAIR_COLUMNS, conn.execute(f"SELECT {', '.join(REPAIR_COLUMNS)} FROM repairs ORDER BY rowid"))
+        _write_sheet(wb, "Messages", MESSAGE_COLUMNS, conn.execute(f"SELECT {', '.join(MESSAGE_COLUMNS)} FROM messages ORDER BY Seq"))
+        wb.save(repairs_file)
+        if users_file:
+            wb = Workbook(write_only=True)
+            _write_sheet(wb, "Users", USER_COLUMNS, conn.execute(f"SELECT {', '.join(USER_COLUMNS)} FROM users ORDER BY rowid"))
+            wb.save(users_file)
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return default if row is None else row[0]
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+def table_version(conn, table):
+    """Change counter of a VERSIONED_TABLES table (bumped by triggers on every write)."""
+    return _get_meta(conn, f"{table}_version", 0)
+
+def current_version(table, db_file=None):
+    """
+    table_version() read on a connection kept open for the process, so in-process caches
+    can check whether they are stale on every request for a few microseconds.
+    """
+    key = db_file or DB_FILE
+    with _version_lock:
+        conn = _version_conns.get(key)
+        if conn is None: conn = _version_conns[key] = connect(db_file, check_same_thread=False)
+        return table_version(conn, table)
+
+# =========================================================
+# Users
+# =========================================================
+def load_users_df(db_file=None):
+    import pandas as pd
+    with closing(connect(db_file)) as conn:
+        return pd.read_sql_query(f"SELECT {', '.join(USER_COLUMNS)} FROM users ORDER BY rowid", conn)
+
+def find_user(username, db_file=None):
+    """Returns the user record for `username` as a dict, or None (indexed lookup)."""
+    with closing(connect(db_file)) as conn:
+        row = conn.execute(f"SELECT {', '.join(USER_COLUMNS)} FROM users WHERE Username = ?", (username,)).fetchone()
+    return dict(row) if row else None
+
+# =========================================================
+# Repair jobs
+# =========================================================
+def load_repairs_df(cust_email=None, db_file=None):
+    """All repair jobs, or only the jobs of `cust_email` (case-insensitive, indexed)."""
+    import pandas as pd
+    sql = f"SELECT {', '.join(REPAIR_COLUMNS)} FROM repairs"
+    params = ()
+    if cust_email is not None:
+        sql += " WHERE CustomerEmail = ?"
+        params = (cust_email,)
+    with closing(connect(db_file)) as conn:
+        return pd.read_sql_query(sql + " ORDER BY rowid", conn, params=params)
+
+def get_job(job_id, db_file=None):
+    """Returns the repair job `job_id` as a dict, or None (indexed lookup)."""
+    with closing(connect(db_file)) as conn:
+        row = conn.execute(f"SELECT {', '.join(REPAIR_COLUMNS)} FROM repairs WHERE JobID = ?", (str(job_id),)).fetchone()
+    return dict(row) if row else None
+
+JOB_SORT_COLUMNS = ["JobID", "CustomerName", "Vehicle", "Status", "LastUpdate"]  # each has an index
+# JobIDs are TEXT: sort them by their leading number (2 before 10), then as text (IDs like JOB-... cast to 0)
+_JOB_SORT_KEYS = {"JobID": ["CAST(r.JobID AS INTEGER)", "r.JobID"]}
+JOB_PAGE_SIZE = 50
+
+def _match_query(columns, text, prefix=True):
+    """
+    FTS5 query for every word of `text` in any of `columns`. For type-ahead input the
+    last word matches as a prefix (a prefix query on a word that occurs in most rows is
+    expensive, and only the word being typed is incomplete). None if `text` has no words.
+    """
+    words = re.findall(r"\w+", text or "")
+    if not words: return None
+    return "{" + " ".join(columns) + "} : (" + " ".join(f'"{w}"' for w in words) + ("*)" if prefix else ")")
+
+def _job_filter(status=None, customer=None, vehicle=None, updated_from=None, updated_to=None):
+    """(FROM ... WHERE ... clause, params) for query_jobs' filters."""
+    where, params = [], []
+    matches = [m for m in (_match_query(["CustomerName", "CustomerEmail"], customer), _match_query(["Vehicle"], vehicle)) if m]
+    if matches:
+        where.append("r.rowid IN (SELECT rowid FROM repairs_search WHERE repairs_search MATCH ?)")
+        params.append(" AND ".join(f"({m})" for m in matches))
+    if status:
+        where.append(f"r.Status IN ({', '.join('?' * len(status))})")
+        params += list(status)
+    if updated_from:
+        where.append("r.LastUpdate >= ?")
+        params.append(str(updated_from))
+    if updated_to:
+        where.append("r.LastUpdate < ?")  # exclusive: pass the day after the last day wanted
+        params.append(str(updated_to))
+    return "FROM repairs r" + (" WHERE " + " AND ".join(where) if where else ""), params
+
+def query_jobs(status=None, customer=None, vehicle=None, updated_from=None, updated_to=None,
+               sort="JobID", descending=False, page=0, page_size=JOB_PAGE_SIZE, db_file=None):
+    """
+    One page of repair jobs for the admin job browser, as (DataFrame, total matching
+    jobs). `status` is a list of statuses; `customer` and `vehicle` match word
+    prefixes in the customer name/email and the vehicle; `updated_from` /
+    `updated_to` bound LastUpdate (ISO dates or timestamps, the upper bound
+    exclusive). Numeric JobIDs sort as numbers. Only the requested page is read.
+    """
+    import pandas as pd
+    if sort not in JOB_SORT_COLUMNS: raise ValueError(f"cannot sort jobs by {sort!r}")
+    source, params = _job_filter(status, customer, vehicle, updated_from, updated_to)
+    order = "DESC" if descending else "ASC"
+    keys = ", ".join(f"{key} {order}" for key in _JOB_SORT_KEYS.get(sort, [f"r.{sort}"]) + ["r.rowid"])
+    with closing(connect(db_file)) as conn:
+        total = conn.execute(f"SELECT COUNT(*) {source}", params).fetchone()[0]
+        rows = pd.read_sql_query(
+            f"SELECT {', '.join(f'r.{c}' for c in REPAIR_COLUMNS)} {source} ORDER BY {keys} LIMIT ? OFFSET ?",
+            conn, params=params + [page_size, page * page_size],
+        )
+    return rows, total
+
+def job_statuses(db_file=None):
+    """Distinct job statuses, read with a loose index scan (one index seek per status)."""
+    with closing(connect(db_file)) as conn:
+        return [row[0] for row in conn.execute("""
+            WITH RECURSIVE s(Status) AS (
+                SELECT MIN(Status) FROM repairs
+                UNION ALL SELECT (SELECT MIN(Status) FROM repairs WHERE Status > s.Status) FROM s WHERE s.Status IS NOT NULL
+            ) SELECT Status FROM s WHERE Status IS NOT NULL
+        """)]
+
+def search_jobs(text, limit=20, db_file=None):
+    """
+    Type-ahead job lookup: up to `limit` JobIDs whose ID starts with `text`, followed
+    by jobs whose customer or vehicle words start with the words of `text`.
+    """
+    text = (text or "").strip()
+    with closing(connect(db_file)) as conn:
+        found = [row[0] for row in conn.execute(
+            "SELECT JobID FROM repairs WHERE JobID >= ? AND JobID < ? ORDER BY JobID LIMIT ?", (text, text + "\U0010ffff", limit),
+        )]
+        match = _match_query(SEARCH_TABLES["repairs_search"][1], text)
+        if match and len(found) < limit:
+            # Oldest jobs first: unranked, so the word index stops after `limit` hits
+            found += [row[0] for row in conn.execute(
+                "SELECT JobID FROM repairs WHERE rowid IN (SELECT rowid FROM repairs_search WHERE repairs_search MATCH ? LIMIT ?) ORDER BY rowid",
+                (match, limit),
+            ) if row[0] not in found]
+    return found[:limit]
+
+# =========================================================
+# Messages
+# =========================================================
+def add_message(job_id, posted_by, subject, body, db_file=None):
+    """
+    Appends one message to the journal and returns its MessageID. The ID is the
+    message's journal sequence number, allocated atomically inside the insert.
+    """
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    with transaction(db_file) as conn:
+        seq = conn.execute(
+            "INSERT INTO messages (JobID, PostedBy, PostedAt, Subject, Body) VALUES (?, ?, ?, ?, ?) RETURNING Seq",
+            (str(job_id), posted_by, timestamp, subject, body),
+        ).fetchone()[0]
+        conn.execute("UPDATE messages SET MessageID = ? WHERE Seq = ?", (str(seq), seq))
+    return str(seq)
+
+def load_messages_df(job_ids=None, db_file=None):
+    """Messages for the given JobIDs (all messages when None), newest first."""
+    import pandas as pd
+    sql = f"SELECT {', '.join(MESSAGE_COLUMNS)} FROM messages"
+    params = ()
+    if job_ids is not None:
+        job_ids = [str(j) for j in job_ids]
+        if not job_ids: return pd.DataFrame(columns=MESSAGE_COLUMNS)
+        sql += f" WHERE JobID IN ({', '.join('?' * len(job_ids))})"
+        params = tuple(job_ids)
+    with closing(connect(db_file)) as conn:
+        return pd.read_sql_query(sql + " ORDER BY PostedAt DESC, Seq DESC", conn, params=params)
+
+def _page_query(conn, job_id, cursor, limit):
+    """Newest `limit` messages older than `cursor`, for one job (or all jobs), via index."""
+    where, params = [], []
+    if job_id is not None:
+        where.append("JobID = ?")
+        params.append(job_id)
+    if cursor is not None:
+        where.append("(PostedAt, Seq) < (?, ?)")
+        params.extend(cursor)
+    sql = f"SELECT Seq, {', '.join(MESSAGE_COLUMNS)} FROM messages"
+    if where: sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY PostedAt DESC, Seq DESC LIMIT ?"
+    return conn.execute(sql, params + [limit]).fetchall()
+
+def load_messages_page(job_ids=None, cursor=None, limit=MESSAGE_PAGE_SIZE, db_file=None):
+    """
+    One page of message history, newest first, for the given JobIDs (all jobs when None).
+
+    Each job is read from the (JobID, PostedAt, Seq) index with LIMIT and the per-job
+    pages are merged, so the cost depends on the page size and the number of jobs, not
+    on the total number of messages. Returns (DataFrame, next_cursor); pass next_cursor
+    back in to load the following page. next_cursor is None on the last page.
+    """
+    import heapq
+    import pandas as pd
+
+    with closing(connect(db_file)) as conn:
+        if job_ids is None:
+            rows = _page_query(conn, None, cursor, limit + 1)
+        else:
+            per_job = [_page_query(conn, str(j), cursor, limit + 1) for j in dict.fromkeys(job_ids)]
+            rows = list(heapq.merge(*per_job, key=lambda r: (r["PostedAt"] or "", r["Seq"]), reverse=True))[:limit + 1]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1]["PostedAt"], rows[-1]["Seq"])
+    page = pd.DataFrame([[r[c] for c in MESSAGE_COLUMNS] for r in rows], columns=MESSAGE_COLUMNS)
+    return page, next_cursor
+
+def _varints(blob):
+    """Decodes a run of SQLite varints (FTS5's averages and per-row size records)."""
+    values, i = [], 0
+    while i < len(blob):
+        value = 0
+        for n in range(9):
+            byte = blob[i]
+            i += 1
+            if n == 8:
+                value = (value << 8) | byte
+                break
+            value = (value << 7) | (byte & 0x7F)
+            if byte < 0x80: break
+        values.append(value)
+    return values
+
+def _fts_tokens(text):
+    """Words of `text` as FTS5's default unicode61 tokenizer indexes them (case and diacritics folded)."""
+    folded = "".join(c for c in unicodedata.normalize("NFKD", text or "") if not unicodedata.combining(c))
+    return re.findall(r"[^\W_]+", folded.lower())
+
+def _bm25_scores(conn, rows, words, weights=(2.0, 1.0), k1=1.2, b=0.75):
+    """
+    Scores of matching messages (Seq, Subject, Body) against `words`, computed the way
+    FTS5's bm25() computes them: each word's inverse document frequency comes from the
+    word index's vocabulary, and message lengths and the average length from the
+    index's own size records, so a message scores the same in a scoped search as in an
+    unscoped one. Negated like bm25(), so that lower is better.
+    """
+    import math
+    words = [t for w in words for t in _fts_tokens(w)]
+    if not rows or not words: return [0.0] * len(rows)
+    averages = conn.execute("SELECT block FROM messages_search_data WHERE id = 1").fetchone()
+    row_count, *column_tokens = _varints(averages[0]) if averages else [0]
+    average_length = sum(column_tokens) / row_count if row_count else 0.0
+    documents = dict(conn.execute(
+        f"SELECT term, doc FROM messages_search_vocab WHERE term IN ({', '.join('?' * len(words))})", words,
+    ).fetchall())
+    idf = {}
+    for word in words:
+        hits = documents.get(word, 0)
+        idf[word] = max(math.log((row_count - hits + 0.5) / (hits + 0.5)), 0.0) or 1e-6
+    sizes = dict(conn.execute(
+        f"SELECT id, sz FROM messages_search_docsize WHERE id IN ({', '.join('?' * len(rows))})", [r["Seq"] for r in rows],
+    ).fetchall())
+    scores = []
+    for r in rows:
+        columns = [_fts_tokens(r["Subject"]), _fts_tokens(r["Body"])]
+        length = sum(_varints(sizes[r["Seq"]])) if r["Seq"] in sizes else sum(map(len, columns))
+        score = 0.0
+        for word in words:
+            tf = sum(weight * column.count(word) for weight, column in zip(weights, columns))
+            score += idf[word] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / (average_length or 1)))
+        scores.append(-score)
+    return scores
+
+def search_messages(text, job_ids=None, limit=MESSAGE_SEARCH_LIMIT, db_file=None):
+    """
+    Messages whose subject or body contains every word of `text`, best match first, as
+    a DataFrame with the BM25 Rank (lower is better; subject words weigh double) and a
+    Snippet with the words in bold. `job_ids` scopes the search like
+    load_messages_page: None searches every job (admins), otherwise only those jobs (a
+    customer's own).
+
+    Only a bounded set of matches is ranked. An unscoped search ranks the newest
+    MESSAGE_SEARCH_WINDOW matches with FTS5's bm25(); the word index yields them newest
+    first and stops there, so older messages only show up for rarer words. A scoped
+    search reads the jobs' messages from the (JobID, PostedAt, Seq) index, checks each
+    against the word index by rowid and ranks the matches with _bm25_scores, which
+    gives the same scores as bm25(): bm25() itself would recount the documents of
+    every word on each rowid lookup.
+    """
+    import pandas as pd
+    columns = ["Rank", "Snippet"] + MESSAGE_COLUMNS
+    words = re.findall(r"\w+", text or "")
+    if not words or (job_ids is not None and not job_ids): return pd.DataFrame(columns=columns)
+    match = _match_query(SEARCH_TABLES["messages_search"][1], text, prefix=False)
+    with closing(connect(db_file)) as conn:
+        if job_ids is None:
+            rank = {r[0]: r[1] for r in conn.execute(
+                "SELECT id, score FROM (SELECT rowid AS id, bm25(messages_search, 2.0, 1.0) AS score FROM messages_search "
+                "WHERE messages_search MATCH ? ORDER BY rowid DESC LIMIT ?) ORDER BY score, id DESC LIMIT ?",
+                (match, MESSAGE_SEARCH_WINDOW, limit),
+            )}
+        else:
+            job_ids = [str(j) for j in dict.fromkeys(job_ids)]
+            # CROSS JOIN keeps the jobs' messages in the outer loop: one rowid lookup each in the word index
+            matches = conn.execute(
+                f"SELECT m.Seq, m.Subject, m.Body FROM messages m CROSS JOIN messages_search s "
+                f"WHERE m.JobID IN ({', '.join('?' * len(job_ids))}) AND s.rowid = m.Seq AND messages_search MATCH ?",
+                job_ids + [match],
+            ).fetchall()
+            rank = {seq: score for score, seq in sorted(zip(_bm25_scores(conn, matches, words), (r["Seq"] for r in matches)),
+                                                         key=lambda pair: (pair[0], -pair[1]))[:limit]}
+        if not rank: return pd.DataFrame(columns=columns)
+        # Snippets for the returned page only
+        rows = conn.execute(
+            f"SELECT s.rowid, snippet(messages_search, -1, '**', '**', '…', 16), {', '.join(f'm.{c}' for c in MESSAGE_COLUMNS)} "
+            f"FROM messages_search s JOIN messages m ON m.Seq = s.rowid WHERE messages_search MATCH ? AND s.rowid IN ({', '.join('?' * len(rank))})",
+            [match] + list(rank),
+        ).fetchall()
+    rows = sorted(rows, key=lambda r: (rank[r[0]], -r[0]))  # ties: newest first
+    return pd.DataFrame([(rank[r[0]],) + tuple(r)[1:] for r in rows], columns=columns)
+
+# =========================================================
+# Estimates and rollups
+# =========================================================
+def estimate_key(job_id, estimate):
+    """Content hash identifying one estimate for one job (the same estimate is recorded once)."""
+    import json
+    canonical = json.dumps({"job": None if job_id is None else str(job_id), "estimate": estimate}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def add_estimate(owner, estimate, totals, job_id=None, db_file=None):
+    """
+    Records a generated estimate (shaped like SAMPLE_DATA) for `job_id` with its
+    compute_totals() result and returns its EstimateID. The rollup triggers add it to
+    the estimate counters. Recording the same estimate for the same job again is a
+    no-op that returns the existing EstimateID.
+    """
+    import json
+    key = estimate_key(job_id, estimate)
+    with transaction(db_file) as conn:
+        row = conn.execute(
+            "INSERT INTO estimates (JobID, Owner, CreatedAt, Estimate, TotalCost, LaborHours, PaintHours, EstimateKey) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (EstimateKey) DO NOTHING RETURNING EstimateID",
+            (None if job_id is None else str(job_id), owner, datetime.now().strftime(TIMESTAMP_FORMAT), json.dumps(estimate),
+             totals["total_cost_of_repairs"], totals["body_labor_hours"], totals["paint_hours"], key),
+        ).fetchone()
+        return row[0] if row else conn.execute("SELECT EstimateID FROM estimates WHERE EstimateKey = ?", (key,)).fetchone()[0]
+
+def rebuild_rollups(conn):
+    """Recomputes every rollup from the tables, inside the caller's transaction on `conn`."""
+    for statement in _ROLLUP_REBUILD: conn.execute(statement)
+
+# =========================================================
+# Journal compaction into the reporting workbook
+# =========================================================
+@contextmanager
+def _file_lock(path):
+    """Non-blocking exclusive lock on `path`; yields False if another process holds it."""
+    with open(path, "a+") as fh:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+def compact_messages(repairs_file, db_file=None):
+    """
+    Appends journal entries posted since the last compaction to the Messages sheet of
+    `repairs_file`. The workbook is written to a temp file and swapped in atomically.
+    Returns the number of messages folded in, or None if another compaction is running.
+    """
+    from openpyxl import Workbook, load_workbook
+
+    with _file_lock(repairs_file + ".lock") as acquired:
+        if not acquired: return None
+        with closing(connect(db_file)) as conn:
+            watermark = _get_meta(conn, "compacted_seq", 0)
+            rows = conn.execute(
+                f"SELECT Seq, {', '.join(MESSAGE_COLUMNS)} FROM messages WHERE Seq > ? ORDER BY Seq", (watermark,)
+            ).fetchall()
+        if rows:
+            if os.path.exists(repairs_file):
+                wb = load_workbook(repairs_file)
+            else:
+                wb = Workbook()
+                wb.active.title = "Repairs"
+                wb.active.append(REPAIR_COLUMNS)
+            if "Messages" in wb.sheetnames:
+                ws = wb["Messages"]
+            else:
+                ws = wb.create_sheet("Messages")
+                ws.append(MESSAGE_COLUMNS)
+            for row in rows: ws.append([row[c] for c in MESSAGE_COLUMNS])
+            tmp_file = repairs_file + ".tmp"
+            wb.save(tmp_file)
+            os.replace(tmp_file, repairs_file)
+            watermark = rows[-1]["Seq"]
+        with transaction(db_file) as conn:
+            _set_meta(conn, "compacted_seq", watermark)
+            _set_meta(conn, "compacted_at", time.time())
+    return len(rows)
+
+_compaction_thread = None
+
+def schedule_compaction(repairs_file, interval=None, db_file=None):
+    """
+    Starts a background compaction if the last one is older than `interval` seconds.
+    Cheap enough to call after every post; never blocks the caller on the workbook.
+    """
+    global _compaction_thread
+    interval = COMPACT_INTERVAL if interval is None else interval
+    if _compaction_thread is not None and _compaction_thread.is_alive(): return
+    with closing(connect(db_file)) as conn:
+        if time.time() - (_get_meta(conn, "compacted_at", 0) or 0) < interval: return
+    _compaction_thread = threading.Thread(target=compact_messages, args=(repairs_file, db_file), daemon=True)
+    _compaction_thread.start()
+
+# =========================================================
+# CLI
+# =========================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m autoshield.storage", description="AutoShield storage maintenance")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite database file (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="replace the database contents with the xlsx files")
+    imp.add_argument("--users", default="Users.xlsx")
+    imp.add_argument("--repairs", default="AutoShield_Repairs.xlsx")
+    exp = sub.add_parser("export", help="write the database out as xlsx for back-office use")
+    exp.add_argument("--repairs", default="AutoShield_Repairs_Export.xlsx")
+    exp.add_argument("--users", default=None)
+    cmp = sub.add_parser("compact", help="fold newly posted messages into the reporting workbook")
+    cmp.add_argument("--repairs", default="AutoShield_Repairs.xlsx")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        counts = import_xlsx(args.users, args.repairs, args.db)
+        print(f"Imported {counts['users']} users, {counts['repairs']} repair jobs, {counts['messages']} messages into {args.db}")
+    elif args.command == "compact":
+        count = compact_messages(args.repairs, args.db)
+        print("Another compaction is already running" if count is None else f"Compacted {count} message(s) into {args.repairs}")
+    else:
+        export_xlsx(args.repairs, args.users, args.db)
+        print(f"Exported {args.db} to {args.repairs}" + (f" and {args.users}" if args.users else ""))
+
+if __name__ == "__main__":
+    main()
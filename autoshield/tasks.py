@@ -0,0 +1,108 @@
+"""
+Background worker pool for long-running dashboard work (damage assessment, claim reports).
+
+The dashboard submits work and returns immediately; a later rerun polls the task and
+picks up its result. Task status, progress and results are kept in the storage
+database, so they survive a browser refresh (a new Streamlit session) and can be read
+from any server process.
+"""
+import os
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from autoshield import storage
+
+MAX_WORKERS = int(os.environ.get("AUTOSHIELD_WORKERS", 4))
+STALE_AFTER = 600  # seconds without a progress update before a queued/running task counts as lost
+TASK_TTL = float(os.environ.get("AUTOSHIELD_TASK_TTL", 24 * 3600))  # seconds a task is kept after its last update
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+TASK_COLUMNS = ["TaskID", "Kind", "Owner", "Status", "Progress", "Detail", "Result", "Error", "CreatedAt", "UpdatedAt"]
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="autoshield-task")
+
+def _update(task_id, **fields):
+    fields["UpdatedAt"] = time.time()
+    with storage.transaction() as conn:
+        conn.execute(
+            f"UPDATE tasks SET {', '.join(f'{k} = ?' for k in fields)} WHERE TaskID = ?",
+            list(fields.values()) + [task_id],
+        )
+
+def _run(task_id, fn, args):
+    def report(progress, detail=None):
+        """Progress callback handed to the task function (progress in 0..1)."""
+        _update(task_id, Progress=float(progress), Detail=detail)
+
+    _update(task_id, Status=RUNNING)
+    try:
+        result = fn(report, *args)
+    except Exception as e:
+        _update(task_id, Status=FAILED, Error=f"{e}\n{traceback.format_exc()}")
+    else:
+        _update(task_id, Status=DONE, Progress=1.0, Result=result)
+
+def submit(kind, owner, fn, *args):
+    """
+    Queues fn(report, *args) on the worker pool and returns the new task ID.
+    `report(progress, detail=None)` lets the function publish progress while it runs;
+    its return value (str or bytes) becomes the task result. Finished tasks it replaces
+    are pruned (see prune).
+    """
+    task_id = uuid.uuid4().hex
+    now = time.time()
+    with storage.transaction() as conn:
+        prune(conn, owner, kind, now)
+        conn.execute(
+            "INSERT INTO tasks (TaskID, Kind, Owner, Status, Progress, CreatedAt, UpdatedAt) VALUES (?, ?, ?, ?, 0.0, ?, ?)",
+            (task_id, kind, owner, QUEUED, now, now),
+        )
+    _executor.submit(_run, task_id, fn, args)
+    return task_id
+
+def prune(conn, owner=None, kind=None, now=None):
+    """
+    Deletes, inside the caller's transaction, the finished tasks of `kind` for `owner`
+    (only the latest task per owner and kind is ever read back) and every task not
+    updated for TASK_TTL seconds, so stored results do not pile up. Returns the number
+    of tasks deleted.
+    """
+    deleted = conn.execute("DELETE FROM tasks WHERE UpdatedAt < ?", ((now or time.time()) - TASK_TTL,)).rowcount
+    if owner is not None:
+        deleted += conn.execute(
+            "DELETE FROM tasks WHERE Owner = ? AND Kind = ? AND Status IN (?, ?)", (owner, kind, DONE, FAILED),
+        ).rowcount
+    return deleted
+
+def _as_task(row):
+    if row is None: return None
+    task = dict(row)
+    if task["Status"] in (QUEUED, RUNNING) and time.time() - task["UpdatedAt"] > STALE_AFTER:
+        task["Status"] = FAILED
+        task["Error"] = "The worker running this task stopped responding."
+    return task
+
+def get(task_id):
+    """Returns the task record as a dict (see TASK_COLUMNS), or None."""
+    if not task_id: return None
+    with closing(storage.connect()) as conn:
+        return _as_task(conn.execute(f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE TaskID = ?", (task_id,)).fetchone())
+
+def latest(owner, kind):
+    """The most recently submitted task of `kind` for `owner`, or None."""
+    with closing(storage.connect()) as conn:
+        return _as_task(conn.execute(
+            f"SELECT {', '.join(TASK_COLUMNS)} FROM tasks WHERE Owner = ? AND Kind = ? ORDER BY CreatedAt DESC LIMIT 1",
+            (owner, kind),
+        ).fetchone())
+
+def is_pending(task):
+    return task is not None and task["Status"] in (QUEUED, RUNNING)
+
+def forget(owner, kind):
+    """Drops the stored tasks of `kind` for `owner` (e.g. after new images invalidate them)."""
+    with storage.transaction() as conn:
+        conn.execute("DELETE FROM tasks WHERE Owner = ? AND Kind = ?", (owner, kind))
@@ -0,0 +1,49 @@
+"""
+Bounded-size derivatives (thumbnails and previews) of uploaded photos.
+
+Derivatives are JPEGs generated with Pillow once per image (at upload time, or
+lazily the first time they are viewed) and kept in a disk cache shared by all
+sessions. They are keyed by the image's SHA-256 from the content-addressed upload
+store, so they never go stale. The cache evicts least-recently-used files once it
+exceeds its size cap; an evicted derivative is simply regenerated on next view.
+"""
+import os
+import threading
+
+from autoshield import disk_lru
+
+CACHE_DIR = os.environ.get("AUTOSHIELD_THUMB_CACHE", "thumb_cache")
+DISK_LIMIT_BYTES = 256 * 1024 * 1024
+SIZES = {"thumb": 320, "preview": 1280}  # longest edge in pixels
+JPEG_QUALITY = 85
+
+def _path(sha256, size_name):
+    return os.path.join(CACHE_DIR, f"{sha256}_{size_name}.jpg")
+
+def _render(source_path, target_path, max_edge):
+    from PIL import Image, ImageOps
+    with Image.open(source_path) as img:
+        img.draft("RGB", (max_edge, max_edge))  # lets JPEG decode at reduced scale
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_edge, max_edge))
+        if img.mode != "RGB": img = img.convert("RGB")
+        tmp_path = f"{target_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        img.save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    os.replace(tmp_path, target_path)
+
+def derivative(source_path, sha256, size_name="thumb"):
+    """Path of the `size_name` derivative of an image, generating it on a cache miss."""
+    path = _path(sha256, size_name)
+    try:
+        disk_lru.touch(path)
+        return path
+    except FileNotFoundError:
+        pass
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _render(source_path, path, SIZES[size_name])
+    evict()
+    return path
+
+def evict(limit=DISK_LIMIT_BYTES):
+    """Deletes least-recently-used derivatives until the cache fits in `limit` bytes."""
+    disk_lru.evict(CACHE_DIR, limit, suffix=".jpg")
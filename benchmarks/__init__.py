@@ -0,0 +1,7 @@
+"""
+Benchmark suite (airspeed velocity layout; see the README for running it).
+
+Benchmarks are classes in the bench_*.py modules: time_* methods are timed, peakmem_*
+methods record the peak resident memory of the process, and `params` lists the
+dataset sizes each one runs at. Synthetic data comes from benchmarks.generators.
+"""
@@ -0,0 +1,74 @@
+"""
+Parts catalog benchmarks against catalogs of 10k to 1M parts: type-ahead lookups
+(prefix, words, misspelled) and pricing an assessment into line items.
+"""
+import json
+import os
+
+from autoshield import assessment, catalog
+
+from benchmarks import generators
+
+VEHICLE = {"make": "AUDI", "model": "Q5 Premium Quattro TFSI", "year": 2025}
+
+class _Catalog:
+    params = generators.CATALOG_SIZES
+    param_names = ["parts"]
+    timeout = 300
+
+    def setup_cache(self):
+        """Writes and loads one catalog per size (once per run, shared by every class below)."""
+        catalogs = {}
+        for parts in generators.CATALOG_SIZES:
+            csv_path = generators.write_catalog(os.path.abspath(f"bench_catalog_{parts}.csv"), parts)
+            catalogs[parts] = os.path.abspath(f"bench_catalog_{parts}.db")
+            catalog.load(csv_path, catalogs[parts])
+            os.remove(csv_path)
+        return catalogs
+    setup_cache.timeout = 3600
+
+    def setup(self, catalogs, parts):
+        self.db = catalogs[parts]
+        catalog.lookup("hood", db_file=self.db)  # loads the word list
+
+class CatalogLookup(_Catalog):
+    def time_prefix_for_vehicle(self, catalogs, parts):
+        catalog.lookup("front bum", "Audi", "Q5", 2025, db_file=self.db)
+
+    def time_prefix_all_vehicles(self, catalogs, parts):
+        catalog.lookup("right front fen", db_file=self.db)
+
+    def time_words_any_order(self, catalogs, parts):
+        catalog.lookup("cover bumper fr", "Audi", "Q5", 2025, db_file=self.db)
+
+    def time_misspelled(self, catalogs, parts):
+        catalog.lookup("rt headlmap", "Audi", "Q5", db_file=self.db)
+
+    def peakmem_misspelled(self, catalogs, parts):
+        catalog.lookup("rt headlmap", "Audi", "Q5", db_file=self.db)
+
+class CatalogPricing(_Catalog):
+    def setup(self, catalogs, parts):
+        super().setup(catalogs, parts)
+        self.assessment = json.loads(assessment.MOCK_JSON_OUTPUT)
+        self.unknown = {"parts_to_repair": [{"part_name": "Flux Capacitor Housing", "action": "Replace", "estimated_labor_hours": 1.0}]}
+
+    def time_assessment_line_items(self, catalogs, parts):
+        """What the dashboard does per rerun once an assessment is shown."""
+        catalog.line_items(self.assessment, VEHICLE, self.db)
+
+    def time_unmatched_part(self, catalogs, parts):
+        """Worst case: every relaxation of the name is searched before giving up."""
+        catalog.line_items(self.unknown, VEHICLE, self.db)
+
+class CatalogLoad:
+    """Rebuilding the index from a 100k-part CSV."""
+    number = 1
+    timeout = 600
+
+    def setup(self):
+        self.csv_path = generators.write_catalog(os.path.abspath("bench_catalog_load.csv"), 100000)
+        self.db = os.path.abspath("bench_catalog_load.db")
+
+    def time_load(self):
+        catalog.load(self.csv_path, self.db)
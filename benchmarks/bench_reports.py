@@ -0,0 +1,46 @@
+"""Claim report benchmarks: totals and PDF rendering for estimates of growing size."""
+from autoshield.reports import build_pdf, compute_totals, generate_pdf
+
+from benchmarks import generators
+
+class ComputeTotals:
+    params = generators.LINE_ITEM_COUNTS
+    param_names = ["line_items"]
+
+    def setup(self, n_items):
+        self.data = generators.estimate(n_items)
+
+    def time_compute_totals(self, n_items):
+        compute_totals(self.data)
+
+class GeneratePdf:
+    params = generators.LINE_ITEM_COUNTS
+    param_names = ["line_items"]
+    timeout = 300
+
+    def setup(self, n_items):
+        self.data = generators.estimate(n_items)
+        self.totals = compute_totals(self.data)
+
+    def time_generate_pdf(self, n_items):
+        generate_pdf(self.data, self.totals)
+
+    def peakmem_generate_pdf(self, n_items):
+        generate_pdf(self.data, self.totals)
+
+class GenerateLargePdf:
+    """Large estimates rendered straight to a file, as one table ("whole") and in page-sized chunks."""
+    params = [generators.LARGE_LINE_ITEM_COUNTS, ["whole", "chunked"]]
+    param_names = ["line_items", "layout"]
+    number = 1
+    timeout = 600
+
+    def setup(self, n_items, layout):
+        self.data = generators.estimate(n_items)
+        self.totals = compute_totals(self.data)
+
+    def time_build_pdf(self, n_items, layout):
+        build_pdf(self.data, self.totals, "large.pdf", chunked=layout == "chunked")
+
+    def peakmem_build_pdf(self, n_items, layout):
+        build_pdf(self.data, self.totals, "large.pdf", chunked=layout == "chunked")
@@ -0,0 +1,163 @@
+"""
+Dashboard data-path benchmarks against storage databases of 1k to 1M rows per table:
+login, the customer's repair jobs, the admin job browser, the message-history page
+load, message search and the analytics rollups.
+"""
+import itertools
+import os
+
+from autoshield import auth, repairs_cache, reports, rollups, storage
+
+from benchmarks import generators
+
+class _Database:
+    params = generators.SIZES
+    param_names = ["rows"]
+    timeout = 300
+
+    def setup_cache(self):
+        """Builds one database per size (once per run, shared by every class below)."""
+        return {rows: generators.build_database(os.path.abspath(f"bench_{rows}.db"), rows) for rows in generators.SIZES}
+    setup_cache.timeout = 3600
+
+    def setup(self, databases, rows):
+        self.db = databases[rows]
+        self.customer = rows // 3  # an arbitrary customer in the middle of the table
+
+class CheckLogin(_Database):
+    def setup(self, databases, rows):
+        super().setup(databases, rows)
+        auth.get_user(generators.username(self.customer), self.db)  # builds the user index
+
+    def time_check_login(self, databases, rows):
+        """What ui.check_login does per attempt: index lookup plus one password hash."""
+        auth.authenticate(generators.username(self.customer), generators.PASSWORD, self.db)
+
+    def time_user_lookup(self, databases, rows):
+        auth.get_user(generators.username(self.customer), self.db)
+
+    def time_user_index_rebuild(self, databases, rows):
+        """First login after the users table changed."""
+        auth._indexes.pop(self.db, None)
+        auth.get_user(generators.username(self.customer), self.db)
+
+    def peakmem_user_index(self, databases, rows):
+        auth.get_user(generators.username(self.customer), self.db)
+
+class RepairsFilter(_Database):
+    def setup(self, databases, rows):
+        super().setup(databases, rows)
+        repairs_cache.jobs(None, self.db)
+
+    def time_jobs_for_customer(self, databases, rows):
+        """The dashboard's per-rerun jobs lookup (snapshot already loaded)."""
+        repairs_cache.jobs(generators.email(self.customer), self.db)
+
+    def time_jobs_reload(self, databases, rows):
+        """First rerun after the repairs table changed."""
+        repairs_cache.invalidate()
+        repairs_cache.jobs(generators.email(self.customer), self.db)
+
+    def time_jobs_for_customer_sql(self, databases, rows):
+        """Uncached indexed query, for comparison with the cache."""
+        storage.load_repairs_df(generators.email(self.customer), self.db)
+
+    def peakmem_jobs_snapshot(self, databases, rows):
+        repairs_cache.jobs(generators.email(self.customer), self.db)
+
+class MessageHistory(_Database):
+    def setup(self, databases, rows):
+        super().setup(databases, rows)
+        self.job_ids = repairs_cache.jobs(generators.email(self.customer), self.db)["JobID"].tolist()
+
+    def time_customer_first_page(self, databases, rows):
+        storage.load_messages_page(self.job_ids, db_file=self.db)
+
+    def time_admin_first_page(self, databases, rows):
+        storage.load_messages_page(None, db_file=self.db)
+
+    def time_admin_five_pages(self, databases, rows):
+        cursor = None
+        for _ in range(5):
+            _, cursor = storage.load_messages_page(None, cursor, db_file=self.db)
+
+    def peakmem_admin_first_page(self, databases, rows):
+        storage.load_messages_page(None, db_file=self.db)
+
+class AdminJobBrowser(_Database):
+    def time_first_page(self, databases, rows):
+        storage.query_jobs(db_file=self.db)
+
+    def time_middle_page(self, databases, rows):
+        storage.query_jobs(page=rows // storage.JOB_PAGE_SIZE // 2, db_file=self.db)
+
+    def time_status_sorted_by_update(self, databases, rows):
+        storage.query_jobs(status=["Completed"], sort="LastUpdate", descending=True, db_file=self.db)
+
+    def time_customer_filter(self, databases, rows):
+        storage.query_jobs(customer=f"Customer {self.customer}", db_file=self.db)
+
+    def time_vehicle_and_week(self, databases, rows):
+        """A broad word (a fifth of all jobs) narrowed by a date range."""
+        storage.query_jobs(vehicle="audi", updated_from="2025-03-01", updated_to="2025-03-08", db_file=self.db)
+
+    def time_job_search(self, databases, rows):
+        """Type-ahead in the admin's job picker."""
+        storage.search_jobs(f"customer {self.customer}", db_file=self.db)
+
+    def peakmem_first_page(self, databases, rows):
+        storage.query_jobs(db_file=self.db)
+
+class MessageSearch(_Database):
+    def setup(self, databases, rows):
+        super().setup(databases, rows)
+        self.job_ids = repairs_cache.jobs(generators.email(self.customer), self.db)["JobID"].tolist()
+
+    def time_admin_common_word(self, databases, rows):
+        """A word in nearly half of all messages."""
+        storage.search_messages("supplement", db_file=self.db)
+
+    def time_admin_two_words(self, databases, rows):
+        storage.search_messages("supplement radiator", db_file=self.db)
+
+    def time_admin_vin(self, databases, rows):
+        storage.search_messages(generators.vin(self.customer), db_file=self.db)
+
+    def time_customer_search(self, databases, rows):
+        storage.search_messages("supplement", self.job_ids, db_file=self.db)
+
+    def time_post_message(self, databases, rows):
+        """One post, including the word index update."""
+        storage.add_message(self.job_ids[0], "Synthetic", "Supplement approved", "Insurer approved the supplement for the hood panel.", self.db)
+
+    def peakmem_admin_common_word(self, databases, rows):
+        storage.search_messages("supplement", db_file=self.db)
+
+class Rollups(_Database):
+    def setup(self, databases, rows):
+        super().setup(databases, rows)
+        self.estimate = generators.estimate(generators.ESTIMATE_ITEMS)
+        self.totals = reports.compute_totals(self.estimate)
+        self.claims = itertools.count()
+
+    def time_analytics_snapshot(self, databases, rows):
+        """The admin analytics panel's read."""
+        rollups.snapshot(db_file=self.db)
+
+    def time_status_change(self, databases, rows):
+        """One job write, including its rollup triggers."""
+        with storage.transaction(self.db) as conn:
+            conn.execute("UPDATE repairs SET Status = CASE Status WHEN 'Completed' THEN 'In Progress' ELSE 'Completed' END WHERE JobID = ?",
+                         (generators.job_id(self.customer),))
+
+    def time_record_estimate(self, databases, rows):
+        # A new claim number each call; re-recording the same estimate is a no-op
+        self.estimate["claim_number"] = f"BENCH-{next(self.claims)}"
+        storage.add_estimate("Synthetic", self.estimate, self.totals, generators.job_id(self.customer), self.db)
+
+class RollupRebuild(_Database):
+    """Full recovery rebuild: every estimate repriced, every counter recomputed."""
+    timeout = 1200
+
+    def time_rebuild(self, databases, rows):
+        rollups.rebuild(self.db)
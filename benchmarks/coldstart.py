@@ -0,0 +1,151 @@
+"""
+Cold-start measurements: import time of the app's modules and the time from
+`streamlit run` to the first rendered page.
+
+    python -m benchmarks.coldstart                    # this tree
+    python -m benchmarks.coldstart --app ../old/app.py --json before.json
+
+Import times are medians over fresh interpreters (`python -c "import app"` in the
+app's directory), next to `import streamlit` alone so the app's own share is
+visible; `-X importtime` names the heaviest packages each import pulls in.
+
+The first-render measurement starts `streamlit run app.py` in a fresh workspace (a
+synthetic database from benchmarks.generators), waits for the health endpoint, then
+connects a browser session over the websocket and times the first script run, which
+is where app.py's imports are paid: Streamlit executes the script only once a session
+connects. It then logs in and times the login rerun, which renders the first
+dashboard.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks import generators
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+MODULES = ["streamlit", "app", "autoshield.reports"]
+
+# =========================================================
+# Import time
+# =========================================================
+def import_seconds(module, cwd, repeat=5):
+    """Median wall time of `import module` in a fresh interpreter started in `cwd`."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    samples = [float(subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=True).stdout)
+               for _ in range(repeat)]
+    return statistics.median(samples)
+
+def heaviest_imports(module, cwd, n=6):
+    """(package, cumulative seconds) for the top-level packages that cost `import module` the most."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd, capture_output=True, text=True).stderr
+    costs = {}
+    for match in re.finditer(r"^import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)$", stderr, re.M):
+        package = match.group(3).split(".")[0]
+        if package != module.split(".")[0]: costs[package] = max(costs.get(package, 0), int(match.group(1)) / 1e6)
+    return sorted(costs.items(), key=lambda kv: -kv[1])[:n]
+
+# =========================================================
+# First render over a live server
+# =========================================================
+class _Session:
+    """Minimal browser stand-in: reruns the script over the websocket and remembers widget ids by label."""
+
+    def __init__(self, port):
+        from websockets.sync.client import connect
+        self.ws = connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+        self.widgets, self.states, self.page_hash = {}, {}, ""
+
+    def rerun(self, trigger=None):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self.page_hash
+        for state in self.states.values(): msg.rerun_script.widget_states.widgets.append(state)
+        if trigger: msg.rerun_script.widget_states.widgets.append(WidgetState(id=self.widgets[trigger], trigger_value=True))
+        started = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(self.ws.recv())
+            kind = fm.WhichOneof("type")
+            if kind == "new_session": self.page_hash = fm.new_session.main_script_hash
+            elif kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                element = fm.delta.new_element
+                widget = getattr(element, element.WhichOneof("type"))
+                if getattr(widget, "id", "") and getattr(widget, "label", ""): self.widgets[widget.label] = widget.id
+            elif kind == "script_finished" and fm.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - started
+
+    def set_text(self, label, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        self.states[label] = WidgetState(id=self.widgets[label], string_value=value)
+
+def first_render(app_file, port, users=1000, timeout=60):
+    """Seconds from `streamlit run` to: health endpoint up, first page rendered, first dashboard rendered."""
+    workspace = tempfile.mkdtemp(prefix="autoshield-coldstart-")
+    cwd = os.getcwd()
+    os.chdir(workspace)
+    try:
+        generators.write_workbooks(".", min(users, 1000))
+        generators.build_database("autoshield.db", users)
+    finally:
+        os.chdir(cwd)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.abspath(app_file), "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=workspace, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if time.perf_counter() - started > timeout: raise TimeoutError("server did not come up")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1): break
+            except OSError: time.sleep(0.05)
+        ready = time.perf_counter() - started
+        session = _Session(port)
+        login_page = session.rerun()
+        session.set_text("Username", generators.username(1))
+        session.set_text("Password", generators.PASSWORD)
+        dashboard = session.rerun(trigger="Login")  # check_login, then st.rerun() renders the dashboard in the same run
+        return {"server_ready": ready, "login_page": login_page, "first_render": ready + login_page, "login_to_dashboard": dashboard}
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.coldstart", description="Measure import time and cold start to first render")
+    parser.add_argument("--app", default=APP_FILE, help="app.py of the tree to measure (default: this tree)")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters / servers per measurement (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+    app_dir = os.path.dirname(os.path.abspath(args.app))
+
+    results = {"imports": {}, "heaviest": {}, "render": {}}
+    print(f"{'import':24s} {'median ms':>10}  heaviest packages")
+    for module in MODULES:
+        results["imports"][module] = import_seconds(module, app_dir, args.repeat)
+        results["heaviest"][module] = heaviest_imports(module, app_dir)
+        print(f"{module:24s} {results['imports'][module] * 1e3:10.0f}  " + ", ".join(f"{p} {s * 1e3:.0f}" for p, s in results["heaviest"][module]))
+
+    runs = [first_render(args.app, args.port) for _ in range(args.repeat)]
+    print(f"\n{'cold start (ms, median)':24s} {'value':>10}")
+    for key in runs[0]:
+        results["render"][key] = statistics.median(r[key] for r in runs)
+        print(f"{key:24s} {results['render'][key] * 1e3:10.0f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh: json.dump(results, fh, indent=1)
+
+if __name__ == "__main__":
+    main()
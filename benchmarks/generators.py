@@ -0,0 +1,230 @@
+"""
+Synthetic, reproducible datasets for the benchmarks.
+
+users / repairs / messages records follow the layout of Users.xlsx and
+AutoShield_Repairs.xlsx (every customer owns JOBS_PER_CUSTOMER jobs and every job
+carries a share of the messages), and estimates are shaped like SAMPLE_DATA with any
+number of line items. Parts catalogs cover a few makes and models with many name
+variants each. The same seed always yields the same data.
+
+    python -m benchmarks.generators --rows 100000 --out bench_data/
+
+writes Users.xlsx and AutoShield_Repairs.xlsx with that many rows per sheet, in the
+legacy format the app imports (plus parts_catalog.csv with --catalog ROWS).
+"""
+import argparse
+import copy
+import os
+import random
+from datetime import datetime, timedelta
+
+from autoshield import storage
+from autoshield.reports import SAMPLE_DATA
+
+# AUTOSHIELD_BENCH_SIZES / AUTOSHIELD_BENCH_LINE_ITEMS / AUTOSHIELD_BENCH_LARGE_LINE_ITEMS / AUTOSHIELD_BENCH_CATALOG_SIZES
+# (comma-separated) narrow a run
+SIZES = [int(n) for n in os.environ.get("AUTOSHIELD_BENCH_SIZES", "1000,10000,100000,1000000").split(",")]
+LINE_ITEM_COUNTS = [int(n) for n in os.environ.get("AUTOSHIELD_BENCH_LINE_ITEMS", "10,100,1000,5000").split(",")]
+LARGE_LINE_ITEM_COUNTS = [int(n) for n in os.environ.get("AUTOSHIELD_BENCH_LARGE_LINE_ITEMS", "1000,2500,5000,10000").split(",")]
+CATALOG_SIZES = [int(n) for n in os.environ.get("AUTOSHIELD_BENCH_CATALOG_SIZES", "10000,100000,1000000").split(",")]
+JOBS_PER_CUSTOMER = 2
+ESTIMATES_EVERY = 10  # jobs per recorded estimate in build_database
+ESTIMATE_ITEMS = 10  # line items per recorded estimate
+PASSWORD = "bench-pass"
+
+_STATUSES = ["Estimate Pending", "In Progress", "Waiting for Parts", "Completed"]
+_SHOPS = ["Downtown Collision", "Bayview Auto Body", "Northside Repair", "Valley Paint & Body"]
+_VEHICLES = ["2021 Audi Q5", "2019 BMW X5", "2022 Ford F150", "2020 Toyota Camry", "2023 Honda CR-V"]
+_PARTS = ["front bumper cover", "headlamp assembly", "hood panel", "fender liner", "radiator support",
+          "tail lamp", "door shell", "quarter panel", "windshield", "side mirror"]
+_NOTES = ["Status update from the shop.", "Parts ordered: {part}.", "The {part} was replaced and refinished.",
+          "Supplement requested for hidden damage behind the {part}.", "Customer approved the estimate.",
+          "Waiting on insurer approval for the {part}."]
+# Parts catalog: every name below fits every model, with per-model part numbers and prices
+_CATALOG_MODELS = {"Audi": ["Q5", "A4", "A6", "Q7"], "BMW": ["X5", "X3", "330i"], "Ford": ["F150", "Explorer", "Escape"],
+                   "Toyota": ["Camry", "Corolla", "RAV4"], "Honda": ["CR-V", "Civic", "Accord"]}
+_CATALOG_SIDES = ["", "Left", "Right", "Front", "Rear", "Left Front", "Right Front", "Left Rear", "Right Rear"]
+_CATALOG_PARTS = [("Bumper Cover", 420.0, 2.4, 3.0), ("Fender", 310.0, 2.1, 2.6), ("Headlamp", 780.0, 0.6, 0.0),
+                  ("Tail Lamp", 260.0, 0.4, 0.0), ("Door Shell", 890.0, 3.5, 3.2), ("Quarter Panel", 640.0, 9.5, 3.4),
+                  ("Hood Panel", 720.0, 1.2, 3.1), ("Mirror", 330.0, 0.8, 0.6), ("Wheel Opening Molding", 90.0, 0.3, 0.0),
+                  ("Fender Liner", 75.0, 0.5, 0.0), ("Radiator Support", 450.0, 6.0, 1.5), ("Bumper Reinforcement", 280.0, 1.8, 0.0)]
+_CATALOG_VARIANTS = ["", "Assembly", "Primed", "w/ Sensor Holes", "Chrome", "Textured", "Upper", "Lower", "Inner", "Outer"]
+_OPERATIONS = [("Repl", 120.0, 0.8, 0.0), ("Rpr", 0.0, 2.5, 1.8), ("R&I", 0.0, 0.6, 0.0), ("Scan", 0.0, 0.5, 0.0)]
+
+def username(i):
+    return f"user{i + 1}"
+
+def email(i):
+    return f"Customer{i + 1}@Example.com"
+
+def job_id(i):
+    return f"JOB-{i + 1:08d}"
+
+def vin(i):
+    """A 17-character VIN-like code for job i (unique per job)."""
+    return f"1HGCM{i:012d}"
+
+def user_records(n, password_hash=None):
+    """
+    n user rows. Legacy rows carry the plaintext PASSWORD; with `password_hash` the
+    rows are already migrated (hashing a million passwords would dominate any setup).
+    """
+    for i in range(n):
+        yield {
+            "UserID": i + 1, "Username": username(i), "CustomerName": f"Customer {i + 1}", "CustomerEmail": email(i),
+            "Role": "admin" if i == 0 else "user",
+            "Password": None if password_hash else PASSWORD, "PasswordHash": password_hash,
+        }
+
+def repair_records(n, seed=0):
+    rng = random.Random(seed)
+    customers = max(1, n // JOBS_PER_CUSTOMER)
+    for i in range(n):
+        owner = i % customers
+        yield {
+            "JobID": job_id(i), "CustomerName": f"Customer {owner + 1}", "CustomerEmail": email(owner),
+            "Vehicle": rng.choice(_VEHICLES), "RepairShop": rng.choice(_SHOPS), "Status": rng.choice(_STATUSES),
+            "LastUpdate": (datetime(2025, 1, 1) + timedelta(minutes=rng.randrange(365 * 24 * 60))).strftime(storage.TIMESTAMP_FORMAT),
+            "LatestMessage": "", "Notes": "",
+        }
+
+def message_records(n, jobs, seed=0):
+    """
+    n messages spread over `jobs` jobs, in posting order. Bodies are a few shop notes
+    naming parts; one message in ten quotes its job's VIN.
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for i in range(n):
+        job = rng.randrange(jobs)
+        body = " ".join(rng.choice(_NOTES).format(part=rng.choice(_PARTS)) for _ in range(rng.randint(1, 6)))
+        if rng.random() < 0.1: body += f" VIN {vin(job)}."
+        yield {
+            "MessageID": str(i + 1), "JobID": job_id(job), "PostedBy": "Synthetic",
+            "PostedAt": (start + timedelta(seconds=30 * i)).strftime(storage.TIMESTAMP_FORMAT),
+            "Subject": f"Update {i + 1}", "Body": body,
+        }
+
+def estimate_records(n, jobs, seed=0):
+    """n recorded estimates of ESTIMATE_ITEMS line items each, for jobs spread over `jobs`."""
+    import json
+    from autoshield.reports import compute_totals
+    rng = random.Random(seed)
+    for i in range(n):
+        data = estimate(ESTIMATE_ITEMS, seed + i)
+        totals = compute_totals(data)
+        yield {
+            "EstimateID": i + 1, "JobID": job_id(rng.randrange(jobs)), "Owner": "Synthetic",
+            "CreatedAt": (datetime(2025, 1, 1) + timedelta(minutes=i)).strftime(storage.TIMESTAMP_FORMAT),
+            "Estimate": json.dumps(data), "TotalCost": totals["total_cost_of_repairs"],
+            "LaborHours": totals["body_labor_hours"], "PaintHours": totals["paint_hours"],
+        }
+
+def build_database(db_file, rows, seed=0):
+    """
+    Creates a storage database holding `rows` users, repair jobs and messages, and one
+    recorded estimate per ESTIMATES_EVERY jobs.
+    """
+    from autoshield import auth
+    if os.path.exists(db_file): os.remove(db_file)
+    storage.init_db(db_file)
+    password_hash = auth.hash_password(PASSWORD)
+    with storage.transaction(db_file) as conn:
+        for table, columns, records in [
+            ("users", storage.USER_COLUMNS, user_records(rows, password_hash)),
+            ("repairs", storage.REPAIR_COLUMNS, repair_records(rows, seed)),
+            ("messages", storage.MESSAGE_COLUMNS, message_records(rows, rows, seed)),
+            ("estimates", storage.ESTIMATE_COLUMNS, estimate_records(max(1, rows // ESTIMATES_EVERY), rows, seed)),
+        ]:
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                ([r.get(c) for c in columns] for r in records),
+            )
+    storage.analyze(db_file)
+    return db_file
+
+def write_workbooks(out_dir, rows, seed=0):
+    """Writes Users.xlsx and AutoShield_Repairs.xlsx (Repairs + Messages) in the legacy format."""
+    from openpyxl import Workbook
+
+    os.makedirs(out_dir, exist_ok=True)
+    legacy_user_columns = [c for c in storage.USER_COLUMNS if c != "PasswordHash"]
+    sheets = [
+        ("Users.xlsx", [("Users", legacy_user_columns, user_records(rows))]),
+        ("AutoShield_Repairs.xlsx", [
+            ("Repairs", storage.REPAIR_COLUMNS, repair_records(rows, seed)),
+            ("Messages", storage.MESSAGE_COLUMNS, message_records(rows, rows, seed)),
+        ]),
+    ]
+    paths = []
+    for file_name, contents in sheets:
+        wb = Workbook(write_only=True)
+        for title, columns, records in contents:
+            ws = wb.create_sheet(title)
+            ws.append(columns)
+            for record in records: ws.append([record.get(c) for c in columns])
+        path = os.path.join(out_dir, file_name)
+        wb.save(path)
+        paths.append(path)
+    return paths
+
+def estimate(n_items, seed=0):
+    """SAMPLE_DATA with `n_items` synthetic line items."""
+    rng = random.Random(seed)
+    data = copy.deepcopy(SAMPLE_DATA)
+    items = []
+    for i in range(n_items):
+        oper, part_cost, labor, paint = rng.choice(_OPERATIONS)
+        items.append({
+            "line": i + 1, "oper": oper, "desc": f"{oper} synthetic panel {i + 1} (code {rng.randrange(100, 999)})",
+            "part_number": f"8MA{rng.randrange(10**8):08d}", "qty": rng.randint(1, 3),
+            "part_cost": round(part_cost * rng.uniform(0.5, 2.0), 2),
+            "labor_hours": round(labor * rng.uniform(0.5, 2.0), 1), "paint_hours": round(paint * rng.uniform(0.5, 2.0), 1),
+        })
+    data["line_items"] = items
+    return data
+
+def catalog_records(n, seed=0):
+    """
+    n parts catalog rows (autoshield.catalog's CSV columns), cycling through every part
+    name for one model before moving to the next model and year range.
+    """
+    rng = random.Random(seed)
+    vehicles = [(make, model) for make, models in _CATALOG_MODELS.items() for model in models]
+    names = [(" ".join(w for w in (side, part, variant) if w), cost, labor, paint)
+             for part, cost, labor, paint in _CATALOG_PARTS for side in _CATALOG_SIDES for variant in _CATALOG_VARIANTS]
+    for i in range(n):
+        name, cost, labor, paint = names[i % len(names)]
+        generation = i // len(names)
+        make, model = vehicles[generation % len(vehicles)]
+        year_from = 2025 - 4 * (generation // len(vehicles) % 10)
+        yield {
+            "part_number": f"{make[:2].upper()}{i:010d}", "part_name": name, "make": make, "model": model,
+            "year_from": year_from, "year_to": year_from + 3, "part_cost": round(cost * rng.uniform(0.7, 1.6), 2),
+            "labor_hours": round(labor * rng.uniform(0.8, 1.2), 1), "paint_hours": round(paint * rng.uniform(0.8, 1.2), 1),
+        }
+
+def write_catalog(path, n, seed=0):
+    """Writes an n-row parts catalog CSV for autoshield.catalog.load."""
+    import csv
+    from autoshield import catalog
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=catalog.CATALOG_COLUMNS)
+        writer.writeheader()
+        writer.writerows(catalog_records(n, seed))
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generators", description="Write synthetic AutoShield workbooks")
+    parser.add_argument("--rows", type=int, default=SIZES[0], help="rows per sheet (default: %(default)s)")
+    parser.add_argument("--out", default="bench_data", help="output directory (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--catalog", type=int, metavar="ROWS", help="also write a parts catalog CSV with this many rows")
+    args = parser.parse_args(argv)
+    for path in write_workbooks(args.out, args.rows, args.seed): print(f"Wrote {path}")
+    if args.catalog: print(f"Wrote {write_catalog(os.path.join(args.out, 'parts_catalog.csv'), args.catalog, args.seed)}")
+
+if __name__ == "__main__":
+    main()
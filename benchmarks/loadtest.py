@@ -0,0 +1,317 @@
+"""
+Concurrent-session load harness for the Streamlit app (local, no network).
+
+Every simulated adjuster is a streamlit.testing AppTest session running app.py's
+main() in its own thread, against a throw-away workspace (database, workbooks,
+uploads) built by benchmarks.generators. Each session repeatedly walks
+
+    login -> dashboard -> post message -> upload -> assessment -> claim report
+
+and the harness records the latency of every script rerun by step, the flow
+throughput, the errors per step (exceptions, st.error output, timeouts), how long
+sessions waited on the shared locks (the per-user upload manifest lock, the
+workbook compaction lock on AutoShield_Repairs.xlsx and SQLite write transactions)
+and how many bytes each session holds in its session state at the end of a flow.
+
+    python -m benchmarks.loadtest --sessions 20 --iterations 2 --assessment-delay 0.5 --report-delay 1
+
+AppTest keeps only the elements of the latest rerun, so after the fragment reruns
+triggered by posting a message the harness does a full rerun (counted as
+"dashboard") to get the uploader back. Polling for the background tasks is done with
+full reruns every --poll seconds, where a browser would rerun only the progress
+fragment.
+"""
+import argparse
+import io
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from benchmarks import generators
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+STEPS = ["login", "dashboard", "post_message", "upload", "assessment", "report"]
+
+class Stats:
+    """Thread-safe collection of rerun latencies, errors and lock waits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reruns = {step: [] for step in STEPS}
+        self.errors = {step: [] for step in STEPS}
+        self.flows = 0
+        self.locks = {}  # lock name -> list of wait (or hold) seconds
+        self.refused = {}  # lock name -> attempts that found it held
+        self.states = []  # per finished flow: session-state key -> bytes
+
+    def rerun(self, step, seconds):
+        with self._lock: self.reruns[step].append(seconds)
+
+    def error(self, step, message):
+        with self._lock: self.errors[step].append(message)
+
+    def flow_done(self):
+        with self._lock: self.flows += 1
+
+    def state(self, sizes):
+        with self._lock: self.states.append(sizes)
+
+    def lock(self, name, seconds, refused=False):
+        with self._lock:
+            self.locks.setdefault(name, []).append(seconds)
+            if refused: self.refused[name] = self.refused.get(name, 0) + 1
+
+# =========================================================
+# Lock instrumentation
+# =========================================================
+def _instrument_locks(stats):
+    """Wraps the storage/image lock helpers so every acquisition is timed."""
+    from autoshield import images, storage
+
+    manifest_locked = images._locked
+    file_lock = storage._file_lock
+    transaction = storage.transaction
+
+    @contextmanager
+    def timed_manifest_lock(user_folder):
+        started = time.perf_counter()
+        with manifest_locked(user_folder):
+            stats.lock("upload manifest (wait)", time.perf_counter() - started)
+            yield
+
+    @contextmanager
+    def timed_file_lock(path):
+        started = time.perf_counter()
+        with file_lock(path) as acquired:
+            stats.lock(f"{os.path.basename(path)} (wait)", time.perf_counter() - started, refused=not acquired)
+            yield acquired
+
+    @contextmanager
+    def timed_transaction(db_file=None):
+        started = time.perf_counter()
+        with transaction(db_file) as conn:
+            yield conn
+        stats.lock("sqlite write transaction (wait + hold)", time.perf_counter() - started)
+
+    images._locked = timed_manifest_lock
+    storage._file_lock = timed_file_lock
+    storage.transaction = timed_transaction
+
+def _share_apptest_runtime():
+    """
+    AppTest installs a mock Runtime singleton for the duration of each run and clears
+    it afterwards, so with sessions running in parallel one session's run would find
+    no runtime. Lookups fall back to the most recently installed mock instead.
+    """
+    from streamlit.runtime import Runtime
+    installed = []
+    lookup = Runtime.instance.__func__
+
+    def instance(cls):
+        if cls._instance is not None:
+            installed[:] = [cls._instance]
+            return cls._instance
+        return installed[0] if installed else lookup(cls)
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(installed))
+
+def _serialize_script_compiles():
+    """CPython 3.11's parser is not safe for concurrent ast.parse calls; compile one script at a time."""
+    from streamlit.runtime.scriptrunner import magic
+    add_magic, lock = magic.add_magic, threading.Lock()
+
+    def locked_add_magic(code, script_path):
+        with lock: return add_magic(code, script_path)
+
+    magic.add_magic = locked_add_magic
+
+# =========================================================
+# Sessions
+# =========================================================
+def _problems(at):
+    return [f"{type(e).__name__}: {getattr(e, 'value', e)}" for e in list(at.exception) + list(at.error)]
+
+def _run(at, stats, step):
+    started = time.perf_counter()
+    at.run()
+    stats.rerun(step, time.perf_counter() - started)
+    problems = _problems(at)
+    if problems: raise RuntimeError(problems[0])
+
+def _button(at, key=None, label=None):
+    return next(b for b in at.button if (key is not None and b.key == key) or (label is not None and b.label == label))
+
+def _state_bytes(at):
+    """Approximate bytes held by each session-state key at the end of a flow (pickled size)."""
+    sizes = {}
+    for key, value in at.session_state.items():
+        if isinstance(value, (bytes, str)): sizes[key] = len(value)
+        else:
+            try: sizes[key] = len(pickle.dumps(value))
+            except Exception: sizes[key] = sys.getsizeof(value)
+    return sizes
+
+def _poll(at, stats, step, done, timeout, poll):
+    deadline = time.monotonic() + timeout
+    while not done(at):
+        if time.monotonic() > deadline: raise TimeoutError(f"{step} not finished after {timeout:g}s")
+        time.sleep(poll)
+        _run(at, stats, step)
+
+def _photo(session, iteration):
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", (1600, 1200), ((37 * session) % 256, (91 * iteration) % 256, 160)).save(buf, "JPEG")
+    return buf.getvalue()
+
+def session_flow(session, iteration, stats, args):
+    """One login -> report walk; returns False if a step failed."""
+    from streamlit.testing.v1 import AppTest
+
+    user = generators.username(session + 1)  # user 0 is the admin
+    step = "login"
+    try:
+        at = AppTest.from_file(APP_FILE, default_timeout=args.timeout)
+        _run(at, stats, step)
+        at.text_input[0].input(user)
+        at.text_input[1].input(generators.PASSWORD)
+        _button(at, label="Login").click()
+        _run(at, stats, step)
+        if not at.session_state["logged_in"]: raise RuntimeError("login rejected")
+
+        step = "dashboard"
+        _run(at, stats, step)
+
+        step = "post_message"
+        if at.selectbox:
+            at.text_input(key="msg_subject").input(f"Load test {session}/{iteration}")
+            at.text_area(key="msg_body").input("Synthetic message from the load harness.")
+            _button(at, label="Submit Message").click()
+            _run(at, stats, step)
+            _run(at, stats, "dashboard")  # the post reran two fragments only; rebuild the element tree
+
+        step = "upload"
+        at.file_uploader(key="image_uploads").set_value((f"session{session}_{iteration}.jpg", _photo(session, iteration), "image/jpeg"))
+        _run(at, stats, step)
+
+        step = "assessment"
+        _button(at, key="gen_desc_btn").click()
+        _run(at, stats, step)
+        _poll(at, stats, step, lambda a: any(s.value == "🔍 AI Repair Assessment" for s in a.subheader), args.task_timeout, args.poll)
+
+        step = "report"
+        _button(at, key="gen_report_btn").click()
+        _run(at, stats, step)
+        _poll(at, stats, step, lambda a: any("is ready" in s.value for s in a.success), args.task_timeout, args.poll)
+        stats.state(_state_bytes(at))
+    except Exception as e:
+        stats.error(step, f"{type(e).__name__}: {e}".splitlines()[0])
+        return False
+    stats.flow_done()
+    return True
+
+def _worker(session, stats, args):
+    for iteration in range(args.iterations): session_flow(session, iteration, stats, args)
+
+# =========================================================
+# Report
+# =========================================================
+def _pct(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] if ordered else float("nan")
+
+def summarize(stats, wall, args):
+    reruns = {step: {
+        "count": len(v), "p50": _pct(v, 50), "p90": _pct(v, 90), "p95": _pct(v, 95), "p99": _pct(v, 99), "max": max(v, default=float("nan")),
+    } for step, v in stats.reruns.items()}
+    attempts = args.sessions * args.iterations
+    locks = {name: {
+        "acquisitions": len(v), "refused": stats.refused.get(name, 0), "total": sum(v), "p95": _pct(v, 95), "max": max(v),
+    } for name, v in stats.locks.items()}
+    return {
+        "sessions": args.sessions, "iterations": args.iterations, "wall_seconds": wall,
+        "flows_completed": stats.flows, "flows_attempted": attempts,
+        "flows_per_second": stats.flows / wall, "reruns_per_second": sum(len(v) for v in stats.reruns.values()) / wall,
+        "error_rate": 1 - stats.flows / attempts if attempts else 0.0,
+        "reruns": reruns, "errors": {step: errs for step, errs in stats.errors.items() if errs}, "locks": locks,
+        "session_state": {
+            "total": _pct([sum(s.values()) for s in stats.states], 50),
+            "keys": {key: _pct([s.get(key, 0) for s in stats.states], 50) for key in sorted({k for s in stats.states for k in s})},
+        },
+    }
+
+def print_summary(summary):
+    print(f"\n{summary['sessions']} sessions x {summary['iterations']} flows in {summary['wall_seconds']:.1f}s: "
+          f"{summary['flows_completed']}/{summary['flows_attempted']} completed, "
+          f"{summary['flows_per_second']:.2f} flows/s, {summary['reruns_per_second']:.1f} reruns/s, "
+          f"error rate {summary['error_rate']:.1%}")
+    print(f"\n{'rerun latency (ms)':20s} {'count':>6} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for step, r in summary["reruns"].items():
+        if not r["count"]: continue
+        print(f"{step:20s} {r['count']:6d} " + " ".join(f"{r[k] * 1e3:8.1f}" for k in ("p50", "p90", "p95", "p99", "max")))
+    if summary["locks"]:
+        print(f"\n{'lock':42s} {'acquired':>8} {'refused':>8} {'total s':>8} {'p95 ms':>8} {'max ms':>8}")
+        for name, l in sorted(summary["locks"].items(), key=lambda kv: -kv[1]["total"]):
+            print(f"{name:42s} {l['acquisitions']:8d} {l['refused']:8d} {l['total']:8.2f} {l['p95'] * 1e3:8.1f} {l['max'] * 1e3:8.1f}")
+    if summary["session_state"]["keys"]:
+        largest = sorted(summary["session_state"]["keys"].items(), key=lambda kv: -kv[1])[:6]
+        print(f"\nsession state after a flow (median): {summary['session_state']['total'] / 1e3:.1f} KB; largest keys: "
+              + ", ".join(f"{key} {size / 1e3:.1f} KB" for key, size in largest))
+    for step, errors in summary["errors"].items():
+        print(f"\n{len(errors)} error(s) in {step}, e.g. {errors[0]}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Simulate concurrent AutoShield sessions")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent sessions (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=1, help="flows per session (default: %(default)s)")
+    parser.add_argument("--users", type=int, default=1000, help="rows per table in the synthetic database (default: %(default)s)")
+    parser.add_argument("--assessment-delay", type=float, default=0.5, help="fake model call, seconds (default: %(default)s)")
+    parser.add_argument("--report-delay", type=float, default=1.0, help="fake report build, seconds (default: %(default)s)")
+    parser.add_argument("--compact-interval", type=float, default=2.0, help="workbook compaction interval, seconds (default: %(default)s)")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between task polls (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=60, help="per-rerun timeout, seconds (default: %(default)s)")
+    parser.add_argument("--task-timeout", type=float, default=120, help="per-task timeout, seconds (default: %(default)s)")
+    parser.add_argument("--json", help="also write the summary to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the workspace directory")
+    args = parser.parse_args(argv)
+    if args.sessions + 1 >= args.users: parser.error("--users must exceed --sessions")
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    workspace = tempfile.mkdtemp(prefix="autoshield-load-")
+    cwd = os.getcwd()
+    os.chdir(workspace)  # the app resolves its database, workbooks and uploads relative to the cwd
+    try:
+        generators.write_workbooks(".", min(args.users, 1000))
+        generators.build_database("autoshield.db", args.users)
+        from autoshield import assessment, reports, storage
+        storage.COMPACT_INTERVAL = args.compact_interval
+        assessment.ASSESSMENT_DELAY, reports.REPORT_DELAY = args.assessment_delay, args.report_delay
+        stats = Stats()
+        _instrument_locks(stats)
+        _share_apptest_runtime()
+        _serialize_script_compiles()
+
+        print(f"Workspace {workspace}; {args.sessions} sessions starting", flush=True)
+        started = time.perf_counter()
+        threads = [threading.Thread(target=_worker, args=(i, stats, args), daemon=True) for i in range(args.sessions)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        summary = summarize(stats, time.perf_counter() - started, args)
+    finally:
+        os.chdir(cwd)
+        if not args.keep: shutil.rmtree(workspace, ignore_errors=True)
+
+    print_summary(summary)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as fh: json.dump(summary, fh, indent=1)
+    sys.exit(1 if summary["error_rate"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Stand-alone runner for the benchmark suite, for machines without asv.
+
+    python -m benchmarks.run                      # run everything, save bench_results/<commit>.json
+    python -m benchmarks.run -b RepairsFilter     # only benchmarks whose name matches
+    python -m benchmarks.run compare OLD.json NEW.json
+
+Benchmarks are discovered and called the way asv does it (params, setup_cache, setup,
+time_* / peakmem_*). A time_* benchmark is repeated until it has run for about
+SAMPLE_TIME seconds and reports the median; a peakmem_* benchmark runs in a fresh
+process and reports that process's peak RSS. Results are keyed by benchmark name and
+parameter, so files from two commits can be compared directly.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import multiprocessing
+import os
+import pkgutil
+import platform
+import re
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmarks
+
+SAMPLE_TIME = 1.0
+MAX_REPEAT = 50
+RESULTS_DIR = "bench_results"
+
+def _discover(pattern):
+    """Yields (module_name, class_name) for every benchmark class matching `pattern`."""
+    for info in pkgutil.iter_modules(benchmarks.__path__):
+        if not info.name.startswith("bench_"): continue
+        module = importlib.import_module(f"benchmarks.{info.name}")
+        for name, obj in vars(module).items():
+            if not isinstance(obj, type) or name.startswith("_") or obj.__module__ != module.__name__: continue
+            methods = [m for m in dir(obj) if m.startswith(("time_", "peakmem_"))]
+            if any(re.search(pattern, f"{info.name}.{name}.{m}") for m in methods): yield info.name, name
+
+def _param_sets(cls):
+    params = getattr(cls, "params", [])
+    if not params: return [()]
+    if not isinstance(params[0], (list, tuple)): params = [params]
+    return list(itertools.product(*params))
+
+def _setup(instance, cache, args):
+    cache_args = () if cache is None else (cache,)
+    if hasattr(instance, "setup"): instance.setup(*cache_args, *args)
+    return cache_args
+
+def _peakmem_child(module_name, class_name, method, cache, args, conn):
+    cls = getattr(importlib.import_module(f"benchmarks.{module_name}"), class_name)
+    instance = cls()
+    cache_args = _setup(instance, cache, args)
+    getattr(instance, method)(*cache_args, *args)
+    conn.send(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)  # Linux reports KiB
+
+def _time(fn, call_args):
+    samples, started = [], time.perf_counter()
+    while len(samples) < MAX_REPEAT and (not samples or time.perf_counter() - started < SAMPLE_TIME):
+        t = time.perf_counter()
+        fn(*call_args)
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples)
+
+def run(pattern=".", out_dir=RESULTS_DIR):
+    results, caches = {}, {}
+    spawn = multiprocessing.get_context("spawn")
+    workdir = tempfile.mkdtemp(prefix="autoshield-bench-")
+    for module_name, class_name in _discover(pattern):
+        cls = getattr(importlib.import_module(f"benchmarks.{module_name}"), class_name)
+        cwd = os.getcwd()
+        os.chdir(workdir)  # setup_cache writes its files here, as under asv
+        try:
+            cache = None
+            if hasattr(cls, "setup_cache"):
+                # Classes inheriting one setup_cache share its result, as under asv
+                key = f"{cls.setup_cache.__module__}.{cls.setup_cache.__qualname__}"
+                if key not in caches: caches[key] = cls().setup_cache()
+                cache = caches[key]
+            for method in sorted(m for m in dir(cls) if m.startswith(("time_", "peakmem_"))):
+                name = f"{module_name}.{class_name}.{method}"
+                if not re.search(pattern, name): continue
+                values = {}
+                for args in _param_sets(cls):
+                    if method.startswith("peakmem_"):
+                        parent, child = spawn.Pipe()
+                        proc = spawn.Process(target=_peakmem_child, args=(module_name, class_name, method, cache, args, child))
+                        proc.start()
+                        value = parent.recv() if parent.poll(getattr(cls, "timeout", 60)) else None
+                        proc.join()
+                    else:
+                        instance = cls()
+                        cache_args = _setup(instance, cache, args)
+                        value = _time(getattr(instance, method), (*cache_args, *args))
+                    values[json.dumps(list(args))] = value
+                    print(f"{name}{list(args)}: {_format(method, value)}", flush=True)
+                results[name] = {"unit": "bytes" if method.startswith("peakmem_") else "seconds", "values": values}
+        finally:
+            os.chdir(cwd)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip() or "unknown"
+    dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip())
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{commit[:12]}{'-dirty' if dirty else ''}.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({
+            "commit": commit, "dirty": dirty, "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": platform.node(), "python": platform.python_version(), "results": results,
+        }, fh, indent=1)
+    print(f"Saved {path}")
+    return path
+
+def _format(method, value):
+    if value is None: return "failed"
+    if method.startswith("peakmem_"): return f"{value / 1e6:.1f} MB"
+    return f"{value * 1e3:.3f} ms"
+
+def compare(old_path, new_path, factor=1.1):
+    """Prints every benchmark present in both files; returns the number of regressions."""
+    with open(old_path, encoding="utf-8") as fh: old = json.load(fh)["results"]
+    with open(new_path, encoding="utf-8") as fh: new = json.load(fh)["results"]
+    regressions = 0
+    for name in sorted(set(old) & set(new)):
+        for args, after in new[name]["values"].items():
+            before = old[name]["values"].get(args)
+            if not before or not after: continue
+            ratio = after / before
+            mark = "+" if ratio > factor else "-" if ratio < 1 / factor else " "
+            regressions += mark == "+"
+            method = name.rsplit(".", 1)[1]
+            print(f"{mark} {ratio:6.2f}x  {_format(method, before):>12} -> {_format(method, after):>12}  {name}{json.loads(args)}")
+    return regressions
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(prog="python -m benchmarks.run compare")
+        parser.add_argument("old"); parser.add_argument("new")
+        parser.add_argument("--factor", type=float, default=1.1, help="ratio flagged as a change (default: %(default)s)")
+        args = parser.parse_args(argv[1:])
+        sys.exit(1 if compare(args.old, args.new, args.factor) else 0)
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run the AutoShield benchmarks")
+    parser.add_argument("-b", "--bench", default=".", help="regex on module.Class.method (default: all)")
+    parser.add_argument("--out", default=RESULTS_DIR, help="results directory (default: %(default)s)")
+    args = parser.parse_args(argv)
+    run(args.bench, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Multi-image assessment against the local StubBackend, and the incremental stream parser."""
+import json
+import threading
+import time
+
+import pytest
+
+from autoshield import assessment
+from autoshield.assessment import (
+    MOCK_JSON_OUTPUT, AssessmentParseError, IncrementalAssessmentParser, StubBackend, TruncatedAssessmentError,
+    assess_images, merge_assessments, parse_stream,
+)
+
+def _assessment(assessment_id, severity, *parts, detected=True):
+    return {
+        "assessment_id": assessment_id, "damage_detected": detected, "damage_severity": severity,
+        "parts_to_repair": [{"part_name": name, "action": action, "estimated_labor_hours": hours} for name, action, hours in parts],
+    }
+
+FRONT = _assessment("front", "Moderate", ("Front Bumper Cover", "Repair", 3.2), ("Right Headlamp", "R&I", 0.6))
+SIDE = _assessment("side", "Severe", ("right headlamp ", "Replace", 0.4), ("Right Front Fender", "Repair", 4.7))
+REAR = _assessment("rear", "Minor", ("Front  Bumper Cover", "Repair", 3.8), detected=False)
+
+def test_merge_dedupes_parts_and_sums_hours():
+    merged = merge_assessments([FRONT, SIDE, REAR])
+    parts = {p["part_name"].strip().lower(): p for p in merged["parts_to_repair"]}
+    assert len(merged["parts_to_repair"]) == 3
+    # More invasive action wins, even with fewer hours; equal actions keep the larger estimate
+    assert (parts["right headlamp"]["action"], parts["right headlamp"]["estimated_labor_hours"]) == ("Replace", 0.4)
+    assert parts["front  bumper cover"]["estimated_labor_hours"] == 3.8
+    assert merged["total_estimated_repair_hours"] == round(3.8 + 0.4 + 4.7, 2)
+    assert merged["damage_severity"] == "Severe" and merged["damage_detected"] is True
+    assert merged["assessment_id"] == "front+side+rear" and merged["images_assessed"] == 3
+
+def test_merge_of_nothing():
+    merged = merge_assessments([])
+    assert merged["parts_to_repair"] == [] and merged["total_estimated_repair_hours"] == 0 and merged["damage_severity"] is None
+
+def test_assess_images_runs_concurrently_and_merges():
+    backend = StubBackend({"front.jpg": FRONT, "side.jpg": json.dumps(SIDE), "rear.jpg": REAR}, delay=0.3)
+    progress = []
+    started = time.monotonic()
+    merged, per_image = assess_images(["front.jpg", "side.jpg", "rear.jpg"], backend, max_workers=3,
+                                      on_result=lambda done, total: progress.append((done, total)))
+    assert time.monotonic() - started < 0.8  # about one call, not three
+    assert sorted(backend.calls) == ["front.jpg", "rear.jpg", "side.jpg"]
+    assert [o["image"] for o in per_image] == ["front.jpg", "side.jpg", "rear.jpg"] and all(o["ok"] for o in per_image)
+    assert merged == merge_assessments([FRONT, SIDE, REAR])
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+
+def test_failed_image_is_reported_and_left_out_of_the_merge():
+    backend = StubBackend({"front.jpg": FRONT, "broken.jpg": "{not json"})
+    merged, per_image = assess_images(["front.jpg", "broken.jpg", "missing.jpg"], backend)
+    assert [o["ok"] for o in per_image] == [True, False, False]
+    assert per_image[1]["error"].startswith("JSONDecodeError") and "No stub output" in per_image[2]["error"]
+    assert merged == merge_assessments([FRONT])
+
+def test_call_timeout():
+    release = threading.Event()
+    fast = StubBackend({"front.jpg": FRONT})
+
+    def backend(path):
+        if path == "stuck.jpg": release.wait(5)
+        return fast(path)
+
+    try:
+        started = time.monotonic()
+        merged, per_image = assess_images(["front.jpg", "stuck.jpg"], backend, timeout=0.2)
+        assert time.monotonic() - started < 2
+    finally:
+        release.set()
+    assert per_image[0]["ok"] and not per_image[1]["ok"]
+    assert per_image[1]["error"] == "Timed out after 0.2s"
+    assert merged == merge_assessments([FRONT])
+
+def test_multi_image_task_publishes_parts_while_images_stream(monkeypatch):
+    release = threading.Event()
+
+    def stream(path, seconds=0.0):
+        text = json.dumps({"front.jpg": FRONT, "rear.jpg": REAR, "side.jpg": SIDE}[path])
+        if path == "side.jpg":  # first part streamed, then stuck until released
+            split = text.index("}", text.index("parts_to_repair")) + 1
+            yield text[:split]
+            release.wait(5)
+            yield text[split:]
+        else: yield from (text[i:i + 16] for i in range(0, len(text), 16))
+
+    monkeypatch.setattr(assessment, "assess_car_damage_stream", stream)
+    monkeypatch.setattr(assessment.assessment_cache, "get_or_assess", lambda path, sha, model_call, *key: model_call(path))
+    published = []
+
+    def report(progress, detail=None):
+        published.append((progress, {p["part_name"] for p in json.loads(detail)}))
+        if {"Front Bumper Cover", "right headlamp "} <= published[-1][1]: release.set()  # front done, side partial
+
+    items = [(path, path, path) for path in ("front.jpg", "side.jpg", "rear.jpg")]
+    merged = json.loads(assessment.run_multi_assessment_task(report, items))
+    # Side's first part was shown next to front's finished parts before side completed
+    assert any(progress < 0.99 and "right headlamp " in names and "Front Bumper Cover" in names for progress, names in published)
+    assert release.is_set()
+    assert published[-1][0] == pytest.approx(0.99) and published[-1][1] == {p["part_name"] for p in merged["parts_to_repair"]}
+    assert merged["parts_to_repair"] == merge_assessments([FRONT, SIDE, REAR])["parts_to_repair"]
+
+def test_assess_images_reports_each_outcome():
+    outcomes = []
+    assess_images(["front.jpg", "broken.jpg"], StubBackend({"front.jpg": FRONT}), max_workers=1, on_image=outcomes.append)
+    assert [(o["image"], o["ok"]) for o in outcomes] == [("front.jpg", True), ("broken.jpg", False)]
+    assert outcomes[0]["result"] == FRONT
+
+# =========================================================
+# IncrementalAssessmentParser
+# =========================================================
+MOCK_TEXT = MOCK_JSON_OUTPUT.strip()
+MOCK = json.loads(MOCK_TEXT)
+
+def test_parts_are_returned_as_soon_as_they_close():
+    parser = IncrementalAssessmentParser()
+    first = MOCK_TEXT.index("}", MOCK_TEXT.index("parts_to_repair")) + 1  # end of the first part
+    assert parser.feed(MOCK_TEXT[:first - 1]) == []
+    assert parser.feed(MOCK_TEXT[first - 1:first]) == MOCK["parts_to_repair"][:1]
+    assert parser.feed(MOCK_TEXT[first:]) == MOCK["parts_to_repair"][1:]
+    assert parser.close() == MOCK
+
+@pytest.mark.parametrize("size", [1, 7, 64])
+def test_any_chunking_gives_the_same_result(size):
+    seen = []
+    parsed, raw = parse_stream((MOCK_TEXT[i:i + size] for i in range(0, len(MOCK_TEXT), size)),
+                               on_part=lambda part, so_far: seen.append((part, len(so_far))))
+    assert parsed == MOCK and raw == MOCK_TEXT
+    assert seen == [(part, i + 1) for i, part in enumerate(MOCK["parts_to_repair"])]
+
+def test_brackets_and_quotes_inside_strings_are_ignored():
+    text = json.dumps({"note": "a } ] \" [ {", "parts_to_repair": [{"part_name": "Hood {inner} \"A\"", "action": "Repair"}]})
+    parser = IncrementalAssessmentParser()
+    assert [p["part_name"] for c in text for p in parser.feed(c)] == ['Hood {inner} "A"']
+    assert parser.close()["note"] == 'a } ] " [ {'
+
+def test_nested_arrays_outside_parts_are_not_parts():
+    text = json.dumps({"photos": [{"part_name": "not a part"}], "parts_to_repair": [{"part_name": "Fender", "extra": {"x": [1]}}]})
+    parser = IncrementalAssessmentParser()
+    assert parser.feed(text) == [{"part_name": "Fender", "extra": {"x": [1]}}]
+
+@pytest.mark.parametrize("text", ["", "{", MOCK_TEXT[:len(MOCK_TEXT) // 2], MOCK_TEXT[:-1]])
+def test_truncated_stream(text):
+    parser = IncrementalAssessmentParser()
+    parser.feed(text)
+    with pytest.raises(TruncatedAssessmentError):
+        parser.close()
+
+@pytest.mark.parametrize("text, message", [
+    ('Here is the JSON: {"a": 1}', "outside the JSON object"),
+    ('{"parts_to_repair": [{"part_name": "Hood"]}', "Unexpected ']'"),
+    ('{"a": 1}{"b": 2}', "single JSON object"),
+    ('{"parts_to_repair": [{"part_name": Hood}]}', "Malformed parts_to_repair entry"),
+])
+def test_malformed_stream_fails_in_feed(text, message):
+    parser = IncrementalAssessmentParser()
+    with pytest.raises(AssessmentParseError, match=message):
+        for ch in text: parser.feed(ch)
+
+def test_invalid_json_outside_parts_fails_on_close():
+    parser = IncrementalAssessmentParser()
+    parser.feed('{"damage_detected": yes, "parts_to_repair": []}')
+    with pytest.raises(AssessmentParseError) as error:
+        parser.close()
+    assert not isinstance(error.value, TruncatedAssessmentError)
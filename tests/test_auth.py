@@ -0,0 +1,60 @@
+"""Password hashing, login checks and the plaintext password migration."""
+import threading
+
+import pytest
+
+from autoshield import auth, storage
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "HASH_ITERATIONS", 1000)  # fast hashes for the tests
+    db_file = str(tmp_path / "autoshield.db")
+    storage.init_db(db_file)
+    with storage.transaction(db_file) as conn:
+        conn.executemany(
+            "INSERT INTO users (UserID, Username, Password, CustomerName, CustomerEmail, Role) VALUES (?, ?, ?, ?, ?, ?)",
+            [(1, "ann", "secret1", "Ann", "ann@example.com", "customer"), (2, "bo", 4242, "Bo", "bo@example.com", "admin")],
+        )
+    return db_file
+
+def _passwords(db_file):
+    with storage.transaction(db_file) as conn:
+        return {row["Username"]: (row["Password"], row["PasswordHash"]) for row in conn.execute("SELECT * FROM users")}
+
+def test_hash_round_trip():
+    encoded = auth.hash_password("correct horse", iterations=1000)
+    assert encoded.startswith("pbkdf2_sha256$1000$")
+    assert auth.verify_password("correct horse", encoded)
+    assert not auth.verify_password("correct hors", encoded)
+    assert auth.hash_password("correct horse", iterations=1000) != encoded  # salted
+    assert not auth.verify_password("correct horse", "correct horse")  # plaintext is never a valid hash
+    assert not auth.verify_password("x", None)
+
+def test_migrate_passwords_hashes_plaintext_once(db):
+    assert auth.migrate_passwords(db) == 2
+    migrated = _passwords(db)
+    assert all(plain is None and hashed.startswith("pbkdf2_sha256$") for plain, hashed in migrated.values())
+    assert auth.verify_password("4242", migrated["bo"][1])  # numeric cells from Users.xlsx
+    assert auth.migrate_passwords(db) == 0
+    assert _passwords(db) == migrated
+
+def test_authenticate(db):
+    assert auth.authenticate("ann", "secret1", db)["CustomerName"] == "Ann"  # migrates on first use
+    assert _passwords(db)["ann"][0] is None
+    assert auth.authenticate("ann", "wrong", db) is None
+    assert auth.authenticate("nobody", "secret1", db) is None
+    assert auth.set_password("ann", "new secret", db)
+    assert auth.authenticate("ann", "secret1", db) is None  # the index sees the change
+    assert auth.authenticate("ann", "new secret", db) is not None
+
+def test_current_version_shares_one_connection_across_threads(db):
+    before = storage.current_version("users", db)
+    conn = storage._version_conns[db]
+    versions = []
+    threads = [threading.Thread(target=lambda: versions.append(storage.current_version("users", db))) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert versions == [before] * 8
+    assert storage._version_conns[db] is conn  # not one per thread
+    auth.set_password("ann", "x", db)
+    assert storage.current_version("users", db) != before
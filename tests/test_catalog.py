@@ -0,0 +1,81 @@
+"""Parts catalog: lookups, assessment part matching and line-item pricing."""
+import csv
+
+import pytest
+
+from autoshield import catalog, reports
+
+PARTS = [
+    ("AUDI-FBC", "Front Bumper Cover", "Audi", "Q5", 2021, 2025, 612.40, 2.1, 3.0),
+    ("AUDI-FBC-OLD", "Front Bumper Cover", "Audi", "Q5", 2009, 2016, 455.00, 2.3, 3.0),
+    ("AUDI-HL-R", "RH Headlamp Assy", "Audi", "Q5", 2021, 2025, 1310.00, 0.8, 0.0),
+    ("AUDI-HOOD", "Hood Panel", "Audi", "Q5", "", "", 890.00, 1.5, 3.4),
+    ("AUDI-FBR", "Front Bumper Reinforcement", "Audi", "Q5", 2021, 2025, 240.00, 1.2, 0.0),
+    ("FORD-FBC", "Front Bumper Cover", "Ford", "F150", 2021, 2023, 388.10, 1.9, 2.6),
+    ("FORD-GRL", "Grille", "Ford", "F150", 2021, 2023, 265.00, 0.4, 0.0),
+]
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "parts.csv"
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(catalog.CATALOG_COLUMNS)
+        writer.writerows(PARTS)
+    db_file = str(tmp_path / "parts_catalog.db")
+    assert catalog.load(str(path), db_file) == len(PARTS)
+    return db_file
+
+def _number(part):
+    return part["PartNumber"] if part else None
+
+def test_match_part_exact_is_scoped_to_the_vehicle(db):
+    assert _number(catalog.match_part("Front Bumper Cover", "Audi", "Q5 Premium Quattro", 2022, db_file=db)) == "AUDI-FBC"
+    assert _number(catalog.match_part("Front Bumper Cover", "Audi", "Q5", 2012, db_file=db)) == "AUDI-FBC-OLD"
+    assert _number(catalog.match_part("front bumper cover", "FORD", "F150", 2022, db_file=db)) == "FORD-FBC"
+    assert _number(catalog.match_part("Hood Panel", "Audi", "Q5", 1999, db_file=db)) == "AUDI-HOOD"  # fits every year
+
+def test_match_part_corrects_misspellings_and_abbreviations(db):
+    assert _number(catalog.match_part("Right headlmap assembly", "Audi", "Q5", 2023, db_file=db)) == "AUDI-HL-R"
+    assert _number(catalog.match_part("FRT bumpr cover", "Audi", "Q5", 2023, db_file=db)) == "AUDI-FBC"
+
+def test_match_part_rejects_dissimilar_parts(db):
+    assert catalog.match_part("Windshield", "Audi", "Q5", 2023, db_file=db) is None
+    assert catalog.match_part("Grille", "Audi", "Q5", 2023, db_file=db) is None  # only the Ford has one
+
+def test_lookup_by_prefix_and_words(db):
+    found = [_number(p) for p in catalog.lookup("front bum", "Audi", "Q5", 2022, db_file=db)]
+    assert found[:2] == ["AUDI-FBC", "AUDI-FBR"]
+    assert "AUDI-FBC-OLD" not in found and "FORD-FBC" not in found
+    assert _number(catalog.lookup("cover bumper front", "Ford", "F150", db_file=db)[0]) == "FORD-FBC"
+
+def test_line_item_pricing_rules(db):
+    row = catalog.match_part("Front Bumper Cover", "Audi", "Q5", 2022, db_file=db)
+    replace = catalog.line_item({"part_name": "Front Bumper Cover", "action": "Replace", "estimated_labor_hours": 5.0}, row, 1)
+    assert (replace["oper"], replace["part_cost"], replace["labor_hours"], replace["paint_hours"]) == ("Repl", 612.40, 2.1, 3.0)
+    repair = catalog.line_item({"part_name": "Front Bumper Cover", "action": "Repair", "estimated_labor_hours": 1.5}, row, 2)
+    assert (repair["oper"], repair["part_cost"], repair["labor_hours"], repair["paint_hours"]) == ("Rpr", 0.0, 1.5, 3.0)
+    no_estimate = catalog.line_item({"part_name": "Front Bumper Cover", "action": "Repair"}, row, 3)
+    assert no_estimate["labor_hours"] == 2.1  # book labor when the assessment has none
+    r_and_i = catalog.line_item({"part_name": "Front Bumper Cover", "action": "Remove and  install", "estimated_labor_hours": 0.7}, row, 4)
+    assert (r_and_i["oper"], r_and_i["part_cost"], r_and_i["labor_hours"], r_and_i["paint_hours"]) == ("R&I", 0.0, 0.7, 0.0)
+
+def test_line_items_lists_unmatched_parts(db):
+    assessment = {"parts_to_repair": [
+        {"part_name": "Front Bumper Cover", "action": "Replace", "estimated_labor_hours": 2.0},
+        {"part_name": "Flux capacitor", "action": "Replace", "estimated_labor_hours": 4.5},
+    ]}
+    items, unmatched = catalog.line_items(assessment, {"make": "Ford", "model": "F150", "year": 2022}, db)
+    assert unmatched == ["Flux capacitor"]
+    assert [i["line"] for i in items] == [1, 2]
+    assert (items[0]["part_number"], items[0]["part_cost"]) == ("FORD-FBC", 388.10)
+    assert (items[1]["part_number"], items[1]["part_cost"], items[1]["labor_hours"], items[1]["paint_hours"]) == ("", 0.0, 4.5, 0.0)
+
+def test_estimate_is_priced_for_the_job_vehicle(db):
+    job = {"JobID": "J1", "CustomerName": "Ann Lee", "Vehicle": "2022 Ford F150"}
+    assessment = {"parts_to_repair": [{"part_name": "Front Bumper Cover", "action": "Replace"}]}
+    data, unmatched = catalog.estimate(assessment, reports.job_estimate(job), db)
+    assert unmatched == [] and data["insured"] == "Ann Lee"
+    assert data["vehicle"]["make"] == "Ford" and data["line_items"][0]["part_number"] == "FORD-FBC"
+    assert reports.SAMPLE_DATA["vehicle"]["make"] == "AUDI"  # the sample is not modified
+    assert reports.job_estimate(None) is reports.SAMPLE_DATA
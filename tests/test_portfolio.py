@@ -0,0 +1,70 @@
+"""batch_totals must agree with reports.compute_totals on every column, for every estimate."""
+import copy
+
+import pandas as pd
+import pytest
+
+from autoshield import portfolio, reports
+from autoshield.reports import SAMPLE_DATA, compute_totals
+
+from benchmarks import generators
+
+def _estimate(line_items, **fields):
+    data = copy.deepcopy(SAMPLE_DATA)
+    data["line_items"] = line_items
+    loss = fields.pop("loss", None)
+    if loss is not None: data["loss"] = loss
+    data.update(fields)
+    return data
+
+EDGE_CASES = {
+    "sample": copy.deepcopy(SAMPLE_DATA),
+    "no_line_items": _estimate([]),
+    "missing_fields": _estimate([
+        {"line": 1, "oper": "Rpr", "desc": "no labor hours", "part_cost": 12.5, "paint_hours": 1.2},
+        {"line": 2, "oper": "Repl", "desc": "no part cost or qty", "labor_hours": 0.7},
+        {"line": 3, "oper": "Scan", "desc": "nothing at all"},
+    ]),
+    "bare_header": {"loss": {}, "line_items": [{"part_cost": 10.0, "labor_hours": 1.0, "paint_hours": 0.5}]},
+    # Binary values just below / at / above half a cent, where np.round and round() can disagree
+    "half_cents": _estimate([
+        {"part_cost": 0.125, "qty": 1, "labor_hours": 0.005, "paint_hours": 0.015},
+        {"part_cost": 1.005, "qty": 3, "labor_hours": 2.675, "paint_hours": 0.285},
+    ], misc_charges=0.045, other_charges=1.115, sales_tax_rate=0.0725, loss={"deductible": 0.005}),
+    "per_estimate_rates": _estimate([
+        {"part_cost": 99.99, "qty": 2, "labor_hours": 1.3, "paint_hours": 2.2, "labor_rate": 95.5},
+        {"part_cost": 15.0, "labor_hours": 0.4, "paint_hours": 0.9, "paint_rate": 61.25},
+        {"part_cost": 0.0, "labor_hours": 3.1, "paint_hours": 0.0},
+    ], default_labor_rate=72.0, default_paint_rate=66.5, sales_tax_rate=0.0925,
+       feather_prime_and_block_hours=1.1, feather_prime_and_block_rate=70.0,
+       paint_supplies_hours=3.3, paint_supply_rate=47.5, loss={"deductible": 500.0}),
+}
+
+def _assert_matches(estimates):
+    totals = portfolio.batch_totals(*portfolio.frames_from_estimates(estimates))
+    assert list(totals.columns) == portfolio.TOTALS_COLUMNS
+    assert list(totals.index) == [estimate_id for estimate_id, _ in estimates]
+    for estimate_id, data in estimates:
+        expected = compute_totals(data)
+        actual = totals.loc[estimate_id]
+        for column in portfolio.TOTALS_COLUMNS:
+            assert actual[column] == expected[column], f"{estimate_id}: {column}"
+
+@pytest.mark.parametrize("name", sorted(EDGE_CASES))
+def test_edge_case_matches_compute_totals(name):
+    _assert_matches([(name, EDGE_CASES[name])])
+
+def test_mixed_batch_matches_compute_totals():
+    """Edge cases and synthetic estimates in one batch: per-estimate sums must not bleed into each other."""
+    estimates = list(EDGE_CASES.items()) + [(f"synthetic-{i}", generators.estimate(i % 25, seed=i)) for i in range(300)]
+    _assert_matches(estimates)
+
+def test_empty_batch():
+    totals = portfolio.batch_totals(*portfolio.frames_from_estimates([]))
+    assert totals.empty and list(totals.columns) == portfolio.TOTALS_COLUMNS
+
+def test_line_items_of_unknown_estimates_are_ignored():
+    estimates_df, line_items_df = portfolio.frames_from_estimates([("a", EDGE_CASES["sample"])])
+    stray = line_items_df.iloc[:1].assign(estimate_id="unknown", part_cost=1e6)
+    totals = portfolio.batch_totals(estimates_df, pd.concat([line_items_df, stray], ignore_index=True))
+    assert totals.loc["a", "total_cost_of_repairs"] == reports.compute_totals(EDGE_CASES["sample"])["total_cost_of_repairs"]
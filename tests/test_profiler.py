@@ -0,0 +1,40 @@
+"""Rerun profiling: fragment reruns are captured, a fragment inside a whole rerun is not captured twice."""
+from streamlit.testing.v1 import AppTest
+
+from autoshield import metrics, profiler
+
+def _page():
+    import streamlit as st
+
+    from autoshield import profiler, ui
+
+    st.session_state["page_runs"] = st.session_state.get("page_runs", 0) + 1
+
+    @ui._fragment("demo")
+    def demo():
+        st.session_state["fragment_runs"] = st.session_state.get("fragment_runs", 0) + 1
+
+    with profiler.Capture("page", requested=True): demo()  # like ui.main()
+    st.button("Rerun the fragment", key="again", on_click=lambda: st.rerun(["demo"]))
+
+def _count(section):
+    return next((row["count"] for row in metrics.summary() if row["section"] == section), 0)
+
+def test_fragment_only_rerun_is_captured(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    timed = _count("fragment_demo")
+    at = AppTest.from_function(_page)
+    at.session_state["profile_session"] = True
+    at.run()
+    assert [c["label"] for c in profiler.captures()] == ["page"]
+
+    at.button(key="again").click().run()
+    assert at.session_state["page_runs"] == 1 and at.session_state["fragment_runs"] == 2
+    assert sorted(c["label"] for c in profiler.captures()) == ["anonymous-demo", "page"]
+    assert _count("fragment_demo") == timed + 2
+
+def test_nested_capture_is_part_of_the_outer_one(tmp_path):
+    with profiler.Capture("outer", requested=True, profile_dir=str(tmp_path)) as outer:
+        with profiler.Capture("inner", requested=True, profile_dir=str(tmp_path)) as inner: pass
+    assert outer.path is not None and inner.path is None
+    assert [c["label"] for c in profiler.captures(str(tmp_path))] == ["outer"]
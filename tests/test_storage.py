@@ -0,0 +1,98 @@
+"""Storage invariants: triggers keep the rollups and search indexes in step with the tables."""
+import pytest
+from openpyxl import Workbook
+
+from autoshield import reports, rollups, storage
+
+def _workbook(path, repairs, messages=()):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Repairs"
+    ws.append(storage.REPAIR_COLUMNS)
+    for row in repairs: ws.append([row.get(c) for c in storage.REPAIR_COLUMNS])
+    ws = wb.create_sheet("Messages")
+    ws.append(storage.MESSAGE_COLUMNS)
+    for row in messages: ws.append([row.get(c) for c in storage.MESSAGE_COLUMNS])
+    wb.save(path)
+    return str(path)
+
+def test_import_with_repeated_job_id_keeps_rollups_and_search_in_step(tmp_path):
+    db = str(tmp_path / "autoshield.db")
+    repairs = _workbook(tmp_path / "repairs.xlsx", [
+        {"JobID": "J1", "CustomerName": "Ann", "Vehicle": "2021 Audi Q5", "Status": "Open", "LastUpdate": "2025-01-01 09:00:00"},
+        {"JobID": "J2", "CustomerName": "Bo", "Vehicle": "2019 BMW X5", "Status": "Open", "LastUpdate": "2025-01-01 10:00:00"},
+        {"JobID": "J1", "CustomerName": "Ann", "Vehicle": "2022 Ford F150", "Status": "Closed", "LastUpdate": "2025-01-02 09:00:00"},
+    ], [{"MessageID": "1", "JobID": "J1", "PostedBy": "Ann", "PostedAt": "2025-01-01 09:30:00", "Subject": "Hi", "Body": "Bumper"}])
+    storage.import_xlsx(str(tmp_path / "no_users.xlsx"), repairs, db)
+
+    incremental = rollups.snapshot(db_file=db)
+    assert incremental["jobs"] == 2 and incremental["jobs_by_status"] == {"Closed": 1, "Open": 1}
+    rollups.rebuild(db)
+    assert rollups.snapshot(db_file=db) == incremental
+
+    with storage.transaction(db) as conn:
+        for name in storage.SEARCH_TABLES: conn.execute(f"INSERT INTO {name} ({name}) VALUES ('integrity-check')")
+    assert storage.search_jobs("audi", db_file=db) == []  # the replaced row's words are gone
+    assert storage.search_jobs("ford", db_file=db) == ["J1"]
+
+def test_add_estimate_records_each_estimate_once_per_job(tmp_path):
+    db = str(tmp_path / "autoshield.db")
+    storage.init_db(db)
+    estimate = dict(reports.SAMPLE_DATA)
+    totals = reports.compute_totals(estimate)
+    first = storage.add_estimate("Ann", estimate, totals, "J1", db)
+    assert storage.add_estimate("Ann", estimate, totals, "J1", db) == first  # e.g. Generate clicked twice
+    assert storage.add_estimate("Ann", estimate, totals, "J2", db) != first
+    assert storage.add_estimate("Ann", {**estimate, "claim_number": "C-2"}, totals, "J1", db) != first
+    assert rollups.snapshot(db_file=db)["estimates"] == 3
+
+def test_scoped_message_search_ranks_like_the_unscoped_search(tmp_path):
+    db = str(tmp_path / "autoshield.db")
+    storage.init_db(db)
+    posts = [
+        ("J1", "Supplement", "Radiator supplement approved by the insurer"),
+        ("J1", "Parts", "Radiator on order, bumper cover arrived"),
+        ("J1", "Update", "Waiting on the supplement for the hood panel and the radiator support"),
+        ("J2", "Supplement request", "Supplement sent for the radiator"),
+        ("J2", "Pickup", "Car is ready for pickup"),
+        ("J3", "Estimate", "Bumper, grille and radiator need replacing after the front impact"),
+    ]
+    for job, subject, body in posts: storage.add_message(job, "Shop", subject, body, db_file=db)
+    for text in ["radiator", "supplement radiator", "Bumper radiator"]:
+        everywhere = storage.search_messages(text, db_file=db).set_index("MessageID")["Rank"]
+        scoped = storage.search_messages(text, ["J1", "J2"], db_file=db).set_index("MessageID")["Rank"]
+        assert set(scoped.index) <= set(everywhere.index) and len(scoped)
+        for message_id, rank in scoped.items(): assert rank == pytest.approx(everywhere[message_id])
+
+def test_excel_serial_dates_are_stored_as_timestamps(tmp_path):
+    db = str(tmp_path / "autoshield.db")
+    repairs = _workbook(tmp_path / "repairs.xlsx", [
+        {"JobID": "J1", "CustomerName": "Ann", "Vehicle": "2021 Audi Q5", "Status": "Open", "LastUpdate": 45978},  # 2025-11-17
+        {"JobID": "J2", "CustomerName": "Bo", "Vehicle": "2019 BMW X5", "Status": "Open", "LastUpdate": "2025-11-20 10:00:00"},
+        {"JobID": "J3", "CustomerName": "Cy", "Vehicle": "2020 Kia Rio", "Status": "Open", "LastUpdate": "45900.5"},  # 2025-08-31 noon
+    ], [{"MessageID": "1", "JobID": "J1", "PostedBy": "Ann", "PostedAt": 45978.25, "Subject": "Hi", "Body": "Bumper"}])
+    storage.import_xlsx(str(tmp_path / "no_users.xlsx"), repairs, db)
+
+    jobs, total = storage.query_jobs(updated_from="2025-11-01", updated_to="2025-12-01", sort="LastUpdate", db_file=db)
+    assert total == 2 and list(jobs["JobID"]) == ["J1", "J2"]
+    assert list(jobs["LastUpdate"]) == ["2025-11-17 00:00:00", "2025-11-20 10:00:00"]
+    jobs, _ = storage.query_jobs(sort="LastUpdate", db_file=db)
+    assert list(jobs["JobID"]) == ["J3", "J1", "J2"] and jobs["LastUpdate"].iloc[0] == "2025-08-31 12:00:00"
+    with storage.connect(db) as conn:
+        assert conn.execute("SELECT PostedAt FROM messages").fetchone()[0] == "2025-11-17 06:00:00"
+
+def test_init_db_converts_serial_dates_already_stored(tmp_path):
+    db = str(tmp_path / "autoshield.db")
+    storage.init_db(db)
+    with storage.transaction(db) as conn:
+        conn.execute("INSERT INTO repairs (JobID, CustomerName, Status, LastUpdate) VALUES ('J1', 'Ann', 'Open', '45978')")
+        conn.execute("INSERT INTO repairs (JobID, CustomerName, Status, LastUpdate) VALUES ('J2', 'Bo', 'Open', '2025-11-20 10:00:00')")
+        conn.execute("INSERT INTO messages (JobID, PostedBy, PostedAt, Subject, Body) VALUES ('J1', 'Ann', 45978.25, 'Hi', 'Bumper')")
+        conn.execute("DELETE FROM meta WHERE key = 'excel_dates_converted'")
+    storage.init_db(db)
+    with storage.connect(db) as conn:
+        assert [r[0] for r in conn.execute("SELECT LastUpdate FROM repairs ORDER BY JobID")] == ["2025-11-17 00:00:00", "2025-11-20 10:00:00"]
+        assert conn.execute("SELECT PostedAt FROM messages").fetchone()[0] == "2025-11-17 06:00:00"
+    converted = rollups.snapshot(db_file=db)
+    rollups.rebuild(db)
+    assert rollups.snapshot(db_file=db) == converted
@@ -0,0 +1,46 @@
+"""Background tasks: results are read back and finished tasks do not pile up."""
+import threading
+import time
+
+import pytest
+
+from autoshield import storage, tasks
+
+@pytest.fixture(autouse=True)
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_FILE", str(tmp_path / "autoshield.db"))
+    storage.init_db()
+
+def _wait(task_id, timeout=5):
+    deadline = time.time() + timeout
+    while tasks.is_pending(tasks.get(task_id)):
+        assert time.time() < deadline
+        time.sleep(0.01)
+    return tasks.get(task_id)
+
+def _count(owner=None):
+    with storage.transaction() as conn:
+        if owner is None: return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+        return conn.execute("SELECT COUNT(*) FROM tasks WHERE Owner = ?", (owner,)).fetchone()[0]
+
+def test_submit_keeps_one_finished_task_per_owner_and_kind():
+    for n in range(5): assert _wait(tasks.submit("report", "ann", lambda report, n: b"%d" % n, n))["Result"] == b"%d" % n
+    _wait(tasks.submit("assessment", "ann", lambda report: "{}"))
+    _wait(tasks.submit("report", "bo", lambda report: b"pdf"))
+    assert _count("ann") == 2 and _count("bo") == 1
+    assert tasks.latest("ann", "report")["Result"] == b"4"
+
+def test_submit_keeps_the_running_task():
+    release = threading.Event()
+    running = tasks.submit("report", "ann", lambda report: release.wait(5) and b"first")
+    second = tasks.submit("report", "ann", lambda report: b"second")
+    _wait(second)
+    release.set()
+    assert _wait(running)["Result"] == b"first" and _count("ann") == 2
+
+def test_prune_drops_tasks_past_their_ttl(monkeypatch):
+    _wait(tasks.submit("report", "ann", lambda report: b"old"))
+    monkeypatch.setattr(tasks, "TASK_TTL", 0.0)
+    time.sleep(0.01)
+    _wait(tasks.submit("report", "bo", lambda report: b"new"))
+    assert _count("ann") == 0 and _count("bo") == 1